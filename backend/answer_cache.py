@@ -0,0 +1,237 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# 기본 설정 (환경 변수로 변경 가능, ANSWER_CACHE=1 일 때만 사용)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE", "0") == "1"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 60 * 60)))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+
+# SSE로 저장된 답변을 다시 보낼 때 한 조각의 글자 수
+REPLAY_CHUNK_CHARS = 8
+
+
+def replay_chunks(answer: str, size: int = REPLAY_CHUNK_CHARS) -> List[str]:
+    """저장된 답변을 스트리밍 응답처럼 보내기 위해 조각으로 나눔"""
+    return [answer[i:i + size] for i in range(0, len(answer), size)] or [""]
+
+
+class SemanticAnswerCache:
+    """
+    의미 기반 답변 캐시
+
+    질문 임베딩(RAGManager가 이미 계산한 ko-sroberta 벡터)이 비슷하고
+    검색된 참고 문서가 같은 이전 질문이 있으면 저장된 답변을 재사용해요.
+    - 크기(LRU)와 유효 시간 기준으로 삭제
+    - 참고한 문서가 삭제되면 그 문서를 사용한 답변도 삭제
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_SIZE,
+        ttl_seconds: Optional[float] = ANSWER_CACHE_TTL,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+    ):
+        """
+        Args:
+            max_entries: 최대 저장 답변 수 (넘으면 가장 오래 쓰지 않은 답변부터 삭제)
+            ttl_seconds: 답변 유효 시간(초), None이면 만료 없음
+            threshold: 코사인 유사도가 이 값 이상이어야 같은 질문으로 봄
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.threshold = threshold
+
+        self._entries = OrderedDict()
+        # 정규화된 질문 임베딩 행렬 (앞의 len(_matrix_keys) 행만 사용, 모자라면 두 배로 늘림)
+        # 답변을 지우면 마지막 행을 그 자리로 옮겨서 행렬을 다시 만들지 않음
+        self._matrix = None
+        self._matrix_keys = []
+        self._rows = {}
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._hit_similarity = 0.0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expired(self, entry: Dict, now: float) -> bool:
+        return self.ttl is not None and now - entry['created_at'] > self.ttl
+
+    def _append_row(self, key: int, embedding: np.ndarray):
+        count = len(self._matrix_keys)
+        if self._matrix is None or self._matrix.shape[1] != embedding.shape[0]:
+            # 임베딩 모델이 바뀌어 차원이 다르면 이전 답변은 비교할 수 없으므로 행렬과 함께 삭제
+            stale = [other for other in self._entries if other != key]
+            for other in stale:
+                del self._entries[other]
+            self.invalidations += len(stale)
+            self._matrix = np.zeros((min(64, self.max_entries + 1), embedding.shape[0]), dtype=np.float32)
+            self._matrix_keys, self._rows, count = [], {}, 0
+        elif count == self._matrix.shape[0]:
+            grown = np.zeros((count * 2, self._matrix.shape[1]), dtype=np.float32)
+            grown[:count] = self._matrix
+            self._matrix = grown
+        self._matrix[count] = embedding
+        self._matrix_keys.append(key)
+        self._rows[key] = count
+
+    def _remove(self, key: int):
+        self._entries.pop(key, None)
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        # 마지막 행을 지운 자리로 옮김 (O(dim))
+        last = len(self._matrix_keys) - 1
+        if row != last:
+            moved = self._matrix_keys[last]
+            self._matrix[row] = self._matrix[last]
+            self._matrix_keys[row] = moved
+            self._rows[moved] = row
+        self._matrix_keys.pop()
+
+    def lookup(self, embedding: Sequence[float], doc_ids: Iterable[str]) -> Optional[Dict]:
+        """
+        비슷한 질문의 저장된 답변 찾기
+
+        Args:
+            embedding: 질문 임베딩
+            doc_ids: 이번 질문으로 검색된 참고 문서 ID들
+
+        Returns:
+            {'answer', 'sources', 'similarity', ...} 또는 None
+        """
+        doc_key = tuple(sorted(doc_ids))
+        query = self._normalize(embedding)
+        now = time.time()
+
+        with self._lock:
+            best_key, best_similarity = None, self.threshold
+            expired = []
+            if self._matrix_keys and self._matrix.shape[1] == query.shape[0]:
+                similarities = self._matrix[:len(self._matrix_keys)] @ query
+                for index in np.argsort(-similarities):
+                    similarity = float(similarities[index])
+                    if similarity < self.threshold:
+                        break
+                    key = self._matrix_keys[index]
+                    entry = self._entries[key]
+                    if self._expired(entry, now):
+                        expired.append(key)
+                        continue
+                    if entry['doc_ids'] == doc_key:
+                        best_key, best_similarity = key, similarity
+                        break
+
+            # 행 위치가 바뀌므로 만료된 답변은 훑은 뒤에 삭제
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            entry = self._entries[best_key]
+            self._entries.move_to_end(best_key)
+            entry['hits'] += 1
+            self.hits += 1
+            self._hit_similarity += best_similarity
+            return {
+                'answer': entry['answer'],
+                'sources': list(entry['sources']),
+                'backend': entry['backend'],
+                'similarity': round(best_similarity, 4),
+            }
+
+    def store(self, embedding: Sequence[float], doc_ids: Iterable[str], answer: str,
+              sources: Optional[List[Dict]] = None, backend: Optional[str] = None):
+        """새 답변 저장"""
+        if not answer:
+            return
+
+        entry = {
+            'embedding': self._normalize(embedding),
+            'doc_ids': tuple(sorted(doc_ids)),
+            'answer': answer,
+            'sources': list(sources or []),
+            'backend': backend,
+            'created_at': time.time(),
+            'hits': 0,
+        }
+
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = entry
+            self.stores += 1
+
+            self._append_row(key, entry['embedding'])
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_documents(self, doc_ids: Iterable[str]) -> int:
+        """삭제된 문서를 참고한 답변 삭제"""
+        removed_ids = set(doc_ids)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if removed_ids.intersection(entry['doc_ids'])]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._matrix = None
+            self._matrix_keys = []
+            self._rows = {}
+
+    def on_documents_changed(self, event: str, doc_ids: Optional[List[str]] = None):
+        """
+        RAGManager 문서 변경 알림 처리
+
+        추가된 문서는 검색 결과(doc_ids)가 달라져서 자연히 캐시를 벗어나므로
+        삭제/전체 삭제일 때만 답변을 지워요.
+        """
+        if event == 'clear':
+            self.clear()
+        elif event == 'delete' and doc_ids:
+            self.invalidate_documents(doc_ids)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_entries,
+                'ttl': self.ttl,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'avg_hit_similarity': round(self._hit_similarity / self.hits, 4) if self.hits else None,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,566 @@
+"""
+비동기(asyncio) 서버 모드
+
+Flask 서버(server.py)와 같은 JSON/SSE 응답 형식을 유지하면서
+- Ollama 호출은 AsyncClient로 기다리는 동안 다른 요청을 처리하고
+- 임베딩/ChromaDB 같은 블로킹 작업은 스레드 풀(executor)에서 실행해요.
+
+실행:
+    python async_server.py
+    hypercorn async_server:app --bind 0.0.0.0:5000
+"""
+import asyncio
+import contextvars
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+
+from ollama import AsyncClient
+from quart import Quart, Response, jsonify, request
+from quart_cors import cors
+from werkzeug.utils import secure_filename
+
+from answer_cache import replay_chunks
+from ingest_jobs import QueueFullError
+from metrics import (
+    REGISTRY,
+    annotate,
+    begin_stream,
+    current_trace,
+    finish_trace,
+    observe_stage,
+    record_error,
+    stage_timer,
+    start_trace,
+    use_trace,
+)
+from prompt_builder import STREAM_RAG_TEMPLATE, model_options
+from rag_manager import build_where
+from seed_materials import load_seed_materials
+from session_store import HISTORY_TOKEN_BUDGET
+from stream_relay import STREAM_HEADERS, StreamRelay, StreamStats
+from token_logger import get_logger as get_token_logger
+from server import (
+    LOCAL_MODEL,
+    MODEL_WARMUP,
+    OLLAMA_TIMEOUT,
+    allowed_file,
+    answer_cache,
+    answer_cache_key,
+    build_chat_messages,
+    build_upload_metadata,
+    collect_sources,
+    ingest_jobs,
+    log_ollama_usage,
+    rag_manager,
+    router,
+    save_upload_path,
+    sessions,
+    upload_accepted_response,
+)
+
+# 임베딩/ChromaDB 작업용 스레드 수
+RAG_EXECUTOR_WORKERS = int(os.getenv('RAG_EXECUTOR_WORKERS', '4'))
+
+app = Quart(__name__)
+app = cors(
+    app,
+    allow_origin=["http://localhost:3000", "http://127.0.0.1:3000"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization", "X-Request-ID"],
+    expose_headers=["Content-Type", "X-Request-ID"],
+    allow_credentials=True,
+    max_age=3600
+)
+
+rag_executor = ThreadPoolExecutor(max_workers=RAG_EXECUTOR_WORKERS, thread_name_prefix='rag')
+ollama_client = AsyncClient(timeout=OLLAMA_TIMEOUT)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """블로킹 함수(임베딩, ChromaDB 등)를 스레드 풀에서 실행 (요청 추적이 이어지도록 컨텍스트 복사)"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(rag_executor, partial(context.run, func, *args, **kwargs))
+
+
+async def ask_backend(name, user_message, messages):
+    """백엔드 하나에서 전체 답변 받기"""
+    if name != 'local':
+        return await run_blocking(router.backends[name], user_message, messages)
+
+    started = time.perf_counter()
+    with stage_timer('llm_local'):
+        response = await ollama_client.chat(model=LOCAL_MODEL, messages=messages, **model_options(LOCAL_MODEL))
+    answer = response['message']['content']
+    log_ollama_usage(user_message, answer, response, started)
+    return answer
+
+
+async def route_answer(user_message, messages):
+    """라우터 계획에 따라 답변 생성 (server.py의 router.route와 같은 결과 형식)"""
+    plan = router.plan(user_message)
+    errors = []
+    started = time.perf_counter()
+
+    for name in plan['order']:
+        call_started = time.perf_counter()
+        try:
+            response = await ask_backend(name, user_message, messages)
+        except Exception as e:
+            router.record(name, (time.perf_counter() - call_started) * 1000, ok=False)
+            errors.append(f"{name}: {e}")
+            print(f"⚠️  {name} 백엔드 실패, 다음 백엔드로 대체: {e}")
+            continue
+
+        router.record(name, (time.perf_counter() - call_started) * 1000, ok=True)
+        fallback_used = name != plan['order'][0]
+        router.record_decision(plan, name, fallback_used, (time.perf_counter() - started) * 1000,
+                               len(user_message), errors)
+        return {
+            'response': response,
+            'backend': name,
+            'level': plan['level'],
+            'fallback_used': fallback_used,
+        }
+
+    router.record_decision(plan, 'none', True, (time.perf_counter() - started) * 1000,
+                           len(user_message), errors)
+    raise RuntimeError("모든 LLM 백엔드 호출 실패: " + "; ".join(errors))
+
+
+async def stream_backend(name, user_message, messages):
+    """백엔드 하나에서 답변 조각 생성 (로컬은 토큰 단위, GPT는 전체 답변 한 조각)"""
+    if name != 'local':
+        yield await run_blocking(router.backends[name], user_message, messages)
+        return
+
+    started = time.perf_counter()
+    stream = await ollama_client.chat(
+        model=LOCAL_MODEL, messages=messages, stream=True, **model_options(LOCAL_MODEL)
+    )
+
+    contents = []
+    final_chunk = {}
+    first_token_at = None
+    try:
+        async for chunk in stream:
+            if 'message' in chunk and 'content' in chunk['message']:
+                content = chunk['message']['content']
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    observe_stage('ttft', first_token_at - started)
+                contents.append(content)
+                yield content
+            if chunk.get('done'):
+                final_chunk = chunk
+    finally:
+        # 중간에 닫히거나 취소되면(클라이언트 연결 끊김) Ollama HTTP 스트림도 닫아서 생성을 멈춤
+        await stream.aclose()
+
+    if first_token_at is not None:
+        observe_stage('generate', time.perf_counter() - first_token_at)
+    log_ollama_usage(user_message, ''.join(contents), final_chunk, started)
+
+
+async def stream_routed_answer(user_message, messages, outcome=None):
+    """
+    라우터 계획에 따라 답변 조각 생성 (server.py의 stream_routed_answer와 같은 동작)
+
+    첫 조각을 보내기 전에 실패하면 다음 백엔드로 대체해요.
+    """
+    plan = router.plan(user_message)
+    errors = []
+    started = time.perf_counter()
+
+    for name in plan['order']:
+        call_started = time.perf_counter()
+        sent = False
+        try:
+            async for content in stream_backend(name, user_message, messages):
+                sent = True
+                yield content
+        except Exception as e:
+            router.record(name, (time.perf_counter() - call_started) * 1000, ok=False)
+            errors.append(f"{name}: {e}")
+            if sent:
+                raise
+            print(f"⚠️  {name} 백엔드 실패, 다음 백엔드로 대체: {e}")
+            continue
+
+        router.record(name, (time.perf_counter() - call_started) * 1000, ok=True)
+        router.record_decision(plan, name, name != plan['order'][0],
+                               (time.perf_counter() - started) * 1000, len(user_message), errors)
+        if outcome is not None:
+            outcome['backend'] = name
+        return
+
+    router.record_decision(plan, 'none', True, (time.perf_counter() - started) * 1000,
+                           len(user_message), errors)
+    raise RuntimeError("모든 LLM 백엔드 호출 실패: " + "; ".join(errors))
+
+
+@app.before_request
+async def begin_request_trace():
+    """요청 추적 시작 (server.py와 같은 방식, X-Request-ID가 있으면 그대로 사용)"""
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    start_trace(endpoint, request.method, request.headers.get('X-Request-ID'))
+
+
+@app.after_request
+async def end_request_trace(response):
+    """응답 헤더에 request id 추가 (스트리밍 응답은 마지막 이벤트를 보낸 뒤 추적 종료)"""
+    trace = current_trace()
+    if trace is not None:
+        response.headers['X-Request-ID'] = trace.request_id
+        if not trace.streaming:
+            finish_trace(trace, response.status_code)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Prometheus 형식 지표 (server.py의 /metrics와 같음)"""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+    """서버 상태 확인 (liveness: 프로세스가 살아 있으면 항상 200)"""
+    health = {
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'ready': rag_manager.is_ready(),
+        'cache_stats': rag_manager.cache_stats(),
+        'encode_batching': rag_manager.encode_batch_stats(),
+        'token_log': get_token_logger().stats(),
+        'sessions': sessions.stats(),
+        'ingest_jobs': ingest_jobs.stats()
+    }
+    if answer_cache is not None:
+        health['answer_cache'] = answer_cache.stats()
+
+    # 모델/벡터 DB가 준비되기 전에는 통계 조회로 응답이 늦어지지 않도록 생략
+    if health['ready']:
+        health['rag_stats'] = rag_manager.get_stats(detailed=False)
+
+    return jsonify(health)
+
+
+@app.route('/health/ready', methods=['GET'])
+async def readiness_check():
+    """준비 상태 확인 (readiness: 임베딩 모델과 벡터 DB가 로드되어야 200)"""
+    readiness = rag_manager.readiness()
+    return jsonify(readiness), 200 if readiness['ready'] else 503
+
+
+@app.route('/chat', methods=['POST'])
+async def chat():
+    """통합 채팅 API (server.py의 /chat과 같은 요청/응답 형식)"""
+    try:
+        data = await request.get_json()
+        user_message = data.get('message', '')
+        use_rag = data.get('use_rag', True)
+
+        if not user_message:
+            return jsonify({'error': '메시지를 입력해주세요'}), 400
+
+        # 세션의 대화 이력 (SQLite 저장소일 수 있으므로 스레드 풀에서)
+        session = await run_blocking(sessions.get_or_create, data.get('session_id'), data.get('history'))
+        conversation_history = sessions.build_history(session)
+
+        # 1~4. 시스템 프롬프트 + RAG 컨텍스트 + 대화 이력 + 현재 메시지
+        messages, rag_context, rag_results = await run_blocking(
+            build_chat_messages, user_message, conversation_history, use_rag,
+            where=build_where(data.get('filters'))
+        )
+        used_sources = collect_sources(rag_results)
+
+        # 비슷한 질문의 저장된 답변이 있으면 재사용
+        cache_key = await run_blocking(answer_cache_key, user_message, conversation_history, rag_results)
+        cached = answer_cache.lookup(*cache_key) if cache_key else None
+
+        if cached:
+            bot_response = cached['answer']
+            backend = 'cache'
+        else:
+            # 5. LLM 호출 (응답을 기다리는 동안 이벤트 루프는 다른 요청 처리)
+            result = await route_answer(user_message, messages)
+            bot_response = result['response']
+            backend = result['backend']
+            if cache_key:
+                answer_cache.store(*cache_key, bot_response, used_sources, backend)
+
+        await run_blocking(sessions.record_turn, session['session_id'], user_message, bot_response)
+        annotate(backend=backend, cached=bool(cached), rag_documents=len(rag_results))
+
+        # 6. 응답 반환
+        return jsonify({
+            'response': bot_response,
+            'timestamp': datetime.now().isoformat(),
+            'rag_used': bool(rag_context),
+            'sources': used_sources,
+            'context_size': len(messages),
+            'backend': backend,
+            'cached': bool(cached),
+            'session_id': session['session_id']
+        })
+
+    except Exception as e:
+        print(f"❌ Error in chat endpoint: {str(e)}")
+        record_error(e)
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/chat/stream', methods=['POST'])
+async def chat_stream():
+    """스트리밍 채팅 API (server.py의 /chat/stream과 같은 SSE 형식)"""
+    try:
+        data = await request.get_json()
+        user_message = data.get('message', '')
+        use_rag = data.get('use_rag', True)
+
+        if not user_message:
+            return jsonify({'error': '메시지를 입력해주세요'}), 400
+
+        session = await run_blocking(sessions.get_or_create, data.get('session_id'), data.get('history'))
+        where = build_where(data.get('filters'))
+        trace = begin_stream()
+
+        async def generate():
+            use_trace(trace)
+            stream_started = time.perf_counter()
+            stats = StreamStats(trace)
+            stream_outcome = 'cancelled'
+            try:
+                # 세션 ID를 먼저 전송 (클라이언트는 다음 요청에 이 ID만 보냄)
+                yield f"data: {json.dumps({'session_id': session['session_id']})}\n\n"
+                relay = StreamRelay(stats)
+
+                # 검색/임베딩이 오래 걸려도 keep-alive 를 보내서 연결 유지
+                conversation_history = sessions.build_history(session)
+                retrieval = asyncio.ensure_future(run_blocking(
+                    build_chat_messages, user_message, conversation_history, use_rag, STREAM_RAG_TEMPLATE, where
+                ))
+                async for frame in relay.aheartbeats_until(retrieval):
+                    yield frame
+                messages, rag_context, rag_results = retrieval.result()
+
+                # 참고한 출처를 먼저 전송
+                if rag_context:
+                    yield f"data: {json.dumps({'sources': collect_sources(rag_results)})}\n\n"
+
+                # 비슷한 질문의 저장된 답변이 있으면 같은 SSE 형식으로 다시 보냄
+                cache_key = await run_blocking(answer_cache_key, user_message, conversation_history, rag_results)
+                cached = answer_cache.lookup(*cache_key) if cache_key else None
+
+                if cached:
+                    for content in replay_chunks(cached['answer']):
+                        yield f"data: {json.dumps({'content': content})}\n\n"
+                    await run_blocking(sessions.record_turn, session['session_id'], user_message, cached['answer'])
+                    annotate(backend='cache', cached=True, rag_documents=len(rag_results))
+                    stream_outcome = 'completed'
+                    yield f"data: {json.dumps({'done': True, 'cached': True})}\n\n"
+                    return
+
+                # 라우터가 고른 백엔드로 스트리밍 (토큰을 묶어서 보내고 기다리는 동안 keep-alive)
+                outcome = {}
+                async for frame in relay.aframes(stream_routed_answer(user_message, messages, outcome)):
+                    yield frame
+
+                answer = relay.text
+                await run_blocking(sessions.record_turn, session['session_id'], user_message, answer)
+                if cache_key:
+                    answer_cache.store(*cache_key, answer, collect_sources(rag_results), outcome.get('backend'))
+                annotate(backend=outcome.get('backend'), cached=False, rag_documents=len(rag_results))
+
+                stream_outcome = 'completed'
+                yield f"data: {json.dumps({'done': True})}\n\n"
+
+            except Exception as e:
+                print(f"❌ Stream error: {str(e)}")
+                stream_outcome = 'error'
+                record_error(e, trace)
+                yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            finally:
+                # 클라이언트가 연결을 끊어도(취소) 기록 (done/error 전에 끝나면 cancelled)
+                stats.finish(stream_outcome)
+                observe_stage('stream', time.perf_counter() - stream_started, trace)
+                finish_trace(trace, 200)
+
+        response = Response(generate(), mimetype='text/event-stream', headers=STREAM_HEADERS)
+        # 긴 답변도 끊기지 않도록 응답 타임아웃 해제
+        response.timeout = None
+        return response
+
+    except Exception as e:
+        print(f"❌ Error in stream endpoint: {str(e)}")
+        record_error(e)
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/upload', methods=['POST'])
+async def upload_file():
+    """학습 자료 업로드 (server.py의 /upload와 같은 폼 형식, 202 + 작업 ID 응답)"""
+    try:
+        files = await request.files
+        form = await request.form
+
+        if 'file' not in files:
+            return jsonify({'error': '파일이 없습니다'}), 400
+
+        file = files['file']
+
+        if file.filename == '':
+            return jsonify({'error': '파일이 선택되지 않았습니다'}), 400
+
+        if not allowed_file(file.filename):
+            return jsonify({'error': '지원하지 않는 파일 형식입니다 (PDF, DOCX, TXT만 가능)'}), 400
+
+        # 파일 저장
+        filename = secure_filename(file.filename)
+        filepath = save_upload_path(filename)
+        await file.save(filepath)
+
+        # 텍스트 추출 + 임베딩은 업로드 처리 대기열(server.ingest_jobs)에서 처리
+        metadata = build_upload_metadata(filename, form)
+        try:
+            job = await run_blocking(ingest_jobs.submit, filepath, filename, metadata)
+        except QueueFullError as e:
+            os.remove(filepath)
+            return jsonify({'error': str(e)}), 503
+
+        print(f"📥 파일 업로드 접수: {filename} (작업 {job['job_id']})")
+
+        return jsonify(upload_accepted_response(job)), 202
+
+    except Exception as e:
+        print(f"❌ Upload error: {str(e)}")
+        record_error(e)
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/upload/jobs', methods=['GET'])
+async def list_upload_jobs():
+    """최근 업로드 작업 목록 (?status=..., ?limit=50)"""
+    limit = request.args.get('limit', 50, type=int)
+    status = request.args.get('status')
+    jobs = await run_blocking(ingest_jobs.list_jobs, limit, status)
+    return jsonify({'jobs': jobs, 'stats': ingest_jobs.stats()})
+
+
+@app.route('/upload/jobs/<job_id>', methods=['GET'])
+async def get_upload_job(job_id):
+    """업로드 작업 상태/진행률 조회"""
+    job = await run_blocking(ingest_jobs.get, job_id)
+    if job is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다'}), 404
+    return jsonify(job)
+
+
+@app.route('/documents', methods=['GET'])
+async def list_documents():
+    """업로드된 문서 통계"""
+    try:
+        stats = await run_blocking(rag_manager.get_stats)
+        return jsonify(stats)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/documents/stats/rebuild', methods=['POST'])
+async def rebuild_document_stats():
+    """문서 통계 재구축 (컬렉션의 메타데이터를 다시 세어서 카운터 교체)"""
+    try:
+        stats = await run_blocking(rag_manager.rebuild_stats)
+        return jsonify(stats)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/documents/search', methods=['POST'])
+async def search_documents():
+    """문서 검색 (테스트/디버깅용)"""
+    try:
+        data = await request.get_json()
+        query = data.get('query', '')
+        n_results = data.get('n_results', 3)
+        where = data.get('where') or build_where(data.get('filters'))
+        mode = data.get('mode')
+
+        if not query:
+            return jsonify({'error': '검색어를 입력해주세요'}), 400
+
+        results = await run_blocking(rag_manager.search, query, n_results, where, mode)
+
+        return jsonify({
+            'query': query,
+            'where': where,
+            'mode': mode or rag_manager.search_mode,
+            'results': results
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/documents/clear', methods=['POST'])
+async def clear_documents():
+    """모든 문서 삭제 (주의!)"""
+    try:
+        await run_blocking(rag_manager.clear_collection)
+        print("⚠️  모든 문서 삭제됨")
+        return jsonify({'message': '모든 문서가 삭제되었습니다'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+async def delete_session(session_id):
+    """대화 세션 삭제 (새 대화 시작)"""
+    deleted = await run_blocking(sessions.delete, session_id)
+    return jsonify({'session_id': session_id, 'deleted': deleted})
+
+
+@app.route('/router/stats', methods=['GET'])
+async def router_stats():
+    """LLM 라우팅 통계 (백엔드별 지연/실패, 난이도별 결정 횟수)"""
+    return jsonify(router.get_stats())
+
+
+@app.route('/models', methods=['GET'])
+async def list_models():
+    """사용 가능한 Ollama 모델 목록"""
+    try:
+        models = await ollama_client.list()
+        return jsonify({
+            'models': [model['name'] for model in models['models']]
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("⚡ 초등학생 학습 챗봇 비동기 서버 시작")
+    print("=" * 60)
+    print("📍 서버 주소: http://localhost:5000")
+    print(f"🧵 RAG 스레드 풀: {RAG_EXECUTOR_WORKERS}개")
+    print(f"💬 대화 이력: 최근 {HISTORY_TOKEN_BUDGET}토큰 + 이전 대화 요약")
+    print("=" * 60)
+
+    if MODEL_WARMUP == 'eager':
+        print("\n⏳ 임베딩 모델/벡터 DB 로딩 중...")
+        rag_manager.warm_up()
+
+    print("\n📖 기본 학습 자료 로딩 중...")
+    load_seed_materials(rag_manager)
+
+    print(f"✅ 총 {rag_manager.count_documents()}개 문서 로드 완료")
+    print("\n🚀 서버 시작 완료! 사용 준비됨\n")
+
+    # 리로더를 켜면 코드가 바뀔 때 프로세스를 다시 실행해서 모델 로딩 / 업로드 대기열 재개가 반복되므로 끔
+    app.run(host='0.0.0.0', port=5000, use_reloader=False)
@@ -0,0 +1,101 @@
+"""
+임베딩 백엔드별 처리량 벤치마크 (queries/sec, ingestion docs/sec)
+
+백엔드(torch / onnx / onnx-int8)와 스레드 수 조합마다
+- load: 백엔드 생성 시간 (ONNX 변환이 필요하면 변환 시간 포함)
+- queries/sec: 질문 하나씩 임베딩 (RAGManager.encode_query 와 같은 경로, 캐시 없음)
+- docs/sec: RAGManager.add_texts 로 합성 학습 자료 추가 (임베딩 + ChromaDB 저장)
+를 측정해요.
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_embedding.py --backends torch,onnx,onnx-int8 --threads 0,1
+    python benchmarks/bench_embedding.py --backends onnx-int8 --queries 500 --docs 5000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from common import SUBJECTS, Timer, latency_summary, make_corpus
+from embedding_backends import EMBEDDING_BACKENDS, create_embedding_backend
+from rag_manager import RAGManager
+
+QUESTION_TEMPLATES = [
+    "{topic}이 뭐야?",
+    "{topic}을 쉽게 설명해 줘",
+    "{topic} 문제는 어떻게 풀어요?",
+    "{subject} 시간에 배우는 {topic}에 대해 알려줘",
+]
+
+
+def make_questions(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    topics = [(subject, topic) for subject, items in SUBJECTS.items() for topic in items]
+    questions = []
+    for _ in range(count):
+        subject, topic = rng.choice(topics)
+        questions.append(rng.choice(QUESTION_TEMPLATES).format(subject=subject, topic=topic))
+    return questions
+
+
+def measure(backend_name: str, threads: int, questions, texts, metadatas, encode_batch_size: int) -> dict:
+    with Timer() as load:
+        backend = create_embedding_backend(backend_name, threads=threads)
+    backend.encode("준비", show_progress_bar=False)
+
+    latencies = []
+    with Timer() as query_timer:
+        for question in questions:
+            with Timer() as timer:
+                backend.encode(question, show_progress_bar=False)
+            latencies.append(timer.elapsed)
+
+    rag = RAGManager(
+        persist_directory=tempfile.mkdtemp(prefix="bench_embedding_"),
+        embedding_model=backend,
+        encode_batch_size=encode_batch_size
+    )
+    rag.collection
+    with Timer() as ingest:
+        rag.add_texts(texts, metadatas)
+
+    return {
+        "backend": backend_name,
+        "threads": threads,
+        "load_seconds": round(load.elapsed, 2),
+        "queries_per_sec": round(len(questions) / query_timer.elapsed, 1),
+        "query_latency": latency_summary(latencies),
+        "docs": len(texts),
+        "docs_per_sec": round(len(texts) / ingest.elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 백엔드별 처리량 벤치마크")
+    parser.add_argument("--backends", default=",".join(EMBEDDING_BACKENDS), help="측정할 백엔드 (쉼표 구분)")
+    parser.add_argument("--threads", default="0", help="연산 스레드 수 목록 (쉼표 구분, 0이면 기본값)")
+    parser.add_argument("--queries", type=int, default=200, help="하나씩 임베딩할 질문 수")
+    parser.add_argument("--docs", type=int, default=2000, help="add_texts 로 추가할 문서 수")
+    parser.add_argument("--encode-batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    questions = make_questions(args.queries)
+    texts, metadatas = make_corpus(args.docs)
+    rows = []
+
+    for backend_name in args.backends.split(","):
+        for threads in [int(value) for value in args.threads.split(",")]:
+            row = measure(backend_name, threads, questions, texts, metadatas, args.encode_batch_size)
+            rows.append(row)
+            print(json.dumps(row, ensure_ascii=False))
+
+    print(f"\n(CPU 코어 {os.cpu_count()}개)")
+    print("백엔드    | 스레드 | 로드 초 | queries/sec | query p50 ms | docs/sec")
+    for row in rows:
+        print(f"{row['backend']:<9} | {row['threads']:>6} | {row['load_seconds']:>7} | "
+              f"{row['queries_per_sec']:>11} | {row['query_latency']['p50_ms']:>12} | {row['docs_per_sec']}")
+
+
+if __name__ == "__main__":
+    main()
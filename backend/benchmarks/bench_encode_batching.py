@@ -0,0 +1,125 @@
+"""
+질문 임베딩 마이크로 배치 벤치마크 (요청마다 임베딩 vs EncodeBatcher)
+
+동시 요청 수마다 스레드들이 서로 다른 질문을 동시에 임베딩하면서
+- 처리량 (queries/sec)
+- 질문당 지연 시간 p50 / p99
+- 배치 방식의 평균 배치 크기
+를 비교해요. (RAGManager.encode_query 의 캐시 미스 경로와 같음)
+
+--simulated 인코더는 "호출마다 고정 비용 + 문장당 비용"이 들고 한 번에 한 호출만 실행되는
+(모델이 CPU 코어를 모두 쓰는) 상황을 흉내 내요. 실제 모델은 --backend 로 측정해요.
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_encode_batching.py --simulated --concurrency 1,4,16,32
+    python benchmarks/bench_encode_batching.py --backend onnx-int8 --window-ms 2,5
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+from bench_embedding import make_questions
+from common import HashingEncoder, Timer, latency_summary, load_encoder
+from encode_batcher import ENCODE_BATCH_MAX_SIZE, EncodeBatcher
+
+
+class SimulatedEncoder:
+    """호출 비용 + 문장당 비용을 쓰는 인코더 (호출은 한 번에 하나씩만 실행)"""
+
+    def __init__(self, call_ms: float = 8.0, item_ms: float = 0.5):
+        self.call_seconds = call_ms / 1000
+        self.item_seconds = item_ms / 1000
+        self._lock = threading.Lock()
+        self._vectors = HashingEncoder()
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False, **kwargs):
+        count = 1 if isinstance(sentences, str) else len(sentences)
+        with self._lock:
+            time.sleep(self.call_seconds + self.item_seconds * count)
+        return self._vectors.encode(sentences)
+
+
+def run_clients(encode_one, questions, concurrency: int) -> dict:
+    """concurrency 개 스레드가 질문을 나눠서 동시에 임베딩"""
+    latencies = []
+    latencies_lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def client(worker: int):
+        mine = []
+        barrier.wait()
+        for question in questions[worker::concurrency]:
+            with Timer() as timer:
+                encode_one(question)
+            mine.append(timer.elapsed)
+        with latencies_lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(worker,)) for worker in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    with Timer() as total:
+        barrier.wait()
+        for thread in threads:
+            thread.join()
+
+    return {
+        "queries_per_sec": round(len(questions) / total.elapsed, 1),
+        "latency": latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="질문 임베딩 마이크로 배치 벤치마크")
+    parser.add_argument("--simulated", action="store_true", help="모델 대신 호출 비용을 흉내 낸 인코더 사용")
+    parser.add_argument("--call-ms", type=float, default=8.0, help="--simulated 호출당 비용(ms)")
+    parser.add_argument("--item-ms", type=float, default=0.5, help="--simulated 문장당 비용(ms)")
+    parser.add_argument("--backend", default="torch", help="실제 모델 백엔드 (torch / onnx / onnx-int8)")
+    parser.add_argument("--threads", type=int, default=0, help="모델 연산 스레드 수 (0이면 기본값)")
+    parser.add_argument("--concurrency", default="1,4,16,32", help="동시 요청 수 목록 (쉼표 구분)")
+    parser.add_argument("--window-ms", default="2", help="배치 대기 시간 목록(ms, 쉼표 구분)")
+    parser.add_argument("--max-batch-size", type=int, default=ENCODE_BATCH_MAX_SIZE)
+    parser.add_argument("--queries", type=int, default=400, help="동시 요청 수마다 임베딩할 질문 수")
+    args = parser.parse_args()
+
+    if args.simulated:
+        encoder = SimulatedEncoder(args.call_ms, args.item_ms)
+        label = f"simulated({args.call_ms}ms+{args.item_ms}ms/문장)"
+    else:
+        encoder = load_encoder(False, args.backend, args.threads)
+        label = args.backend
+    encoder.encode("준비", show_progress_bar=False)
+
+    questions = make_questions(args.queries)
+    rows = []
+    for concurrency in [int(value) for value in args.concurrency.split(",")]:
+        row = {"encoder": label, "concurrency": concurrency, "mode": "per-request",
+               **run_clients(lambda question: encoder.encode(question, show_progress_bar=False),
+                             questions, concurrency)}
+        rows.append(row)
+        print(json.dumps(row, ensure_ascii=False))
+
+        for window_ms in [float(value) for value in args.window_ms.split(",")]:
+            batcher = EncodeBatcher(
+                lambda texts: encoder.encode(texts, batch_size=len(texts), show_progress_bar=False),
+                window_ms=window_ms,
+                max_batch_size=args.max_batch_size
+            )
+            row = {"encoder": label, "concurrency": concurrency, "mode": f"batched({window_ms:g}ms)",
+                   **run_clients(batcher.encode, questions, concurrency),
+                   "mean_batch_size": batcher.stats()["mean_batch_size"]}
+            batcher.close()
+            rows.append(row)
+            print(json.dumps(row, ensure_ascii=False))
+
+    print(f"\n({label}, CPU 코어 {os.cpu_count()}개)")
+    print("동시 요청 | 방식           | queries/sec | p50 ms  | p99 ms  | 평균 배치")
+    for row in rows:
+        print(f"{row['concurrency']:>9} | {row['mode']:<14} | {row['queries_per_sec']:>11} | "
+              f"{row['latency']['p50_ms']:>7} | {row['latency']['p99_ms']:>7} | {row.get('mean_batch_size', 1)}")
+
+
+if __name__ == "__main__":
+    main()
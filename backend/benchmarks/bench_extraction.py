@@ -0,0 +1,116 @@
+"""
+PDF 추출 처리량 벤치마크 (pages/sec, chunks/sec, 최대 메모리)
+
+수백 페이지짜리 합성 PDF를 만들어서
+- legacy: 예전 add_pdf 방식 (PdfReader.pages를 순서대로 추출하고 모든 청크를 리스트에 모음)
+- stream: document_loader.iter_document_chunks (페이지를 프로세스 풀에 나눠 맡기고 청크를 하나씩 생성)
+을 비교해요. 최대 메모리는 tracemalloc으로 따로 한 번 더 실행해서 재요 (현재 프로세스 기준).
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_extraction.py --pages 300,800 --processes 1,2,4
+    python benchmarks/bench_extraction.py --pages 500 --ingest --fake-encoder
+"""
+import argparse
+import json
+import os
+import tempfile
+import tracemalloc
+
+import pypdf
+
+from common import Timer, load_encoder, make_pdf
+from document_loader import iter_document_chunks, shutdown_extract_pool
+from rag_manager import RAGManager
+from text_chunker import TextChunker
+
+
+def legacy_extract(pdf_path: str, chunker: TextChunker):
+    """예전 add_pdf 방식: 전체 청크를 리스트로 모은 뒤 반환"""
+    texts, metadatas = [], []
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = pypdf.PdfReader(file)
+        for page_num, page in enumerate(pdf_reader.pages):
+            text = page.extract_text()
+            if text.strip():
+                page_metadata = {"source": os.path.basename(pdf_path), "total_pages": len(pdf_reader.pages)}
+                for chunk_text, chunk_metadata in chunker.chunk(text, page_metadata, page=page_num + 1):
+                    texts.append(chunk_text)
+                    metadatas.append(chunk_metadata)
+    return len(texts)
+
+
+def stream_extract(pdf_path: str, chunker: TextChunker, processes: int):
+    """스트리밍 방식: 청크를 하나씩 받아서 세기만 함 (모으지 않음)"""
+    return sum(1 for _ in iter_document_chunks(pdf_path, chunker, {"source": os.path.basename(pdf_path)}, processes))
+
+
+def measure(run, pages: int) -> dict:
+    with Timer() as timer:
+        chunks = run()
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "chunks": chunks,
+        "seconds": round(timer.elapsed, 3),
+        "pages_per_sec": round(pages / timer.elapsed, 1),
+        "chunks_per_sec": round(chunks / timer.elapsed, 1),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 추출 처리량 벤치마크")
+    parser.add_argument("--pages", default="300,800", help="합성 PDF 페이지 수 (쉼표 구분)")
+    parser.add_argument("--processes", default="1,2,4", help="스트리밍 추출 프로세스 수 (쉼표 구분)")
+    parser.add_argument("--lines-per-page", type=int, default=40)
+    parser.add_argument("--ingest", action="store_true", help="RAGManager.add_pdf 전체(임베딩+저장)도 측정")
+    parser.add_argument("--fake-encoder", action="store_true", help="모델 대신 해싱 인코더 사용 (--ingest)")
+    args = parser.parse_args()
+
+    chunker = TextChunker()
+    workdir = tempfile.mkdtemp(prefix="bench_extract_")
+    rows = []
+
+    try:
+        for pages in [int(value) for value in args.pages.split(",")]:
+            pdf_path = make_pdf(os.path.join(workdir, f"textbook_{pages}.pdf"), pages, args.lines_per_page)
+            size_mb = round(os.path.getsize(pdf_path) / 1024 / 1024, 2)
+
+            row = {"pages": pages, "file_mb": size_mb, "mode": "legacy", "processes": 1,
+                   **measure(lambda: legacy_extract(pdf_path, chunker), pages)}
+            rows.append(row)
+            print(json.dumps(row, ensure_ascii=False))
+
+            for processes in [int(value) for value in args.processes.split(",")]:
+                row = {"pages": pages, "file_mb": size_mb, "mode": "stream", "processes": processes,
+                       **measure(lambda: stream_extract(pdf_path, chunker, processes), pages)}
+                rows.append(row)
+                print(json.dumps(row, ensure_ascii=False))
+
+            if args.ingest:
+                rag = RAGManager(persist_directory=os.path.join(workdir, f"chroma_{pages}"),
+                                 embedding_model=load_encoder(args.fake_encoder))
+                with Timer() as ingest:
+                    added = len(rag.add_pdf(pdf_path))
+                row = {"pages": pages, "file_mb": size_mb, "mode": "add_pdf", "processes": None,
+                       "chunks": added, "seconds": round(ingest.elapsed, 3),
+                       "pages_per_sec": round(pages / ingest.elapsed, 1),
+                       "chunks_per_sec": round(added / ingest.elapsed, 1)}
+                rows.append(row)
+                print(json.dumps(row, ensure_ascii=False))
+    finally:
+        shutdown_extract_pool()
+
+    print(f"\n(CPU 코어 {os.cpu_count()}개)")
+    print("페이지 | 방식    | 프로세스 | pages/sec | chunks/sec | 최대 메모리 MB")
+    for row in rows:
+        print(f"{row['pages']:>6} | {row['mode']:<7} | {str(row['processes']):>8} | "
+              f"{row['pages_per_sec']:>9} | {row['chunks_per_sec']:>10} | {row.get('peak_mb', '-')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+import / 서버 시작 시간 예산 체크
+
+- import server (MODEL_WARMUP=lazy): 무거운 모듈(torch, chromadb, openai)을 불러오지 않아야 함
+- 서버 프로세스 시작 → /health 응답(liveness)까지 걸린 시간
+- 서버 프로세스 시작 → /health/ready 200(readiness)까지 걸린 시간
+
+예산을 넘으면 종료 코드 1로 끝나서 CI에서 시작 시간이 느려지는 변경을 잡을 수 있어요.
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --import-budget 1.5 --live-budget 3 --ready-budget 60
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from bench_serving import free_port
+from common import BACKEND_DIR
+
+# 기본 시간 예산 (초)
+IMPORT_BUDGET_S = 2.0
+LIVE_BUDGET_S = 4.0
+READY_BUDGET_S = 90.0
+
+# import server 시점에 불러오면 안 되는 무거운 모듈
+HEAVY_MODULES = ("torch", "sentence_transformers", "chromadb", "openai")
+
+IMPORT_PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+import server
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "import_s": round(elapsed, 3),
+    "heavy_loaded": [name for name in sys.argv[1].split(",") if name in sys.modules],
+}))
+"""
+
+
+def measure_import() -> dict:
+    env = {**os.environ, "MODEL_WARMUP": "lazy"}
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE, ",".join(HEAVY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int = 10) -> list:
+    """python -X importtime 결과에서 누적 시간이 큰 모듈 (server 와 server 가 직접 import 하는 모듈)"""
+    env = {**os.environ, "MODEL_WARMUP": "lazy"}
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if match and len(match.group(2)) <= 3:  # 최상위 + 바로 아래 import만
+            rows.append((int(match.group(1)) / 1e6, match.group(3)))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_s": round(seconds, 3)} for seconds, name in rows[:limit]]
+
+
+def wait_for(url: str, deadline: float, expect_status: int = 200) -> bool:
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == expect_status:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.1)
+    return False
+
+
+def measure_server_start(ready_budget: float) -> dict:
+    """background 모드로 서버를 띄우고 liveness/readiness 시각 측정"""
+    port = free_port()
+    env = {**os.environ, "MODEL_WARMUP": "background"}
+    command = [sys.executable, "-c",
+               "import sys, server; server.app.run(host='127.0.0.1', port=int(sys.argv[1]))", str(port)]
+
+    start = time.time()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        deadline = start + ready_budget * 2
+        live = time.time() - start if wait_for(base + "/health", deadline) else None
+        ready = time.time() - start if wait_for(base + "/health/ready", deadline) else None
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    return {
+        "live_s": round(live, 3) if live is not None else None,
+        "ready_s": round(ready, 3) if ready is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="import/시작 시간 예산 체크")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_S)
+    parser.add_argument("--live-budget", type=float, default=LIVE_BUDGET_S)
+    parser.add_argument("--ready-budget", type=float, default=READY_BUDGET_S)
+    parser.add_argument("--skip-server", action="store_true", help="서버 실행 측정 생략")
+    args = parser.parse_args()
+
+    report = {"import": measure_import(), "slowest_imports": slowest_imports()}
+    if not args.skip_server:
+        report["server"] = measure_server_start(args.ready_budget)
+
+    failures = []
+    if report["import"]["import_s"] > args.import_budget:
+        failures.append(f"import server {report['import']['import_s']}s > {args.import_budget}s")
+    if report["import"]["heavy_loaded"]:
+        failures.append(f"import 시점에 무거운 모듈 로드됨: {report['import']['heavy_loaded']}")
+    if "server" in report:
+        live, ready = report["server"]["live_s"], report["server"]["ready_s"]
+        if live is None or live > args.live_budget:
+            failures.append(f"/health 응답 {live}s > {args.live_budget}s")
+        if ready is None or ready > args.ready_budget:
+            failures.append(f"/health/ready {ready}s > {args.ready_budget}s")
+
+    report["budgets"] = {
+        "import_s": args.import_budget,
+        "live_s": args.live_budget,
+        "ready_s": args.ready_budget,
+    }
+    report["passed"] = not failures
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    for failure in failures:
+        print(f"❌ 예산 초과: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+문서 추가 속도 벤치마크 (코퍼스 크기별 docs/sec)
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_ingestion.py --sizes 0,1000,5000,10000 --batch 500
+    python benchmarks/bench_ingestion.py --fake-encoder --legacy
+
+--legacy 옵션은 예전 방식(문서마다 collection.get() + 1건씩 임베딩/저장)과 비교해요.
+"""
+import argparse
+import json
+import tempfile
+
+from common import Timer, load_encoder, make_corpus
+from rag_manager import RAGManager, make_doc_id
+
+
+def legacy_add(rag: RAGManager, texts, metadatas):
+    """예전 add_text 방식: 매번 전체 컬렉션을 읽어서 ID를 만들고 1건씩 저장"""
+    for text, metadata in zip(texts, metadatas):
+        doc_id = f"legacy_{len(rag.collection.get()['ids'])}"
+        embedding = rag.embedding_model.encode(text).tolist()
+        rag.collection.add(ids=[doc_id], embeddings=[embedding], documents=[text], metadatas=[metadata])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAGManager 문서 추가 벤치마크")
+    parser.add_argument("--sizes", default="0,1000,5000,10000", help="미리 채워둘 코퍼스 크기 (쉼표 구분)")
+    parser.add_argument("--batch", type=int, default=500, help="측정할 추가 문서 수")
+    parser.add_argument("--encode-batch-size", type=int, default=64)
+    parser.add_argument("--write-batch-size", type=int, default=2048)
+    parser.add_argument("--fake-encoder", action="store_true", help="모델 대신 해싱 인코더 사용")
+    parser.add_argument("--legacy", action="store_true", help="예전 1건씩 추가 방식도 함께 측정")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    encoder = load_encoder(args.fake_encoder)
+    rag = RAGManager(
+        persist_directory=tempfile.mkdtemp(prefix="bench_ingest_"),
+        embedding_model=encoder,
+        encode_batch_size=args.encode_batch_size,
+        write_batch_size=args.write_batch_size
+    )
+
+    texts, metadatas = make_corpus(max(sizes) + args.batch)
+    results = []
+
+    for size in sizes:
+        rag.clear_collection()
+        if size:
+            rag.add_texts(texts[:size], metadatas[:size])
+
+        new_texts = texts[size:size + args.batch]
+        new_metadatas = metadatas[size:size + args.batch]
+
+        with Timer() as batched:
+            rag.add_texts(new_texts, new_metadatas)
+        row = {
+            "corpus_size": size,
+            "added": len(new_texts),
+            "batched_docs_per_sec": round(len(new_texts) / batched.elapsed, 1),
+        }
+
+        if args.legacy:
+            # 같은 시작 상태에서 측정하기 위해 방금 추가한 문서를 지우고 다시 측정
+            rag.collection.delete(ids=[make_doc_id(t, m) for t, m in zip(new_texts, new_metadatas)])
+            with Timer() as legacy:
+                legacy_add(rag, new_texts, new_metadatas)
+            row["legacy_docs_per_sec"] = round(len(new_texts) / legacy.elapsed, 1)
+
+        results.append(row)
+        print(json.dumps(row, ensure_ascii=False))
+
+    print("\n코퍼스 크기 | 배치 docs/sec" + (" | 기존 docs/sec" if args.legacy else ""))
+    for row in results:
+        line = f"{row['corpus_size']:>10} | {row['batched_docs_per_sec']:>12}"
+        if args.legacy:
+            line += f" | {row['legacy_docs_per_sec']:>12}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
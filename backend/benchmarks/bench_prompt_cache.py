@@ -0,0 +1,127 @@
+"""
+프롬프트 배치에 따른 첫 토큰 지연(TTFT) 비교
+
+prefix 캐시를 흉내 내는 가짜 Ollama 서버에 같은 대화를 두 가지 방식으로 보내요.
+- legacy: 시스템 프롬프트 뒤에 참고 자료를 붙이고, 최근 10개 메시지만 전달 (이전 방식)
+- stable: prompt_builder 배치 (고정 시스템 프롬프트 → 대화 이력 → 참고 자료 + 질문)
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_prompt_cache.py --turns 20
+    python benchmarks/bench_prompt_cache.py --turns 20 --sessions 4 --prefill-us-per-char 300
+"""
+import argparse
+import json
+import time
+
+import ollama
+
+from common import latency_summary, make_corpus, make_queries
+from stubs import PrefixCacheStubOllama
+from prompt_builder import SYSTEM_PROMPT, build_messages, model_options
+from session_store import MemorySessionStore, SessionManager
+
+MODEL = "elementary-kor-teacher"
+
+# 이전 방식: 참고 자료를 시스템 메시지에 붙임 (요청마다 시스템 메시지가 달라짐)
+LEGACY_RAG_TEMPLATE = """
+
+[📚 참고 자료]
+다음은 업로드된 학습 자료에서 찾은 관련 내용이야:
+
+{rag_context}
+
+위 참고 자료의 내용을 활용해서 정확하게 설명해주되,
+초등학생이 이해하기 쉽게 풀어서 말해줘."""
+
+
+def legacy_messages(user_message, history, rag_context):
+    messages = [{'role': 'system', 'content': SYSTEM_PROMPT + LEGACY_RAG_TEMPLATE.format(rag_context=rag_context)}]
+    messages.extend(history[-10:])
+    messages.append({'role': 'user', 'content': user_message})
+    return messages
+
+
+def make_context(texts, turn: int, per_turn: int = 3) -> str:
+    """턴마다 다른 검색 결과를 흉내 낸 참고 자료"""
+    start = (turn * per_turn) % max(1, len(texts) - per_turn)
+    return "\n".join(f"[참고자료 {i + 1}]\n{text}\n" for i, text in enumerate(texts[start:start + per_turn]))
+
+
+def time_to_first_token(client, messages) -> tuple:
+    """스트리밍 요청 1건 → (첫 토큰까지 걸린 시간, 전체 답변)"""
+    started = time.perf_counter()
+    first_token = None
+    contents = []
+    for chunk in client.chat(model=MODEL, messages=messages, stream=True, **model_options(MODEL)):
+        if first_token is None and chunk['message']['content']:
+            first_token = time.perf_counter() - started
+        contents.append(chunk['message']['content'])
+    return first_token, "".join(contents)
+
+
+def run_layout(layout: str, stub, client, turns: int, sessions: int, texts, queries) -> dict:
+    stub.reset_cache()
+    manager = SessionManager(store=MemorySessionStore(), background=False)
+    session_ids = [manager.get_or_create()['session_id'] for _ in range(sessions)]
+    legacy_histories = {session_id: [] for session_id in session_ids}
+    ttfts = []
+
+    # 여러 학생의 대화를 번갈아 보냄 (세션 사이에는 시스템 프롬프트만 공유)
+    for turn in range(turns):
+        for index, session_id in enumerate(session_ids):
+            question = queries[(turn * sessions + index) % len(queries)]
+            rag_context = make_context(texts, turn * sessions + index)
+
+            if layout == "legacy":
+                history = legacy_histories[session_id]
+                messages = legacy_messages(question, history, rag_context)
+            else:
+                history = manager.build_history(manager.get_or_create(session_id))
+                messages = build_messages(question, history, rag_context)
+
+            ttft, answer = time_to_first_token(client, messages)
+            ttfts.append(ttft)
+
+            legacy_histories[session_id] += [{'role': 'user', 'content': question},
+                                             {'role': 'assistant', 'content': answer}]
+            manager.record_turn(session_id, question, answer)
+
+    return {"time_to_first_token": latency_summary(ttfts), **stub.cache_stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프롬프트 prefix 재사용에 따른 TTFT 비교")
+    parser.add_argument("--turns", type=int, default=20, help="세션당 대화 턴 수")
+    parser.add_argument("--sessions", type=int, default=1, help="번갈아 대화하는 세션 수")
+    parser.add_argument("--tokens", type=int, default=30, help="가짜 답변 토큰 수")
+    parser.add_argument("--prefill-us-per-char", type=float, default=200, help="캐시에 없는 글자당 prefill 시간(µs)")
+    args = parser.parse_args()
+
+    texts, _ = make_corpus(200)
+    queries = make_queries(200)
+
+    stub = PrefixCacheStubOllama(
+        prefill_per_char=args.prefill_us_per_char / 1e6,
+        prefill_latency=0.005,
+        tokens=args.tokens,
+        token_latency=0.001,
+        model=MODEL,
+    ).start()
+    client = ollama.Client(host=stub.url)
+
+    report = {}
+    try:
+        for layout in ("legacy", "stable"):
+            report[layout] = run_layout(layout, stub, client, args.turns, args.sessions, texts, queries)
+            print(json.dumps({layout: report[layout]}, ensure_ascii=False))
+    finally:
+        stub.stop()
+
+    print("\n배치    | TTFT p50 ms | TTFT p95 ms | 캐시 재사용 비율")
+    for layout, row in report.items():
+        ttft = row["time_to_first_token"]
+        print(f"{layout:<7} | {ttft['p50_ms']:>11} | {ttft['p95_ms']:>11} | {row['cache_ratio']:>8}")
+
+
+if __name__ == "__main__":
+    main()
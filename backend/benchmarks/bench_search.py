@@ -0,0 +1,126 @@
+"""
+검색 방식별 recall@k / 지연 시간 벤치마크 (vector / keyword / hybrid, where 필터 유무)
+
+합성 자료마다 고유한 핵심 낱말을 붙이고, 그 낱말로 만든 짧은 질문이
+원래 자료를 상위 k개 안에 찾아내는 비율(recall@k)과 검색 지연 시간을 측정해요.
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_search.py --size 12000 --queries 300
+    python benchmarks/bench_search.py --size 12000 --fake-encoder --k 1,3,10
+"""
+import argparse
+import json
+import random
+import tempfile
+
+from common import Timer, latency_summary, load_encoder, make_corpus
+from rag_manager import RAGManager, SEARCH_MODES, build_where
+
+SYLLABLES = "가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주추쿠투푸후"
+
+
+def make_keywords(count: int, seed: int = 11):
+    """세 글자 가짜 낱말 목록 (자료를 구분하는 핵심 낱말)"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(3)))
+    return sorted(words)
+
+
+def build_corpus(size: int, keywords_per_doc: int = 3, seed: int = 3):
+    """make_corpus 자료 끝에 핵심 낱말을 붙인 코퍼스"""
+    rng = random.Random(seed)
+    texts, metadatas = make_corpus(size)
+    vocabulary = make_keywords(max(1000, size // 2))
+    doc_keywords = []
+    for i, text in enumerate(texts):
+        keywords = rng.sample(vocabulary, keywords_per_doc)
+        doc_keywords.append(keywords)
+        texts[i] = f"{text} 핵심 낱말: {' '.join(keywords)}"
+    return texts, metadatas, doc_keywords
+
+
+def make_questions(metadatas, doc_keywords, count: int, seed: int = 5):
+    """(질문, 정답 자료 번호) - 핵심 낱말 두 개로 만든 짧은 질문"""
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(count):
+        target = rng.randrange(len(doc_keywords))
+        first, second = rng.sample(doc_keywords[target], 2)
+        questions.append((f"{first} {second} 알려줘", target))
+    return questions
+
+
+def evaluate(rag: RAGManager, questions, doc_ids, metadatas, mode: str, ks, filtered: bool) -> dict:
+    max_k = max(ks)
+    hits = {k: 0 for k in ks}
+    latencies = []
+
+    for question, target in questions:
+        where = build_where({'grade': metadatas[target]['grade']}) if filtered else None
+        with Timer() as timer:
+            results = rag.search(question, max_k, where=where, mode=mode)
+        latencies.append(timer.elapsed)
+
+        found = [result['id'] for result in results]
+        for k in ks:
+            if doc_ids[target] in found[:k]:
+                hits[k] += 1
+
+    return {
+        "mode": mode,
+        "filtered": filtered,
+        **{f"recall@{k}": round(hits[k] / len(questions), 3) for k in ks},
+        "latency": latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 방식별 recall@k / 지연 시간 벤치마크")
+    parser.add_argument("--size", type=int, default=12000, help="코퍼스 크기 (청크 수)")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", default="1,3,10", help="recall@k 의 k 목록 (쉼표 구분)")
+    parser.add_argument("--modes", default=",".join(SEARCH_MODES))
+    parser.add_argument("--fake-encoder", action="store_true", help="모델 대신 해싱 인코더 사용")
+    args = parser.parse_args()
+
+    ks = [int(k) for k in args.k.split(",")]
+    texts, metadatas, doc_keywords = build_corpus(args.size)
+    questions = make_questions(metadatas, doc_keywords, args.queries)
+
+    # 검색 결과 캐시는 꺼서 매번 실제 검색 비용을 측정
+    rag = RAGManager(
+        persist_directory=tempfile.mkdtemp(prefix="bench_search_"),
+        embedding_model=load_encoder(args.fake_encoder),
+        query_cache_size=0
+    )
+    with Timer() as ingest:
+        doc_ids = rag.add_texts(texts, metadatas)
+    with Timer() as index_load:
+        rag.keyword_index
+    print(f"📦 {len(doc_ids)}개 청크 추가 {ingest.elapsed:.1f}초, 키워드 색인 준비 {index_load.elapsed:.2f}초")
+
+    # 질문 임베딩은 모드와 상관없이 같으므로 미리 계산 (검색 비용만 비교)
+    rag.embedding_cache.max_size = len(questions)
+    for question, _ in questions:
+        rag.encode_query(question)
+
+    rows = []
+    for mode in args.modes.split(","):
+        for filtered in (False, True):
+            row = evaluate(rag, questions, doc_ids, metadatas, mode, ks, filtered)
+            rows.append(row)
+            print(json.dumps(row, ensure_ascii=False))
+
+    header = " | ".join(f"R@{k:<3}" for k in ks)
+    print(f"\n모드    | 필터 | {header} | p50 ms  | p95 ms")
+    for row in rows:
+        recalls = " | ".join(f"{row[f'recall@{k}']:<5}" for k in ks)
+        latency = row["latency"]
+        print(f"{row['mode']:<7} | {'O' if row['filtered'] else 'X':<4} | {recalls} | "
+              f"{latency['p50_ms']:<7} | {latency['p95_ms']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+동시 요청 부하 테스트: Flask 서버 vs 비동기(Quart) 서버
+
+가짜 Ollama 서버(토큰 지연 흉내)를 띄우고, 두 서버를 각각 하위 프로세스로 실행한 뒤
+같은 부하를 걸어서 처리량(req/s)과 p50/p95 지연 시간을 비교해요.
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_serving.py --requests 200 --concurrency 32
+    python benchmarks/bench_serving.py --stream --tokens 50 --token-latency-ms 20
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from common import BACKEND_DIR, latency_summary
+from stubs import StubOllamaServer
+
+SERVER_COMMANDS = {
+    # Flask 개발 서버 (server.py 기본 실행 방식과 동일하게 스레드 모드)
+    "flask": [sys.executable, "-c",
+              "import sys, server; server.app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)"],
+    # 비동기 서버 (hypercorn)
+    "async": [sys.executable, "-m", "hypercorn", "async_server:app", "--bind"],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode: str, port: int, ollama_url: str, env: dict = None, cwd: str = BACKEND_DIR,
+                 command: list = None) -> subprocess.Popen:
+    """
+    서버를 하위 프로세스로 실행하고 /health 응답이 올 때까지 대기
+
+    Args:
+        env: 추가 환경 변수
+        cwd: 작업 폴더 (벡터 DB / 세션 / 로그 파일이 여기에 생김, backend 모듈은 PYTHONPATH로 찾음)
+        command: SERVER_COMMANDS[mode] 대신 쓸 실행 명령 (주소 인자는 뒤에 붙임)
+    """
+    command = list(command or SERVER_COMMANDS[mode])
+    command.append(f"127.0.0.1:{port}" if mode == "async" else str(port))
+
+    python_path = os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")]))
+    env = {**os.environ, "OLLAMA_HOST": ollama_url, "PYTHONPATH": python_path, **(env or {})}
+    process = subprocess.Popen(command, cwd=cwd, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{mode} 서버 실행 실패 (exit {process.returncode})")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2).read()
+            return process
+        except OSError:
+            time.sleep(0.5)
+
+    process.kill()
+    raise RuntimeError(f"{mode} 서버가 시간 안에 시작되지 않음")
+
+
+def send_request(url: str, stream: bool, use_rag: bool, message: str = "분수가 뭐야?"):
+    """요청 1건 → (성공 여부, 전체 지연, 첫 토큰 지연)"""
+    path = "/chat/stream" if stream else "/chat"
+    body = json.dumps({"message": message, "use_rag": use_rag}).encode("utf-8")
+    request = urllib.request.Request(url + path, data=body, headers={"Content-Type": "application/json"})
+
+    start = time.perf_counter()
+    first_token = None
+    try:
+        with urllib.request.urlopen(request, timeout=300) as response:
+            if stream:
+                for line in response:
+                    if first_token is None and line.startswith(b"data: ") and b'"content"' in line:
+                        first_token = time.perf_counter() - start
+            else:
+                response.read()
+        return True, time.perf_counter() - start, first_token
+    except OSError:
+        return False, time.perf_counter() - start, None
+
+
+def run_load(url: str, total: int, concurrency: int, stream: bool, use_rag: bool) -> dict:
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda _: send_request(url, stream, use_rag), range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies = [latency for ok, latency, _ in results if ok]
+    result = {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": sum(1 for ok, _, _ in results if not ok),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency": latency_summary(latencies),
+    }
+    if stream:
+        result["time_to_first_token"] = latency_summary([ttft for ok, _, ttft in results if ok and ttft])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flask vs 비동기 서버 동시 요청 부하 테스트")
+    parser.add_argument("--modes", default="flask,async")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--tokens", type=int, default=20, help="가짜 Ollama 답변 토큰 수")
+    parser.add_argument("--token-latency-ms", type=float, default=20)
+    parser.add_argument("--prefill-ms", type=float, default=50)
+    parser.add_argument("--stream", action="store_true", help="/chat/stream 으로 측정")
+    parser.add_argument("--use-rag", action="store_true", help="RAG 검색 포함 (임베딩 비용 포함)")
+    args = parser.parse_args()
+
+    stub = StubOllamaServer(
+        tokens=args.tokens,
+        token_latency=args.token_latency_ms / 1000,
+        prefill_latency=args.prefill_ms / 1000
+    ).start()
+
+    report = {}
+    try:
+        for mode in args.modes.split(","):
+            port = free_port()
+            process = start_server(mode, port, stub.url)
+            try:
+                url = f"http://127.0.0.1:{port}"
+                send_request(url, args.stream, args.use_rag)  # 워밍업
+                report[mode] = run_load(url, args.requests, args.concurrency, args.stream, args.use_rag)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            print(json.dumps({mode: report[mode]}, ensure_ascii=False))
+    finally:
+        stub.stop()
+
+    print("\n모드   | req/s    | p50 ms   | p95 ms   | 오류")
+    for mode, row in report.items():
+        latency = row["latency"]
+        print(f"{mode:<6} | {row['throughput_rps']:>8} | {latency['p50_ms']:>8} | {latency['p95_ms']:>8} | {row['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+서버 시작(웜 스타트) 시간 벤치마크
+
+코퍼스 크기별(기본 1k/10k/100k 청크)로 영구 저장소를 만든 뒤, 새 프로세스에서
+- RAGManager 초기화 (PersistentClient + 컬렉션 로드)
+- 기본 학습 자료 로딩 (이미 있으면 임베딩 0회여야 함)
+- 첫 검색 (벡터 인덱스 로드 포함)
+에 걸리는 시간을 측정해요. 모델 로딩 시간은 코퍼스와 무관하므로 해싱 인코더를 써요.
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_startup.py --sizes 1000,10000,100000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from common import BACKEND_DIR, HashingEncoder, make_corpus
+from rag_manager import RAGManager
+from seed_materials import load_seed_materials
+
+# 새 프로세스에서 실행할 측정 코드
+STARTUP_PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[2])
+from common import HashingEncoder
+from rag_manager import RAGManager
+from seed_materials import load_seed_materials
+
+class CountingEncoder(HashingEncoder):
+    encoded = 0
+    def encode(self, sentences, **kwargs):
+        if not isinstance(sentences, str):
+            CountingEncoder.encoded += len(sentences)
+        return super().encode(sentences, **kwargs)
+
+imported = time.perf_counter()
+rag = RAGManager(persist_directory=sys.argv[1], embedding_model=CountingEncoder())
+initialized = time.perf_counter()
+load_seed_materials(rag)
+seeded = time.perf_counter()
+rag.search("분수가 뭐야?")
+searched = time.perf_counter()
+print(json.dumps({
+    "import_s": round(imported - start, 3),
+    "init_s": round(initialized - imported, 3),
+    "seed_s": round(seeded - initialized, 3),
+    "seed_docs_embedded": CountingEncoder.encoded,
+    "first_search_s": round(searched - seeded, 3),
+    "total_s": round(searched - start, 3),
+    "documents": rag.count_documents(),
+}))
+"""
+
+
+def build_store(path: str, size: int, dimension: int = 768):
+    """랜덤 벡터로 size개 청크짜리 저장소 생성 + 기본 자료 로딩"""
+    rag = RAGManager(persist_directory=path, embedding_model=HashingEncoder(dimension))
+    load_seed_materials(rag)
+
+    texts, metadatas = make_corpus(size)
+    rng = np.random.default_rng(0)
+    batch = rag.write_batch_size
+    for start in range(0, size, batch):
+        end = min(size, start + batch)
+        vectors = rng.standard_normal((end - start, dimension)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        rag.collection.add(
+            ids=[f"bench_{i}" for i in range(start, end)],
+            embeddings=vectors.tolist(),
+            documents=texts[start:end],
+            metadatas=metadatas[start:end]
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="영구 저장소 웜 스타트 시간 벤치마크")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--keep", action="store_true", help="만든 저장소를 지우지 않음")
+    args = parser.parse_args()
+
+    benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+
+    for size in [int(size) for size in args.sizes.split(",")]:
+        path = tempfile.mkdtemp(prefix=f"bench_startup_{size}_")
+        try:
+            build_store(path, size)
+            output = subprocess.run(
+                [sys.executable, "-c", STARTUP_PROBE, path, benchmarks_dir],
+                cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+            ).stdout
+            row = {"chunks": size, **json.loads(output.strip().splitlines()[-1])}
+            results.append(row)
+            print(json.dumps(row, ensure_ascii=False))
+        finally:
+            if not args.keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+    print("\n청크 수  | 초기화 s | 기본자료 s | 재임베딩 | 첫 검색 s")
+    for row in results:
+        print(f"{row['chunks']:>8} | {row['init_s']:>8} | {row['seed_s']:>10} | "
+              f"{row['seed_docs_embedded']:>8} | {row['first_search_s']:>9}")
+
+
+if __name__ == "__main__":
+    main()
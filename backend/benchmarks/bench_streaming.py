@@ -0,0 +1,135 @@
+"""
+스트리밍 응답 벤치마크 (토큰 묶기 / keep-alive / 연결 끊김 시 생성 중단)
+
+가짜 Ollama 서버를 띄우고 서버(Flask / 비동기)를 하위 프로세스로 실행한 뒤
+- 완료 스트림: 답변 하나당 SSE 프레임 수 / 바이트 수, 첫 답변 프레임까지 시간, keep-alive 수
+- 취소 스트림: 첫 답변 프레임을 받자마자 연결을 끊었을 때 가짜 Ollama 가 실제로 생성한 토큰 수
+  (끊긴 뒤에도 끝까지 생성하면 tokens_per_cancelled_stream 이 --tokens 와 같아짐)
+를 측정해요. STREAM_FLUSH_CHARS / STREAM_FLUSH_MS / STREAM_HEARTBEAT_SECONDS 를 바꿔 가며 비교해 보세요.
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_streaming.py --tokens 200 --token-latency-ms 20
+    STREAM_FLUSH_CHARS=1 python benchmarks/bench_streaming.py --modes flask
+"""
+import argparse
+import json
+import os
+import socket
+import time
+from urllib.parse import urlparse
+
+from bench_serving import free_port, start_server
+from common import latency_summary
+from stubs import StubOllamaServer
+
+REQUEST_BODY = json.dumps({"message": "분수가 뭐야?", "use_rag": False}).encode("utf-8")
+
+
+def open_stream(url: str) -> socket.socket:
+    """/chat/stream 요청을 보내고 소켓을 돌려줌 (응답은 직접 읽음)"""
+    parsed = urlparse(url)
+    sock = socket.create_connection((parsed.hostname, parsed.port), timeout=300)
+    sock.sendall(
+        f"POST /chat/stream HTTP/1.1\r\nHost: {parsed.netloc}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(REQUEST_BODY)}\r\nConnection: close\r\n\r\n".encode() + REQUEST_BODY
+    )
+    return sock
+
+
+def read_stream(url: str, stop_after_content: bool = False) -> dict:
+    """스트림 하나 읽기 → 프레임 / keep-alive / 바이트 수와 첫 답변 프레임까지 시간"""
+    started = time.perf_counter()
+    sock = open_stream(url)
+    received = b""
+    first_content = None
+    try:
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            received += data
+            if first_content is None and b'"content"' in received:
+                first_content = time.perf_counter() - started
+                if stop_after_content:
+                    break
+            if b'"done"' in received or b'"error"' in received:
+                break
+    finally:
+        sock.close()
+
+    body = received.split(b"\r\n\r\n", 1)[-1]
+    return {
+        "seconds": time.perf_counter() - started,
+        "first_content": first_content,
+        "content_frames": body.count(b'data: {"content"'),
+        "heartbeats": body.count(b": keep-alive"),
+        "bytes": len(body),
+    }
+
+
+def measure(mode: str, args, stub: StubOllamaServer) -> dict:
+    port = free_port()
+    process = start_server(mode, port, stub.url)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        read_stream(url)
+        completed = [read_stream(url) for _ in range(args.streams)]
+
+        # 첫 답변 프레임을 받자마자 끊기 → 가짜 Ollama 가 스트림을 끝까지 보냈는지 확인
+        before_tokens, before_aborted = stub.tokens_sent, stub.streams_aborted
+        cancelled = [read_stream(url, stop_after_content=True) for _ in range(args.streams)]
+        time.sleep(args.token_latency_ms / 1000 * 5 + 0.5)
+        tokens_after_cancel = (stub.tokens_sent - before_tokens) / len(cancelled)
+        aborted = stub.streams_aborted - before_aborted
+    finally:
+        process.terminate()
+        process.wait(30)
+
+    return {
+        "mode": mode,
+        "tokens_per_answer": args.tokens,
+        "frames_per_answer": round(sum(row["content_frames"] for row in completed) / len(completed), 1),
+        "bytes_per_answer": round(sum(row["bytes"] for row in completed) / len(completed)),
+        "heartbeats_per_answer": round(sum(row["heartbeats"] for row in completed) / len(completed), 1),
+        "first_content": latency_summary([row["first_content"] for row in completed if row["first_content"]]),
+        "total": latency_summary([row["seconds"] for row in completed]),
+        "cancelled_streams": len(cancelled),
+        "upstream_aborted": aborted,
+        "tokens_per_cancelled_stream": round(tokens_after_cancel, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스트리밍 응답 벤치마크 (프레임 묶기 / 취소)")
+    parser.add_argument("--modes", default="flask,async")
+    parser.add_argument("--streams", type=int, default=10, help="모드마다 완료/취소 스트림 수")
+    parser.add_argument("--tokens", type=int, default=200, help="가짜 Ollama 답변 토큰 수")
+    parser.add_argument("--token-latency-ms", type=float, default=20)
+    parser.add_argument("--prefill-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    stub = StubOllamaServer(
+        tokens=args.tokens,
+        token_latency=args.token_latency_ms / 1000,
+        prefill_latency=args.prefill_ms / 1000
+    ).start()
+    os.environ.setdefault("MODEL_WARMUP", "lazy")
+
+    rows = []
+    try:
+        for mode in args.modes.split(","):
+            rows.append(measure(mode, args, stub))
+            print(json.dumps(rows[-1], ensure_ascii=False))
+    finally:
+        stub.stop()
+
+    print(f"\n(토큰 {args.tokens}개 × {args.token_latency_ms}ms)")
+    print("서버   | 프레임/답변 | 바이트/답변 | 첫 프레임 p50 ms | 취소 스트림당 생성 토큰 | 중단된 Ollama 스트림")
+    for row in rows:
+        print(f"{row['mode']:<6} | {row['frames_per_answer']:>11} | {row['bytes_per_answer']:>11} | "
+              f"{row['first_content']['p50_ms']:>16} | {row['tokens_per_cancelled_stream']:>22} | "
+              f"{row['upstream_aborted']}/{row['cancelled_streams']}")
+
+
+if __name__ == "__main__":
+    main()
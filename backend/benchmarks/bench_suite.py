@@ -0,0 +1,452 @@
+"""
+RAG + 채팅 전체 경로 벤치마크 묶음 (결과 JSON 저장 + 기준 결과와 비교)
+
+RAGManager / classify_question / 채팅 핸들러를 바꾼 뒤 빨라졌는지 느려졌는지 같은 조건으로 비교하려고 만든 스크립트예요.
+- 합성 한국어 자료(make_corpus)를 --size 개 만들어 임시 폴더의 벡터 DB에 저장 → 문서 추가 속도
+- 같은 벡터 DB에서 검색 방식별(vector / keyword / hybrid) search 지연 시간
+- 가짜 Ollama / 가짜 OpenAI 서버(토큰 지연 설정)를 띄우고 서버를 하위 프로세스로 실행
+  → /chat 지연 시간(로컬 / GPT 라우팅별), /chat/stream 첫 토큰까지 시간
+- 벤치마크 프로세스와 서버 프로세스의 메모리(RSS / 최대 RSS), 벡터 DB 폴더 크기
+
+자료 / 질문은 --seed 로 고정되고, 서버는 임시 작업 폴더에서 실행돼서 backend 의 chroma_db / 세션 / 로그를 건드리지 않아요.
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_suite.py --output bench_before.json
+    (코드 수정)
+    python benchmarks/bench_suite.py --baseline bench_before.json --output bench_after.json
+    python benchmarks/bench_suite.py --fake-encoder --size 20000 --modes flask,async --skip-serving
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bench_serving import free_port, send_request, start_server
+from common import BACKEND_DIR, SUBJECTS, Timer, latency_summary, load_encoder, make_corpus, make_queries
+from model_router import classify_question
+from rag_manager import SEARCH_MODES, RAGManager
+from stubs import StubOllamaServer, StubOpenAIServer
+
+# 결과에 함께 남기는 설정 (같은 설정끼리 비교해야 의미가 있음)
+RECORDED_ENV = (
+    "EMBEDDING_BACKEND", "EMBEDDING_THREADS", "VECTOR_INDEX", "SEARCH_MODE", "ENCODE_BATCH_WINDOW_MS",
+    "STREAM_FLUSH_CHARS", "STREAM_FLUSH_MS", "EXTRACT_PROCESSES",
+)
+
+# --fake-encoder 일 때 서버도 모델 대신 해싱 인코더를 쓰도록 바꿔서 실행
+FAKE_ENCODER_PATCH = (
+    "import sys; sys.path.insert(0, {benchmarks_dir!r}); "
+    "import rag_manager; from common import HashingEncoder; "
+    "rag_manager.create_embedding_backend = lambda *args, **kwargs: HashingEncoder(); "
+)
+FAKE_ENCODER_COMMANDS = {
+    "flask": FAKE_ENCODER_PATCH + "import server; server.app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)",
+    "async": FAKE_ENCODER_PATCH + "from hypercorn.__main__ import main; main(['async_server:app', '--bind', sys.argv[1]])",
+}
+
+# 값이 클수록 좋은 지표 (나머지 ms / seconds / mb 지표는 작을수록 좋음)
+HIGHER_IS_BETTER = ("_per_sec", "qps", "rps")
+LOWER_IS_BETTER = ("_ms", "seconds", "_mb", "errors")
+
+
+# ----------------------------------------------------------------------
+# 측정 도구
+# ----------------------------------------------------------------------
+
+def _child_pids(pid: int) -> List[int]:
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def process_memory_mb(pid="self", include_children: bool = False) -> Dict:
+    """
+    프로세스의 현재 / 최대 RSS(MB) (/proc 가 없는 OS에서는 빈 dict)
+
+    include_children 이면 자식 프로세스까지 더해요 (hypercorn 은 워커를 자식 프로세스로 실행).
+    """
+    pids = [pid]
+    if include_children:
+        index = 0
+        while index < len(pids):
+            pids.extend(_child_pids(pids[index]))
+            index += 1
+
+    rss = peak = 0
+    for target in pids:
+        try:
+            with open(f"/proc/{target}/status") as f:
+                fields = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            if target == pid:
+                return {}
+            continue
+        rss += int(fields["VmRSS"].split()[0])
+        peak += int(fields["VmHWM"].split()[0])
+    return {"rss_mb": round(rss / 1024, 1), "peak_rss_mb": round(peak / 1024, 1)}
+
+
+def directory_size_mb(path: str) -> float:
+    total = 0
+    for directory, _, filenames in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(directory, filename)) for filename in filenames)
+    return round(total / 1e6, 2)
+
+
+def git_revision() -> Optional[str]:
+    """현재 커밋 (수정 중인 파일이 있으면 뒤에 -dirty)"""
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR,
+                               capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return revision + ("-dirty" if dirty else "")
+
+
+def make_chat_questions(count: int, seed: int) -> List[str]:
+    """
+    /chat 에 보낼 질문 (쉬운 질문 → 로컬, 어려운 질문 → GPT 로 번갈아 라우팅되게 섞음)
+
+    답변 캐시를 켠 서버에서도 매번 새 질문이 되도록 번호를 붙여요.
+    """
+    queries = make_queries(count * 4, seed)
+    easy = [query for query in queries if classify_question(query) == "easy"]
+    hard = [query for query in queries if classify_question(query) == "hard"]
+    topics = [topic for topics in SUBJECTS.values() for topic in topics]
+    easy = easy or [f"{topic}이 뭐야?" for topic in topics]
+    hard = hard or [f"{topic}은 왜 그런지 설명해줘" for topic in topics]
+    pool = [easy, hard]
+    return [f"{pool[i % 2][i // 2 % len(pool[i % 2])]} ({i})" for i in range(count)]
+
+
+# ----------------------------------------------------------------------
+# 단계별 벤치마크
+# ----------------------------------------------------------------------
+
+def bench_ingestion(rag: RAGManager, size: int, seed: int) -> Dict:
+    texts, metadatas = make_corpus(size, seed)
+    with Timer() as timer:
+        rag.add_texts(texts, metadatas)
+
+    # 서버가 첫 검색 때 색인을 다시 만들지 않도록 미리 만들어 둠 (이 시간은 따로 기록)
+    with Timer() as index_timer:
+        rag.keyword_index
+        if rag.vector_index_mode != "chroma":
+            rag.vector_index
+
+    return {
+        "documents": size,
+        "seconds": round(timer.elapsed, 3),
+        "docs_per_sec": round(size / timer.elapsed, 1),
+        "index_build_seconds": round(index_timer.elapsed, 3),
+        "db_size_mb": directory_size_mb(rag.persist_directory),
+    }
+
+
+def bench_search(rag: RAGManager, queries: List[str], modes: List[str], n_results: int) -> Dict:
+    results = {}
+    for mode in modes:
+        for query in queries[:5]:
+            rag.search(query, n_results=n_results, mode=mode)
+
+        latencies = []
+        started = time.perf_counter()
+        for query in queries:
+            query_started = time.perf_counter()
+            rag.search(query, n_results=n_results, mode=mode)
+            latencies.append(time.perf_counter() - query_started)
+        elapsed = time.perf_counter() - started
+
+        results[mode] = {**latency_summary(latencies), "qps": round(len(queries) / elapsed, 1)}
+    return results
+
+
+def post_chat(url: str, message: str) -> Dict:
+    """/chat 요청 1건 → {'ok', 'seconds', 'backend'}"""
+    body = json.dumps({"message": message, "use_rag": True}).encode("utf-8")
+    request = urllib.request.Request(url + "/chat", data=body, headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=300) as response:
+            backend = json.loads(response.read()).get("backend")
+        return {"ok": True, "seconds": time.perf_counter() - started, "backend": backend}
+    except OSError:
+        return {"ok": False, "seconds": time.perf_counter() - started, "backend": None}
+
+
+def bench_chat(url: str, questions: List[str], concurrency: int) -> Dict:
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        rows = list(pool.map(lambda question: post_chat(url, question), questions))
+        elapsed = time.perf_counter() - started
+
+    ok = [row for row in rows if row["ok"]]
+    result = {
+        "requests": len(rows),
+        "concurrency": concurrency,
+        "errors": len(rows) - len(ok),
+        "rps": round(len(ok) / elapsed, 2),
+        "latency": latency_summary([row["seconds"] for row in ok]),
+    }
+    for backend in sorted({row["backend"] for row in ok}):
+        result[f"latency_{backend}"] = latency_summary([row["seconds"] for row in ok if row["backend"] == backend])
+    return result
+
+
+def bench_stream(url: str, questions: List[str], concurrency: int) -> Dict:
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        rows = list(pool.map(lambda question: send_request(url, True, True, question), questions))
+
+    ok = [row for row in rows if row[0]]
+    return {
+        "requests": len(rows),
+        "errors": len(rows) - len(ok),
+        "time_to_first_token": latency_summary([ttft for _, _, ttft in ok if ttft]),
+        "total": latency_summary([seconds for _, seconds, _ in ok]),
+    }
+
+
+def bench_server(mode: str, args, workdir: str, ollama: StubOllamaServer, openai: StubOpenAIServer) -> Dict:
+    """서버 하나를 띄워서 /chat, /chat/stream 과 메모리 측정"""
+    env = {
+        "GPT_ROUTING": "1",
+        "OPENAI_BASE_URL": openai.url + "/v1",
+        "OPENAI_API_KEY": "bench",
+        "MODEL_WARMUP": "eager",
+    }
+    command = None
+    if args.fake_encoder:
+        patch = FAKE_ENCODER_COMMANDS[mode].format(benchmarks_dir=os.path.dirname(os.path.abspath(__file__)))
+        command = [sys.executable, "-c", patch]
+
+    port = free_port()
+    with Timer() as startup:
+        process = start_server(mode, port, ollama.url, env=env, cwd=workdir, command=command)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        # 첫 요청에서 모델 / 벡터 DB / 색인 / openai 패키지를 로드하므로 측정 전에 한 번씩 보냄
+        with Timer() as first_request:
+            post_chat(url, "분수가 뭐야?")
+        post_chat(url, "분수는 왜 배우는지 설명해줘")
+        send_request(url, True, True)
+        idle_memory = process_memory_mb(process.pid, include_children=True)
+
+        questions = make_chat_questions(args.requests, args.seed)
+        chat = bench_chat(url, questions, args.concurrency)
+        stream = bench_stream(url, [question for question in questions if classify_question(question) == "easy"],
+                              args.concurrency)
+        loaded_memory = process_memory_mb(process.pid, include_children=True)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    return {
+        "startup_seconds": round(startup.elapsed, 2),
+        "first_request_seconds": round(first_request.elapsed, 2),
+        "chat": chat,
+        "stream": stream,
+        "memory": {
+            "idle_rss_mb": idle_memory.get("rss_mb"),
+            "loaded_rss_mb": loaded_memory.get("rss_mb"),
+            "peak_rss_mb": loaded_memory.get("peak_rss_mb"),
+        },
+    }
+
+
+# ----------------------------------------------------------------------
+# 기준 결과와 비교
+# ----------------------------------------------------------------------
+
+def flatten(results: Dict, prefix: str = "") -> Dict[str, float]:
+    """중첩된 결과 → {"a.b.c": 숫자}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def metric_direction(name: str) -> int:
+    """1: 클수록 좋음, -1: 작을수록 좋음, 0: 비교하지 않는 값(요청 수 등)"""
+    leaf = name.rsplit(".", 1)[-1]
+    if leaf.endswith(HIGHER_IS_BETTER):
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> Dict:
+    """
+    기준 결과와 비교
+
+    Args:
+        tolerance: 이 비율(%)보다 크게 나빠진 지표를 regression 으로 표시
+
+    Returns:
+        {'rows': [{'metric', 'baseline', 'current', 'change_pct', 'status'}], 'regressions': [...], 'improvements': [...]}
+    """
+    before = flatten(baseline["results"])
+    after = flatten(current["results"])
+    rows, regressions, improvements = [], [], []
+
+    for name in sorted(set(before) & set(after)):
+        direction = metric_direction(name)
+        if direction == 0:
+            continue
+        old, new = before[name], after[name]
+        if old:
+            change = (new - old) / old * 100
+        else:
+            # 기준이 0인 지표(오류 수 등)는 0이 아니게 되면 100% 변화로 봄
+            change = 100.0 if new > old else 0.0
+        better = change * direction
+        status = "ok"
+        if better < -tolerance:
+            status = "regression"
+            regressions.append(name)
+        elif better > tolerance:
+            status = "improved"
+            improvements.append(name)
+        rows.append({"metric": name, "baseline": old, "current": new,
+                     "change_pct": round(change, 1), "status": status})
+
+    return {"tolerance_pct": tolerance, "rows": rows, "regressions": regressions, "improvements": improvements}
+
+
+def print_comparison(comparison: Dict, current: Dict, baseline: Dict):
+    if baseline["meta"].get("args") != current["meta"].get("args"):
+        print("⚠️  기준 결과와 실행 옵션이 달라요. 같은 옵션으로 측정한 결과끼리 비교하세요.")
+    print(f"\n기준 {baseline['meta'].get('git')} → 현재 {current['meta'].get('git')} "
+          f"(허용 범위 ±{comparison['tolerance_pct']:g}%)")
+    print(f"{'지표':<52} | {'기준':>10} | {'현재':>10} | {'변화':>8}")
+    marks = {"regression": " ❌", "improved": " ✅", "ok": ""}
+    for row in comparison["rows"]:
+        print(f"{row['metric']:<52} | {row['baseline']:>10} | {row['current']:>10} | "
+              f"{row['change_pct']:>+7.1f}%{marks[row['status']]}")
+    print(f"\n느려진 지표 {len(comparison['regressions'])}개, 빨라진 지표 {len(comparison['improvements'])}개")
+
+
+# ----------------------------------------------------------------------
+# 실행
+# ----------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG + 채팅 전체 경로 벤치마크 (JSON 결과 + 기준 비교)")
+    parser.add_argument("--size", type=int, default=5000, help="합성 자료 문서 수")
+    parser.add_argument("--queries", type=int, default=200, help="검색 방식마다 측정할 질문 수")
+    parser.add_argument("--search-modes", default=",".join(SEARCH_MODES))
+    parser.add_argument("--n-results", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fake-encoder", action="store_true", help="모델 대신 해싱 인코더 사용 (서버 포함)")
+    parser.add_argument("--backend", default=os.getenv("EMBEDDING_BACKEND", "torch"), help="임베딩 백엔드")
+    parser.add_argument("--modes", default="flask", help="측정할 서버 (flask,async)")
+    parser.add_argument("--skip-serving", action="store_true", help="서버 측정(/chat, /chat/stream) 생략")
+    parser.add_argument("--requests", type=int, default=40, help="/chat 요청 수 (/chat/stream 은 그중 쉬운 질문)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--tokens", type=int, default=20, help="가짜 Ollama 답변 토큰 수")
+    parser.add_argument("--token-latency-ms", type=float, default=20)
+    parser.add_argument("--prefill-ms", type=float, default=50)
+    parser.add_argument("--gpt-tokens", type=int, default=20, help="가짜 OpenAI 답변 토큰 수")
+    parser.add_argument("--gpt-token-latency-ms", type=float, default=10)
+    parser.add_argument("--gpt-prefill-ms", type=float, default=200)
+    parser.add_argument("--output", help="결과 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON 파일")
+    parser.add_argument("--tolerance", type=float, default=10, help="regression 으로 볼 변화율(%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="느려진 지표가 있으면 종료 코드 1")
+    parser.add_argument("--keep-workdir", action="store_true", help="임시 작업 폴더(벡터 DB / 로그)를 지우지 않음")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items()
+                     if key not in ("output", "baseline", "tolerance", "fail_on_regression", "keep_workdir")},
+            "env": {name: os.environ[name] for name in RECORDED_ENV if name in os.environ},
+        },
+        "results": {},
+    }
+    results = report["results"]
+
+    try:
+        with Timer() as load_timer:
+            encoder = load_encoder(args.fake_encoder, args.backend)
+        rag = RAGManager(
+            persist_directory=os.path.join(workdir, "chroma_db"),
+            embedding_model=encoder,
+            query_cache_size=0,
+            encode_batch_window_ms=0
+        )
+        results["encoder_load_seconds"] = round(load_timer.elapsed, 2)
+
+        print(f"📚 문서 추가: {args.size}개")
+        results["ingest"] = bench_ingestion(rag, args.size, args.seed)
+
+        print(f"🔎 검색: {args.queries}개 질문 × {args.search_modes}")
+        queries = make_queries(args.queries, args.seed)
+        results["search"] = bench_search(rag, queries, args.search_modes.split(","), args.n_results)
+        results["memory"] = {f"bench_{key}": value for key, value in process_memory_mb().items()}
+
+        if not args.skip_serving:
+            ollama = StubOllamaServer(tokens=args.tokens, token_latency=args.token_latency_ms / 1000,
+                                      prefill_latency=args.prefill_ms / 1000).start()
+            openai = StubOpenAIServer(tokens=args.gpt_tokens, token_latency=args.gpt_token_latency_ms / 1000,
+                                      prefill_latency=args.gpt_prefill_ms / 1000).start()
+            try:
+                results["serving"] = {}
+                for mode in args.modes.split(","):
+                    print(f"🌐 서버 측정: {mode}")
+                    results["serving"][mode] = bench_server(mode, args, workdir, ollama, openai)
+            finally:
+                ollama.stop()
+                openai.stop()
+    finally:
+        if args.keep_workdir:
+            print(f"📁 작업 폴더: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparison = compare(report, baseline, args.tolerance)
+        print_comparison(comparison, report, baseline)
+        if args.output:
+            report["comparison"] = comparison
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        if args.fail_on_regression and comparison["regressions"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+압축 벡터 색인 벤치마크 (메모리 절약 vs recall 손실)
+
+합성 임베딩(클러스터가 있는 768차원 벡터)으로 색인 방식별
+- 벡터당 바이트 / 전체 색인 크기 / float32 대비 절약률
+  (서버에서는 압축 색인이 ChromaDB 옆에 추가되므로, ChromaDB의 float32 벡터까지 더한 크기도 함께 보여 줌)
+- recall@k: float32 전체 비교(정답) 결과 top-k 중 찾은 비율
+  (압축 거리만으로 고른 결과 / RERANK_CANDIDATES 배 후보를 float32로 다시 정렬한 결과)
+- 질문당 검색 지연 시간
+을 비교해요. --chroma 를 주면 ChromaDB HNSW 색인도 함께 측정해요 (구축이 오래 걸림).
+
+사용법 (backend 폴더에서):
+    python benchmarks/bench_vector_index.py --size 100000 --queries 200
+    python benchmarks/bench_vector_index.py --size 20000 --chroma
+"""
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from common import Timer, latency_summary
+from rag_manager import RERANK_CANDIDATES
+from vector_index import CompactVectorIndex
+
+
+def make_vectors(size: int, dimension: int, clusters: int = 200, seed: int = 42) -> np.ndarray:
+    """문장 임베딩처럼 공통 방향 + 주제별 클러스터가 있는 벡터"""
+    rng = np.random.default_rng(seed)
+    offset = rng.normal(0, 0.3, dimension)
+    centers = rng.normal(0, 1, (clusters, dimension))
+    labels = rng.integers(0, clusters, size)
+    return (offset + centers[labels] + rng.normal(0, 0.6, (size, dimension))).astype(np.float32)
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int = 7) -> np.ndarray:
+    """코퍼스 벡터 근처의 질문 벡터"""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(vectors), count)
+    return (vectors[picks] + rng.normal(0, 0.4, (count, vectors.shape[1]))).astype(np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    sq_norms = np.einsum('ij,ij->i', vectors, vectors)
+    top = []
+    for query in queries:
+        distances = sq_norms - 2 * (vectors @ query)
+        candidates = np.argpartition(distances, k)[:k]
+        top.append(candidates[np.argsort(distances[candidates])])
+    return np.array(top)
+
+
+def rerank(vectors: np.ndarray, query: np.ndarray, candidates, k: int):
+    """후보를 float32 벡터로 다시 정렬 (RAGManager._compact_vector_query 와 같은 계산)"""
+    rows = np.array([int(doc_id) for doc_id, _ in candidates])
+    differences = vectors[rows] - query
+    distances = np.einsum('ij,ij->i', differences, differences)
+    return rows[np.argsort(distances, kind='stable')[:k]]
+
+
+def recall(found, expected) -> float:
+    return float(np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, expected)]))
+
+
+def measure_compact(dtype: str, vectors, queries, expected, k: int) -> dict:
+    index = CompactVectorIndex(dtype=dtype)
+    ids = [str(i) for i in range(len(vectors))]
+    with Timer() as build:
+        for start in range(0, len(vectors), 10000):
+            index.add(ids[start:start + 10000], vectors[start:start + 10000])
+
+    approximate, reranked, latencies = [], [], []
+    for query in queries:
+        with Timer() as timer:
+            candidates = index.search(query, k * RERANK_CANDIDATES)
+            rows = rerank(vectors, query, candidates, k)
+        latencies.append(timer.elapsed)
+        approximate.append([int(doc_id) for doc_id, _ in candidates[:k]])
+        reranked.append(rows)
+
+    stats = index.stats()
+    return {
+        "index": dtype,
+        "bytes_per_vector": stats["bytes_per_vector"],
+        "index_mb": round(stats["total_bytes"] / 1024 / 1024, 2),
+        "saved_pct": round(100 * (1 - stats["total_bytes"] / stats["float32_bytes"]), 1),
+        "with_chroma_mb": round((stats["total_bytes"] + stats["float32_bytes"]) / 1024 / 1024, 2),
+        "build_seconds": round(build.elapsed, 2),
+        f"recall@{k}": round(recall(approximate, expected), 4),
+        f"recall@{k}_reranked": round(recall(reranked, expected), 4),
+        "latency": latency_summary(latencies),
+    }
+
+
+def measure_float32(vectors, queries, expected, k: int) -> dict:
+    sq_norms = np.einsum('ij,ij->i', vectors, vectors)
+    latencies = []
+    for query in queries:
+        with Timer() as timer:
+            distances = sq_norms - 2 * (vectors @ query)
+            np.argpartition(distances, k)[:k]
+        latencies.append(timer.elapsed)
+    bytes_per_vector = vectors.shape[1] * 4 + 4
+    return {
+        "index": "float32",
+        "bytes_per_vector": bytes_per_vector,
+        "index_mb": round(len(vectors) * bytes_per_vector / 1024 / 1024, 2),
+        "saved_pct": 0.0,
+        "with_chroma_mb": None,
+        "build_seconds": 0.0,
+        f"recall@{k}": 1.0,
+        f"recall@{k}_reranked": 1.0,
+        "latency": latency_summary(latencies),
+    }
+
+
+def measure_chroma(vectors, queries, expected, k: int) -> dict:
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.PersistentClient(path=tempfile.mkdtemp(prefix="bench_vector_"),
+                                       settings=Settings(anonymized_telemetry=False))
+    collection = client.create_collection("bench")
+    ids = [str(i) for i in range(len(vectors))]
+    with Timer() as build:
+        for start in range(0, len(vectors), client.max_batch_size):
+            stop = start + client.max_batch_size
+            collection.add(ids=ids[start:stop], embeddings=vectors[start:stop].tolist())
+
+    found, latencies = [], []
+    for query in queries:
+        with Timer() as timer:
+            result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+        latencies.append(timer.elapsed)
+        found.append([int(doc_id) for doc_id in result["ids"][0]])
+
+    # HNSW 그래프(M=16, 양방향 링크)는 제외한 벡터 크기만 계산
+    bytes_per_vector = vectors.shape[1] * 4
+    return {
+        "index": "chroma-hnsw",
+        "bytes_per_vector": bytes_per_vector,
+        "index_mb": round(len(vectors) * bytes_per_vector / 1024 / 1024, 2),
+        "saved_pct": 0.0,
+        "with_chroma_mb": round(len(vectors) * bytes_per_vector / 1024 / 1024, 2),
+        "build_seconds": round(build.elapsed, 2),
+        f"recall@{k}": round(recall(found, expected), 4),
+        f"recall@{k}_reranked": None,
+        "latency": latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="압축 벡터 색인 메모리 / recall 벤치마크")
+    parser.add_argument("--size", type=int, default=100000, help="벡터 수")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--chroma", action="store_true", help="ChromaDB HNSW 색인도 측정")
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.size, args.dimension)
+    queries = make_queries(vectors, args.queries)
+    expected = exact_top_k(vectors, queries, args.k)
+
+    rows = [measure_float32(vectors, queries, expected, args.k)]
+    print(json.dumps(rows[-1], ensure_ascii=False))
+    for dtype in ("float16", "int8"):
+        rows.append(measure_compact(dtype, vectors, queries, expected, args.k))
+        print(json.dumps(rows[-1], ensure_ascii=False))
+    if args.chroma:
+        rows.append(measure_chroma(vectors, queries, expected, args.k))
+        print(json.dumps(rows[-1], ensure_ascii=False))
+
+    k = args.k
+    print(f"\n({args.size}개 × {args.dimension}차원, CPU 코어 {os.cpu_count()}개)")
+    print(f"색인        | bytes/vec | 색인 MB | 절약 % | +chroma MB | R@{k:<3}  | R@{k} 재정렬 | p50 ms")
+    for row in rows:
+        print(f"{row['index']:<11} | {row['bytes_per_vector']:>9} | {row['index_mb']:>7} | {row['saved_pct']:>6} | "
+              f"{str(row['with_chroma_mb']):>10} | "
+              f"{row[f'recall@{k}']:<7} | {str(row[f'recall@{k}_reranked']):<11} | {row['latency']['p50_ms']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+임베딩 백엔드 일치도 확인 (torch 기준 코사인 유사도 + 검색 결과 일치)
+
+같은 문장을 기준 백엔드(torch)와 비교 백엔드(onnx / onnx-int8)로 임베딩해서
+- 문장별 코사인 유사도 (평균 / 최소)
+- 질문마다 코퍼스에서 가장 가까운 top-k 문서가 기준과 얼마나 겹치는지
+를 확인하고, 최소 코사인 유사도가 기준보다 낮으면 종료 코드 1로 끝나요.
+백엔드를 바꾸기 전(또는 모델/onnxruntime 버전을 올린 뒤) 실행해 보세요.
+
+사용법 (backend 폴더에서):
+    python benchmarks/check_embedding_parity.py
+    python benchmarks/check_embedding_parity.py --backends onnx-int8 --min-cosine 0.97
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from bench_embedding import make_questions
+from common import make_corpus
+from embedding_backends import create_embedding_backend
+
+# 백엔드별 기본 최소 코사인 유사도 (int8 양자화는 약간의 오차를 허용)
+MIN_COSINE = {"onnx": 0.999, "onnx-int8": 0.98}
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+
+
+def compare(reference: dict, candidate: dict, k: int) -> dict:
+    cosines = np.concatenate([
+        np.sum(reference[name] * candidate[name], axis=1) for name in ("corpus", "queries")
+    ])
+    expected = top_k(reference["queries"], reference["corpus"], k)
+    found = top_k(candidate["queries"], candidate["corpus"], k)
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(expected, found)]
+    return {
+        "mean_cosine": round(float(cosines.mean()), 5),
+        "min_cosine": round(float(cosines.min()), 5),
+        f"top{k}_overlap": round(float(np.mean(overlap)), 4),
+        "top1_agreement": round(float(np.mean(expected[:, 0] == found[:, 0])), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 백엔드 일치도 확인")
+    parser.add_argument("--reference", default="torch", help="기준 백엔드")
+    parser.add_argument("--backends", default="onnx,onnx-int8", help="비교할 백엔드 (쉼표 구분)")
+    parser.add_argument("--docs", type=int, default=500, help="코퍼스 문장 수")
+    parser.add_argument("--queries", type=int, default=100, help="질문 수")
+    parser.add_argument("--k", type=int, default=5, help="검색 결과 비교 개수")
+    parser.add_argument("--min-cosine", type=float, default=None,
+                        help="최소 코사인 유사도 (없으면 백엔드별 기본값)")
+    args = parser.parse_args()
+
+    texts, _ = make_corpus(args.docs)
+    questions = make_questions(args.queries)
+
+    def embed(backend_name: str) -> dict:
+        backend = create_embedding_backend(backend_name)
+        return {
+            "corpus": normalize(np.asarray(backend.encode(texts, batch_size=64), dtype=np.float32)),
+            "queries": normalize(np.asarray(backend.encode(questions, batch_size=64), dtype=np.float32)),
+        }
+
+    reference = embed(args.reference)
+    failed = False
+    for backend_name in args.backends.split(","):
+        row = {"reference": args.reference, "backend": backend_name,
+               **compare(reference, embed(backend_name), args.k)}
+        threshold = args.min_cosine if args.min_cosine is not None else MIN_COSINE.get(backend_name, 0.99)
+        row["min_cosine_required"] = threshold
+        row["passed"] = row["min_cosine"] >= threshold
+        failed = failed or not row["passed"]
+        print(json.dumps(row, ensure_ascii=False))
+
+    if failed:
+        print("❌ 기준 백엔드와 임베딩이 충분히 일치하지 않습니다")
+        sys.exit(1)
+    print("✅ 모든 백엔드가 기준과 일치합니다")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+벤치마크 공통 도구
+
+- 합성 한국어 학습 자료 생성
+- 합성 PDF 생성
+- 모델 없이 저장/검색 비용만 재기 위한 해싱 인코더
+"""
+import hashlib
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# backend/ 모듈을 import 할 수 있도록 경로 추가
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+SUBJECTS = {
+    "수학": ["분수", "곱셈", "나눗셈", "도형", "시계 보기", "소수"],
+    "과학": ["광합성", "물의 순환", "자석", "날씨", "동물의 한살이", "소리"],
+    "국어": ["받아쓰기", "문장 부호", "일기 쓰기", "낱말 뜻", "이야기 요약"],
+    "사회": ["우리 고장", "지도 읽기", "옛날 생활", "경제 활동"],
+}
+GRADES = ["1학년", "2학년", "3학년", "4학년", "5학년", "6학년"]
+
+SENTENCE_TEMPLATES = [
+    "{topic}은 {subject} 시간에 배우는 중요한 내용이에요.",
+    "{topic}을 이해하려면 먼저 기본 개념을 차근차근 살펴봐야 해요.",
+    "예를 들어 생활 속에서 {topic}을 찾아보면 더 쉽게 이해할 수 있어요.",
+    "{grade} 친구들은 {topic}을 그림으로 그려 보면서 공부하면 좋아요.",
+    "선생님과 함께 {topic} 문제를 풀어 보고 이유를 말해 봐요.",
+    "{topic}의 원리를 알면 비슷한 문제도 스스로 해결할 수 있어요.",
+    "오늘 배운 {topic} 내용을 친구에게 설명해 보세요.",
+]
+
+
+def make_corpus(size: int, seed: int = 42, sentences_per_doc: int = 4) -> Tuple[List[str], List[Dict]]:
+    """
+    합성 한국어 학습 자료 생성
+
+    Returns:
+        (텍스트 리스트, 메타데이터 리스트)
+    """
+    rng = random.Random(seed)
+    subjects = list(SUBJECTS)
+    texts = []
+    metadatas = []
+
+    for i in range(size):
+        subject = rng.choice(subjects)
+        topic = rng.choice(SUBJECTS[subject])
+        grade = rng.choice(GRADES)
+        sentences = [
+            rng.choice(SENTENCE_TEMPLATES).format(topic=topic, subject=subject, grade=grade)
+            for _ in range(sentences_per_doc)
+        ]
+        # 문서마다 내용이 달라지도록 번호를 붙임
+        sentences.append(f"(자료 번호 {i})")
+        texts.append(" ".join(sentences))
+        metadatas.append({
+            "subject": subject,
+            "grade": grade,
+            "topic": topic,
+            "source": f"synthetic_{i // 50}.txt",
+        })
+
+    return texts, metadatas
+
+
+def make_queries(count: int, seed: int = 7) -> List[str]:
+    """합성 질문 생성"""
+    rng = random.Random(seed)
+    topics = [topic for topics in SUBJECTS.values() for topic in topics]
+    patterns = ["{topic}이 뭐야?", "{topic}은 어떻게 해?", "{topic} 쉽게 설명해줘", "왜 {topic}을 배워?"]
+    return [rng.choice(patterns).format(topic=rng.choice(topics)) for _ in range(count)]
+
+
+def make_pdf(path: str, pages: int, lines_per_page: int = 40, seed: int = 42) -> str:
+    """
+    텍스트 PDF 생성 (외부 라이브러리 없이 PDF 객체를 직접 씀)
+
+    기본 글꼴(Helvetica)은 한글을 표현하지 못해서 영어 문장으로 채워요.
+    페이지마다 내용이 달라서 청크 ID가 겹치지 않아요.
+
+    Returns:
+        만든 파일 경로
+    """
+    rng = random.Random(seed)
+    words = ["fraction", "photosynthesis", "magnet", "weather", "multiply", "divide", "shape",
+             "sound", "water", "cycle", "map", "village", "diary", "sentence", "number", "plant"]
+    objects = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+
+    for page in range(pages):
+        lines = []
+        for line in range(lines_per_page):
+            sentence = " ".join(rng.choice(words) for _ in range(10))
+            lines.append(f"({sentence} page {page + 1} line {line + 1}.) Tj T*".encode("ascii"))
+        stream = b"BT /F1 10 Tf 14 TL 40 760 Td " + b" ".join(lines) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R >> >> >>" % (len(objects))
+        )
+        kids.append(len(objects))
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(output)
+    return path
+
+
+class HashingEncoder:
+    """
+    SentenceTransformer 대신 쓰는 가벼운 인코더
+
+    단어 해시로 벡터를 만들기 때문에 모델 없이 저장/검색 경로만 측정할 수 있어요.
+    """
+
+    def __init__(self, dimension: int = 768):
+        self.dimension = dimension
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        items = [sentences] if single else list(sentences)
+        vectors = np.zeros((len(items), self.dimension), dtype=np.float32)
+
+        for row, sentence in enumerate(items):
+            for token in sentence.split():
+                digest = hashlib.md5(token.encode("utf-8")).digest()
+                vectors[row, int.from_bytes(digest[:4], "little") % self.dimension] += 1.0
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1.0, norms)
+        return vectors[0] if single else vectors
+
+
+def load_encoder(fake: bool, backend: str = "torch", threads: int = 0):
+    """--fake-encoder 옵션에 따라 인코더 선택 (실제 모델은 embedding_backends 로 생성)"""
+    if fake:
+        return HashingEncoder()
+    from embedding_backends import create_embedding_backend
+    return create_embedding_backend(backend, threads=threads)
+
+
+class Timer:
+    """with 블록 실행 시간 측정"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """백분위수 (values가 비어 있으면 0)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def latency_summary(latencies: List[float]) -> Dict:
+    """지연 시간 리스트(초) → ms 단위 요약"""
+    return {
+        "count": len(latencies),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
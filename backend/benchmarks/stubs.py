@@ -0,0 +1,322 @@
+"""
+벤치마크용 가짜 LLM 서버 (Ollama / OpenAI)
+
+실제 모델 없이 토큰 지연 시간을 흉내 내서 서버/클라이언트 경로만 측정해요.
+- StubOllamaServer: OLLAMA_HOST 환경 변수를 stub.url 로 지정하면 ollama 클라이언트가 사용
+- StubOpenAIServer: OPENAI_BASE_URL 을 stub.url + "/v1" 로 지정하면 openai 클라이언트(gpt_manager)가 사용
+"""
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """가짜 LLM HTTP 서버 공통 부분 (토큰 수 / 지연 설정, 백그라운드 실행)"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        tokens: int = 20,
+        token_latency: float = 0.02,
+        prefill_latency: float = 0.05,
+        model: str = "elementary-kor-teacher"
+    ):
+        """
+        Args:
+            tokens: 답변 하나에 생성할 토큰 수
+            token_latency: 토큰 하나당 지연 시간(초)
+            prefill_latency: 첫 토큰 전 지연 시간(초)
+        """
+        self.tokens = tokens
+        self.token_latency = token_latency
+        self.prefill_latency = prefill_latency
+        self.model = model
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def _make_handler(self):
+        raise NotImplementedError
+
+
+class StubOllamaServer(StubServer):
+    """/api/chat, /api/tags 를 흉내 내는 HTTP 서버"""
+
+    def __init__(self, *args, **kwargs):
+        # 스트리밍 응답 카운터 (중간에 끊긴 스트림 = 클라이언트가 연결을 닫아서 생성을 멈춘 경우)
+        self.streams_completed = 0
+        self.streams_aborted = 0
+        self.tokens_sent = 0
+        super().__init__(*args, **kwargs)
+
+    def prefill_delay(self, messages, request=None) -> float:
+        """첫 토큰 전 지연 시간 (하위 클래스에서 프롬프트에 따라 바꿀 수 있음)"""
+        return self.prefill_latency
+
+    def _chunk(self, content: str, done: bool, prompt_tokens: int = 0) -> dict:
+        chunk = {
+            "model": self.model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+        if done:
+            chunk.update({
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": self.tokens,
+                "total_duration": int((self.prefill_latency + self.tokens * self.token_latency) * 1e9),
+            })
+        return chunk
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, payload: dict):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": [{"name": stub.model}]})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path != "/api/chat":
+                    self.send_error(404)
+                    return
+
+                with stub._lock:
+                    stub.request_count += 1
+
+                messages = request.get("messages", [])
+                prompt_tokens = sum(len(message.get("content", "")) for message in messages)
+                time.sleep(stub.prefill_delay(messages, request))
+
+                if not request.get("stream", True):
+                    time.sleep(stub.tokens * stub.token_latency)
+                    answer = "".join(f"토큰{i} " for i in range(stub.tokens))
+                    self._send_json(stub._chunk(answer, True, prompt_tokens))
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                try:
+                    for i in range(stub.tokens):
+                        time.sleep(stub.token_latency)
+                        self._write_chunk(stub._chunk(f"토큰{i} ", False))
+                        with stub._lock:
+                            stub.tokens_sent += 1
+                    self._write_chunk(stub._chunk("", True, prompt_tokens))
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # 클라이언트가 스트림을 끊은 경우
+                    with stub._lock:
+                        stub.streams_aborted += 1
+                    return
+                with stub._lock:
+                    stub.streams_completed += 1
+
+            def _write_chunk(self, payload: dict):
+                line = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+class PrefixCacheStubOllama(StubOllamaServer):
+    """
+    프롬프트 prefix 캐시를 흉내 내는 가짜 Ollama 서버
+
+    Ollama처럼 모델마다 슬롯 수만큼 최근 프롬프트를 기억하고, 새 프롬프트와 앞부분이 같은 만큼은
+    다시 계산하지 않아요. 첫 토큰 지연 = prefill_latency + (캐시에 없는 글자 수 × prefill_per_char).
+    keep_alive/options 가 바뀌면 모델을 다시 로드한 것으로 보고 캐시를 비우고 reload_latency 를 더해요.
+    """
+
+    def __init__(self, prefill_per_char: float = 0.0002, reload_latency: float = 0.5, slots: int = 4,
+                 slot_similarity: float = 0.5, **kwargs):
+        """
+        Args:
+            prefill_per_char: 캐시에 없는 글자 하나당 prefill 시간(초)
+            reload_latency: 모델을 다시 로드할 때 추가되는 지연 시간(초)
+            slots: 모델별로 기억하는 프롬프트 수 (Ollama의 OLLAMA_NUM_PARALLEL 슬롯)
+            slot_similarity: 이 비율 이상 겹쳐야 같은 슬롯을 이어서 사용
+        """
+        super().__init__(**kwargs)
+        self.prefill_per_char = prefill_per_char
+        self.reload_latency = reload_latency
+        self.slots = slots
+        self.slot_similarity = slot_similarity
+        self._cache = {}
+        self._settings = {}
+        self.prompt_chars = 0
+        self.cached_chars = 0
+        self.reloads = 0
+
+    @staticmethod
+    def render(messages) -> str:
+        """채팅 템플릿을 흉내 낸 프롬프트 문자열"""
+        return "".join(f"<|{m.get('role')}|>{m.get('content', '')}<|end|>" for m in messages)
+
+    @staticmethod
+    def _common_prefix(a: str, b: str) -> int:
+        common = 0
+        for x, y in zip(a, b):
+            if x != y:
+                break
+            common += 1
+        return common
+
+    def prefill_delay(self, messages, request=None) -> float:
+        request = request or {}
+        model = request.get("model", self.model)
+        settings = json.dumps([request.get("keep_alive"), request.get("options")], sort_keys=True)
+        prompt = self.render(messages)
+
+        with self._lock:
+            delay = self.prefill_latency
+            if model in self._settings and self._settings[model] != settings:
+                self.reloads += 1
+                delay += self.reload_latency
+                self._cache.pop(model, None)
+            self._settings[model] = settings
+
+            # 캐시된 프롬프트의 절반 이상이 겹치는 슬롯을 사용하고,
+            # 없으면 빈 슬롯이나 가장 오래 쓰지 않은 슬롯을 사용 (llama.cpp 슬롯 선택 방식)
+            slots = self._cache.setdefault(model, [])
+            best, best_length = None, 0
+            for index, cached in enumerate(slots):
+                length = self._common_prefix(prompt, cached)
+                if length > best_length and length >= len(cached) * self.slot_similarity:
+                    best, best_length = index, length
+            if best is not None:
+                common = best_length
+                slots.pop(best)
+            elif len(slots) >= self.slots:
+                common = self._common_prefix(prompt, slots.pop(0))
+            else:
+                common = 0
+            slots.append(prompt)
+
+            self.prompt_chars += len(prompt)
+            self.cached_chars += common
+
+        return delay + (len(prompt) - common) * self.prefill_per_char
+
+    def cache_stats(self) -> dict:
+        with self._lock:
+            return {
+                "prompt_chars": self.prompt_chars,
+                "cached_chars": self.cached_chars,
+                "cache_ratio": round(self.cached_chars / self.prompt_chars, 3) if self.prompt_chars else 0.0,
+                "reloads": self.reloads,
+            }
+
+    def reset_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self._settings.clear()
+            self.prompt_chars = 0
+            self.cached_chars = 0
+            self.reloads = 0
+
+
+class StubOpenAIServer(StubServer):
+    """/v1/chat/completions 를 흉내 내는 HTTP 서버 (gpt_manager.ask_gpt 처럼 스트리밍 없는 호출만)"""
+
+    def __init__(self, *args, model: str = "gpt-4o-mini", **kwargs):
+        super().__init__(*args, model=model, **kwargs)
+
+    def _completion(self, prompt_tokens: int) -> dict:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": self.model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(f"토큰{i} " for i in range(self.tokens))},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": self.tokens,
+                "total_tokens": prompt_tokens + self.tokens,
+            },
+        }
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path.rstrip("/") != "/v1/chat/completions" or request.get("stream"):
+                    self.send_error(404)
+                    return
+
+                with stub._lock:
+                    stub.request_count += 1
+
+                prompt_tokens = sum(len(message.get("content", "")) for message in request.get("messages", []))
+                time.sleep(stub.prefill_latency + stub.tokens * stub.token_latency)
+
+                body = json.dumps(stub._completion(prompt_tokens), ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
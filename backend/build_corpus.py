@@ -0,0 +1,637 @@
+"""
+학습 자료 폴더를 한꺼번에 벡터 DB로 만드는 명령줄 도구 (오프라인 대량 구축)
+
+/upload 로 파일을 하나씩 올리지 않고, 폴더 안의 PDF / DOCX / TXT 를 모두 RAGManager 로 넣어요.
+- 메타데이터: 매니페스트(CSV / JSON / JSONL)에 파일 또는 폴더별 subject / grade / topic 등을 적음
+  (폴더 항목은 그 아래 모든 파일에 적용되고, 더 깊은 항목과 파일 항목이 덮어씀)
+- 병렬 추출: 파일 여러 개를 스레드로 동시에 읽고, PDF 페이지는 document_loader 의 프로세스 풀에서 추출
+- 묶음 임베딩: 여러 파일의 청크를 write_batch_size 만큼 모아서 RAGManager.add_texts 로 한꺼번에 저장
+- 체크포인트: 끝난 파일을 벡터 DB 폴더의 corpus_build.db 에 기록해서, 중간에 멈춰도 다시 실행하면
+  끝난 파일은 읽지도 않고 건너뜀 (하던 파일은 처음부터 다시 읽지만, 이미 저장된 청크는 내용 해시
+  ID로 걸러져서 다시 임베딩하지 않음)
+- 끝나면 파일 / 용량 / 청크 처리량과 임베딩에 쓴 시간을 출력
+
+서버와 같은 벡터 DB 폴더를 쓰므로 서버(또는 RAG 서비스)를 끈 상태에서 실행하세요.
+
+사용법 (backend 폴더에서):
+    python build_corpus.py ./materials --manifest ./materials/manifest.csv
+    python build_corpus.py ./materials --manifest manifest.json --workers 8 --json build_stats.json
+
+매니페스트 예시 (CSV, path 는 자료 폴더 기준 상대 경로):
+    path,subject,grade,topic
+    수학,수학,,
+    수학/3학년,,3학년,
+    수학/3학년/분수.pdf,,,분수
+"""
+import argparse
+import csv
+import json
+import os
+import queue
+import signal
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from document_loader import EXTRACT_PROCESSES, batched, hash_file, iter_document_chunks, shutdown_extract_pool
+from ingest_jobs import EMBED_QUEUE_BATCHES, INGEST_CHUNK_BATCH
+from rag_manager import make_doc_id
+
+# 기본 설정 (환경 변수로 변경 가능)
+# - BUILD_WORKERS: 동시에 읽는 파일 수 (PDF 페이지 추출 프로세스 수는 document_loader.EXTRACT_PROCESSES)
+BUILD_WORKERS = int(os.getenv("BUILD_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# 체크포인트 파일 이름 (벡터 DB 폴더 안에 저장해서 벡터 DB를 지우면 함께 지워짐)
+CHECKPOINT_FILE = "corpus_build.db"
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+# 진행 상황 출력 간격(초)
+PROGRESS_INTERVAL = 10
+
+# 체크포인트에서 끝난 것으로 보는 상태
+FINISHED_STATUSES = ('done', 'duplicate')
+
+
+def normalize_path(path: str) -> str:
+    """매니페스트 / 체크포인트 키로 쓰는 상대 경로 ("/" 구분, 앞의 ./ 와 뒤의 / 제거)"""
+    path = path.replace("\\", "/").strip().strip("/")
+    while path.startswith("./"):
+        path = path[2:]
+    return "" if path == "." else path
+
+
+def _clean_metadata(entry: Dict, where: str) -> Dict:
+    """매니페스트 항목에서 path 와 빈 값을 빼고, ChromaDB에 넣을 수 없는 값은 거절"""
+    metadata = {}
+    for key, value in entry.items():
+        if key == 'path' or value is None or value == "":
+            continue
+        if not isinstance(value, (str, int, float, bool)):
+            raise ValueError(f"매니페스트 값은 문자열/숫자만 가능합니다: {where} {key}={value!r}")
+        metadata[key] = value.strip() if isinstance(value, str) else value
+    return metadata
+
+
+def load_manifest(path: str) -> Dict[str, Dict]:
+    """
+    메타데이터 매니페스트 읽기
+
+    - CSV: path 열 + 메타데이터 열 (subject, grade, topic, ...)
+    - JSON: {"경로": {메타데이터}} 또는 [{"path": "경로", ...}, ...]
+    - JSONL: 한 줄에 {"path": "경로", ...} 하나
+
+    Returns:
+        정규화된 상대 경로(파일 또는 폴더, "" 는 전체) → 메타데이터
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        if extension == '.csv':
+            entries = list(csv.DictReader(f))
+        elif extension == '.jsonl':
+            entries = [json.loads(line) for line in f if line.strip()]
+        elif extension == '.json':
+            data = json.load(f)
+            entries = [{**value, 'path': key} for key, value in data.items()] if isinstance(data, dict) else data
+        else:
+            raise ValueError(f"지원하지 않는 매니페스트 형식입니다: {os.path.basename(path)}")
+
+    manifest = {}
+    for line_num, entry in enumerate(entries, start=1):
+        if 'path' not in entry:
+            raise ValueError(f"매니페스트 {line_num}번째 항목에 path가 없습니다")
+        key = normalize_path(str(entry['path']))
+        manifest.setdefault(key, {}).update(_clean_metadata(entry, f"{key or '.'}:"))
+    return manifest
+
+
+def manifest_metadata(manifest: Dict[str, Dict], relpath: str) -> Optional[Dict]:
+    """
+    파일 하나에 적용할 매니페스트 메타데이터 (상위 폴더 → 하위 폴더 → 파일 순서로 덮어씀)
+
+    Returns:
+        메타데이터, 파일과 상위 폴더 모두 매니페스트에 없으면 None
+    """
+    parts = relpath.split("/")
+    keys = [""] + ["/".join(parts[:depth]) for depth in range(1, len(parts) + 1)]
+    found = [manifest[key] for key in keys if key in manifest]
+    if not found:
+        return None
+    metadata = {}
+    for entry in found:
+        metadata.update(entry)
+    return metadata
+
+
+def discover_files(root: str) -> List[str]:
+    """자료 폴더 아래의 PDF / DOCX / TXT 상대 경로 (숨김 파일/폴더 제외, 경로 순서)"""
+    found = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        for filename in sorted(filenames):
+            if filename.startswith('.') or filename.startswith('~$'):
+                continue
+            if os.path.splitext(filename)[1].lower() in SUPPORTED_EXTENSIONS:
+                found.append(normalize_path(os.path.relpath(os.path.join(directory, filename), root)))
+    return found
+
+
+class BuildCheckpoint:
+    """
+    대량 구축 체크포인트 (SQLite)
+
+    파일마다 크기 / 수정 시각 / 내용 해시와 결과를 기록해요. 파일을 끝까지 저장한 뒤에만 기록하므로
+    여기 있는 파일은 다시 실행할 때 건너뛰어도 안전해요.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "status TEXT NOT NULL, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, path: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, status, data FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'size': row[0], 'mtime_ns': row[1], 'status': row[2], **json.loads(row[3])}
+
+    def put(self, path: str, size: int, mtime_ns: int, status: str, data: Dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, status, data, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, status, json.dumps(data, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM files")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CorpusBuilder:
+    """
+    자료 폴더 → 벡터 DB 대량 구축
+
+    IngestJobQueue 와 같은 구조예요.
+    - 추출 단계: workers 개의 스레드가 파일을 하나씩 맡아 청크 묶음(INGEST_CHUNK_BATCH)을 대기열에 넣음
+    - 임베딩 단계: 호출한 스레드가 여러 파일의 청크를 write_batch_size 만큼 모아 add_texts 로 저장하고,
+      파일의 마지막 청크까지 저장되면 finalize_document 로 이전 버전 청크 정리 + 체크포인트 기록
+    """
+
+    def __init__(
+        self,
+        rag_manager,
+        checkpoint: BuildCheckpoint,
+        workers: int = BUILD_WORKERS,
+        extract_processes: int = EXTRACT_PROCESSES,
+        progress_interval: float = PROGRESS_INTERVAL,
+    ):
+        """
+        Args:
+            rag_manager: 청크를 저장할 RAGManager
+            checkpoint: 끝난 파일을 기록할 체크포인트
+            workers: 동시에 읽는 파일 수
+            extract_processes: PDF 추출 프로세스 수 (1 이하면 추출 스레드에서 직접 추출)
+            progress_interval: 진행 상황 출력 간격(초, 0이면 출력 안 함)
+        """
+        self.rag_manager = rag_manager
+        self.checkpoint = checkpoint
+        self.workers = max(1, workers)
+        self.extract_processes = extract_processes
+        self.progress_interval = progress_interval
+
+        self._queue = queue.Queue(maxsize=EMBED_QUEUE_BATCHES)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._failed = set()
+        # 이번 실행에서 읽은 파일 내용 해시 → 출처 (같은 파일이 폴더 여러 곳에 있을 때 한 번만 저장)
+        self._hashes = {}
+        # 먼저 읽은 파일이 아직 저장 중인 같은 내용의 파일 (해시 → 파일 리스트)
+        # 먼저 읽은 파일이 저장되면 중복으로 기록하고, 실패하면 하나를 골라 대신 저장해요.
+        self._waiting = {}
+        # 저장이 끝난 해시 → 그 내용으로 등록된 출처
+        self._stored_hashes = {}
+        self._failed_hashes = set()
+        self._executor = None
+
+    # ------------------------------------------------------------------
+    # 계획
+    # ------------------------------------------------------------------
+
+    def _is_finished(self, entry: Optional[Dict], size: int, mtime_ns: int) -> bool:
+        """체크포인트에 끝난 것으로 기록돼 있고, 파일과 벡터 DB의 파일 목록이 그대로인지"""
+        if entry is None or entry['status'] not in FINISHED_STATUSES:
+            return False
+        if (entry['size'], entry['mtime_ns']) != (size, mtime_ns):
+            return False
+        # 서버에서 지운 파일이면 다시 저장
+        registered = self.rag_manager.documents.get(entry['registered_as'])
+        return registered is not None and registered['file_hash'] == entry['file_hash']
+
+    def plan(self, root: str, manifest: Optional[Dict[str, Dict]] = None, only_manifest: bool = False) -> Dict:
+        """
+        저장할 파일 목록 만들기
+
+        Args:
+            root: 자료 폴더
+            manifest: load_manifest 결과
+            only_manifest: True면 매니페스트에 없는 파일은 건너뜀
+
+        Returns:
+            {'files': 저장할 파일 리스트, 'finished': 체크포인트로 건너뛴 수, 'unlisted': 매니페스트에 없어 건너뛴 수}
+        """
+        files, finished, unlisted = [], 0, 0
+        for relpath in discover_files(root):
+            metadata = manifest_metadata(manifest or {}, relpath)
+            if metadata is None:
+                if only_manifest:
+                    unlisted += 1
+                    continue
+                metadata = {}
+
+            path = os.path.join(root, relpath)
+            stat = os.stat(path)
+            if self._is_finished(self.checkpoint.get(relpath), stat.st_size, stat.st_mtime_ns):
+                finished += 1
+                continue
+
+            files.append({
+                'relpath': relpath,
+                'path': path,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                # 폴더가 달라도 파일 이름이 같은 자료가 많아서 출처는 상대 경로 (매니페스트로 바꿀 수 있음)
+                'metadata': {'source': relpath, 'filename': os.path.basename(relpath), **metadata},
+                'pages': None,
+            })
+        return {'files': files, 'finished': finished, 'unlisted': unlisted}
+
+    # ------------------------------------------------------------------
+    # 추출 단계
+    # ------------------------------------------------------------------
+
+    def _put(self, item: Tuple) -> bool:
+        """임베딩 대기열에 넣기 (중단되면 False)"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _extract(self, file: Dict):
+        """
+        파일 하나를 읽어서 청크 묶음을 대기열에 넣고, 끝나면 종료 표시를 넣음
+
+        종료 표시: finish / duplicate (벡터 DB에 이미 있음) / waiting (이번 실행에서 먼저 읽은 파일과 같음) / failed
+        """
+        if self._stop.is_set():
+            return
+        try:
+            file_hash = hash_file(file['path'])
+            file['file_hash'] = file_hash
+            with self._lock:
+                first_source = self._hashes.setdefault(file_hash, file['metadata']['source'])
+            if first_source != file['metadata']['source']:
+                self._put(('waiting', file, file_hash, first_source))
+                return
+            # --restart 뒤에는 파일 자신이 등록돼 있을 수 있음 (그때는 다시 저장)
+            duplicate_of = self.rag_manager.find_duplicate_file(file_hash)
+            if duplicate_of is not None and duplicate_of != file['metadata']['source']:
+                self._put(('duplicate', file, file_hash, duplicate_of))
+                return
+
+            def progress(done: int, total: Optional[int]):
+                if total is not None:
+                    file['pages'] = total
+
+            doc_ids = set()
+            chunks = iter_document_chunks(file['path'], self.rag_manager.chunker, file['metadata'],
+                                          self.extract_processes, progress)
+            try:
+                for batch in batched(chunks, INGEST_CHUNK_BATCH):
+                    # 임베딩 단계에서 실패한 파일은 더 읽지 않음
+                    if file['relpath'] in self._failed:
+                        break
+                    texts, metadatas = zip(*batch)
+                    doc_ids.update(make_doc_id(text, metadata) for text, metadata in batch)
+                    if not self._put(('chunks', file, list(texts), list(metadatas))):
+                        return
+            finally:
+                chunks.close()
+            self._put(('finish', file, file_hash, doc_ids))
+        except Exception as e:
+            self._put(('failed', file, e, None))
+
+    # ------------------------------------------------------------------
+    # 임베딩 단계
+    # ------------------------------------------------------------------
+
+    def _next_items(self) -> List[Tuple]:
+        """대기열에서 write_batch_size 만큼 청크 묶음을 모음 (종료 표시에서 멈춤, 중단 요청을 받으면 빈 리스트)"""
+        while True:
+            try:
+                items = [self._queue.get(timeout=0.5)]
+                break
+            except queue.Empty:
+                if self._stop.is_set():
+                    return []
+        if items[0][0] != 'chunks':
+            return items
+
+        total = len(items[0][2])
+        while total < self.rag_manager.write_batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            if item[0] != 'chunks':
+                break
+            total += len(item[2])
+        return items
+
+    def _record(self, file: Dict, status: str, **data):
+        self.checkpoint.put(file['relpath'], file['size'], file['mtime_ns'], status, data)
+
+    def _fail(self, file: Dict, error: Exception, totals: Dict):
+        with self._lock:
+            if file['relpath'] in self._failed:
+                return
+            self._failed.add(file['relpath'])
+        totals['failed'] += 1
+        self._record(file, 'failed', error=str(error))
+        print(f"❌ 처리 실패: {file['relpath']} ({error})")
+        file_hash = file.get('file_hash')
+        with self._lock:
+            if file_hash is not None and self._hashes.get(file_hash) == file['metadata']['source']:
+                self._failed_hashes.add(file_hash)
+
+    def _record_duplicate(self, file: Dict, file_hash: str, registered_as: str, totals: Dict):
+        totals['duplicate'] += 1
+        self._record(file, 'duplicate', file_hash=file_hash, registered_as=registered_as)
+        print(f"⏭️  같은 내용의 파일이 이미 있어 건너뜀: {file['relpath']} (= {registered_as})")
+
+    def _wait_for_copy(self, file: Dict, file_hash: str, totals: Dict) -> int:
+        """
+        이번 실행에서 먼저 읽은 같은 내용의 파일이 있을 때: 이미 저장됐으면 중복으로 기록하고, 아니면 기다림
+
+        Returns:
+            끝난 파일 수 (중복으로 기록했으면 1, 기다리거나 대신 저장하면 0)
+        """
+        if file_hash in self._stored_hashes:
+            self._record_duplicate(file, file_hash, self._stored_hashes[file_hash], totals)
+            return 1
+        self._waiting.setdefault(file_hash, []).append(file)
+        self._retry_failed_copies()
+        return 0
+
+    def _release_copies(self, file_hash: str, registered_as: str, totals: Dict) -> int:
+        """
+        먼저 읽은 파일이 저장(또는 벡터 DB에 이미 있어 중복으로 기록)된 뒤 기다리던 같은 내용의 파일을 중복으로 기록
+
+        Args:
+            file_hash: 파일 내용 해시
+            registered_as: 그 내용으로 등록된 출처
+
+        Returns:
+            끝난 파일 수
+        """
+        self._stored_hashes[file_hash] = registered_as
+        copies = self._waiting.pop(file_hash, [])
+        for copy in copies:
+            self._record_duplicate(copy, file_hash, registered_as, totals)
+        return len(copies)
+
+    def _retry_failed_copies(self):
+        """먼저 읽은 파일이 실패했으면 기다리던 같은 내용의 파일 하나를 대신 저장 (나머지는 그 파일을 기다림)"""
+        with self._lock:
+            retry = [file_hash for file_hash in self._failed_hashes if self._waiting.get(file_hash)]
+            for file_hash in retry:
+                self._failed_hashes.discard(file_hash)
+                file = self._waiting[file_hash].pop(0)
+                self._hashes[file_hash] = file['metadata']['source']
+                print(f"🔁 같은 내용의 파일이 실패해서 대신 저장: {file['relpath']}")
+                self._executor.submit(self._extract, file)
+
+    def stop(self):
+        """
+        중단 요청 (시그널 핸들러에서 호출)
+
+        저장 도중에 KeyboardInterrupt 가 나면 ChromaDB가 예외를 삼키고 일부 청크를 빠뜨릴 수 있어서,
+        바로 멈추지 않고 지금 저장 중인 묶음까지 끝낸 뒤 멈춰요.
+        """
+        if not self._stop.is_set():
+            print("\n⏸  멈추는 중: 지금 저장 중인 묶음까지 끝내고 멈춰요...")
+        self._stop.set()
+
+    def run(self, files: List[Dict]) -> Dict:
+        """
+        파일들을 벡터 DB에 저장 (stop() 으로 멈추면 끝난 파일까지만 체크포인트에 남음)
+
+        Returns:
+            처리량 통계 (build_corpus.main 이 출력)
+        """
+        totals = {
+            'files': len(files), 'done': 0, 'duplicate': 0, 'failed': 0,
+            'bytes': 0, 'pages': 0, 'chunks': 0,
+            'embedded': 0, 'reused': 0, 'skipped': 0, 'deleted': 0,
+            'embed_seconds': 0.0, 'interrupted': False,
+        }
+        counts = {}
+        started = time.perf_counter()
+        last_progress = started
+        pending = len(files)
+
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="corpus-extract")
+        self._executor = executor
+        for file in files:
+            executor.submit(self._extract, file)
+
+        try:
+            while pending and not self._stop.is_set():
+                items = self._next_items()
+                chunks = [item for item in items if item[0] == 'chunks' and item[1]['relpath'] not in self._failed]
+                if chunks:
+                    texts = [text for item in chunks for text in item[2]]
+                    metadatas = [metadata for item in chunks for metadata in item[3]]
+                    embed_started = time.perf_counter()
+                    try:
+                        self.rag_manager.add_texts(texts, metadatas, report=counts)
+                        totals['chunks'] += len(texts)
+                    except Exception as e:
+                        for item in chunks:
+                            self._fail(item[1], e, totals)
+                    totals['embed_seconds'] += time.perf_counter() - embed_started
+
+                for kind, file, value, extra in (item for item in items if item[0] != 'chunks'):
+                    if kind == 'waiting':
+                        pending -= self._wait_for_copy(file, value, totals)
+                        continue
+                    pending -= 1
+                    if kind == 'failed':
+                        self._fail(file, value, totals)
+                    elif kind == 'duplicate':
+                        self._record_duplicate(file, value, extra, totals)
+                        pending -= self._release_copies(value, extra, totals)
+                    elif file['relpath'] not in self._failed:
+                        self._finish(file, value, extra, totals)
+                        if file['relpath'] not in self._failed:
+                            pending -= self._release_copies(value, file['metadata']['source'], totals)
+                # 먼저 읽은 파일이 실패했으면(추출/저장/마무리) 기다리던 같은 내용의 파일로 다시 시도
+                self._retry_failed_copies()
+
+                if self.progress_interval and time.perf_counter() - last_progress >= self.progress_interval:
+                    last_progress = time.perf_counter()
+                    self._print_progress(totals, len(files) - pending, last_progress - started)
+        finally:
+            # PDF 추출 작업을 먼저 취소해야 추출 스레드가 남은 페이지를 기다리지 않고 끝남
+            self._stop.set()
+            shutdown_extract_pool()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        if pending:
+            totals['interrupted'] = True
+            print(f"⏸  중단됨: 끝난 파일까지 체크포인트에 저장했어요 (남은 파일 {pending}개). 다시 실행하면 이어서 처리해요.")
+
+        totals.update({key: totals[key] + counts.get(key, 0) for key in ('embedded', 'reused', 'skipped')})
+        totals['seconds'] = time.perf_counter() - started
+        return totals
+
+    def _finish(self, file: Dict, file_hash: str, doc_ids: set, totals: Dict):
+        """파일의 모든 청크를 저장한 뒤 마무리 (이전 버전 청크 삭제 + 파일 목록 + 체크포인트 기록)"""
+        source = file['metadata']['source']
+        try:
+            deleted = self.rag_manager.finalize_document(source, file_hash, doc_ids)
+        except Exception as e:
+            self._fail(file, e, totals)
+            return
+        totals['done'] += 1
+        totals['bytes'] += file['size']
+        totals['pages'] += file['pages'] or 0
+        totals['deleted'] += deleted
+        self._record(file, 'done', file_hash=file_hash, registered_as=source, chunks=len(doc_ids),
+                     pages=file['pages'], deleted=deleted)
+
+    @staticmethod
+    def _print_progress(totals: Dict, finished: int, elapsed: float):
+        print(f"📦 {finished}/{totals['files']}개 파일 | 청크 {totals['chunks']:,}개 | "
+              f"{totals['bytes'] / 1e6 / elapsed:.1f} MB/s | {totals['chunks'] / elapsed:.0f} 청크/s")
+
+
+def throughput(totals: Dict) -> Dict:
+    """통계에 초당 처리량 추가"""
+    seconds = max(totals['seconds'], 1e-9)
+    return {
+        **totals,
+        'seconds': round(seconds, 2),
+        'embed_seconds': round(totals['embed_seconds'], 2),
+        'files_per_sec': round((totals['done'] + totals['duplicate']) / seconds, 2),
+        'mb_per_sec': round(totals['bytes'] / 1e6 / seconds, 2),
+        'pages_per_sec': round(totals['pages'] / seconds, 1),
+        'chunks_per_sec': round(totals['chunks'] / seconds, 1),
+        # 임베딩+저장이 전체 시간에서 차지하는 비율 (1에 가까우면 임베딩이 병목, 낮으면 추출이 병목)
+        'embed_share': round(totals['embed_seconds'] / seconds, 2),
+    }
+
+
+def print_summary(stats: Dict):
+    print("=" * 60)
+    print("📊 대량 구축 결과")
+    print("=" * 60)
+    print(f"  파일: 저장 {stats['done']} / 중복 {stats['duplicate']} / 실패 {stats['failed']} "
+          f"/ 체크포인트로 건너뜀 {stats['finished']} / 매니페스트에 없음 {stats['unlisted']}")
+    print(f"  청크: {stats['chunks']:,}개 (새로 임베딩 {stats['embedded']:,} / 임베딩 재사용 {stats['reused']:,} "
+          f"/ 이미 저장됨 {stats['skipped']:,}), 이전 버전 청크 삭제 {stats['deleted']:,}")
+    print(f"  시간: {stats['seconds']}초 (임베딩+저장 {stats['embed_seconds']}초, {stats['embed_share']:.0%})")
+    print(f"  처리량: {stats['files_per_sec']} 파일/s, {stats['mb_per_sec']} MB/s, "
+          f"{stats['pages_per_sec']} 페이지/s, {stats['chunks_per_sec']} 청크/s")
+    print(f"  벡터 DB 문서 수: {stats['documents']:,}")
+    print("=" * 60)
+
+
+def main():
+    from rag_manager import RAGManager
+
+    parser = argparse.ArgumentParser(description="학습 자료 폴더를 벡터 DB로 대량 구축 (중단 후 이어서 실행 가능)")
+    parser.add_argument("root", help="PDF / DOCX / TXT 자료 폴더")
+    parser.add_argument("--manifest", help="메타데이터 매니페스트 (CSV / JSON / JSONL)")
+    parser.add_argument("--only-manifest", action="store_true", help="매니페스트에 없는 파일은 건너뜀")
+    parser.add_argument("--db", default="./chroma_db", help="벡터 DB 폴더 (서버와 같은 경로)")
+    parser.add_argument("--checkpoint", help=f"체크포인트 파일 (기본값: 벡터 DB 폴더의 {CHECKPOINT_FILE})")
+    parser.add_argument("--restart", action="store_true", help="체크포인트를 지우고 모든 파일을 다시 확인")
+    parser.add_argument("--workers", type=int, default=BUILD_WORKERS, help="동시에 읽는 파일 수")
+    parser.add_argument("--extract-processes", type=int, default=EXTRACT_PROCESSES, help="PDF 페이지 추출 프로세스 수")
+    parser.add_argument("--encode-batch-size", type=int, default=64)
+    parser.add_argument("--write-batch-size", type=int, default=2048)
+    parser.add_argument("--no-index", action="store_true", help="끝난 뒤 키워드/압축 벡터 색인을 미리 만들지 않음")
+    parser.add_argument("--json", help="통계를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        parser.error(f"자료 폴더가 없습니다: {args.root}")
+    manifest = load_manifest(args.manifest) if args.manifest else {}
+
+    rag_manager = RAGManager(
+        persist_directory=args.db,
+        encode_batch_size=args.encode_batch_size,
+        write_batch_size=args.write_batch_size,
+        encode_batch_window_ms=0
+    )
+    print("⏳ 임베딩 모델/벡터 DB 로딩 중...")
+    rag_manager.embedding_model
+    rag_manager.collection
+
+    checkpoint = BuildCheckpoint(args.checkpoint or os.path.join(args.db, CHECKPOINT_FILE))
+    if args.restart:
+        checkpoint.clear()
+
+    builder = CorpusBuilder(rag_manager, checkpoint, workers=args.workers, extract_processes=args.extract_processes)
+    signal.signal(signal.SIGINT, lambda signum, frame: builder.stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: builder.stop())
+    plan = builder.plan(args.root, manifest, args.only_manifest)
+    print(f"📂 저장할 파일 {len(plan['files'])}개 "
+          f"(체크포인트로 건너뜀 {plan['finished']}개, 매니페스트에 없음 {plan['unlisted']}개)")
+
+    totals = builder.run(plan['files'])
+    checkpoint.close()
+
+    # 서버가 처음 검색할 때 색인을 재구축하지 않도록 미리 만들어 둠
+    if not args.no_index and not totals['interrupted']:
+        print("🔤 검색 색인 준비 중...")
+        rag_manager.keyword_index
+        if rag_manager.vector_index_mode != 'chroma':
+            rag_manager.vector_index
+
+    stats = throughput({
+        **totals,
+        'finished': plan['finished'],
+        'unlisted': plan['unlisted'],
+        'documents': rag_manager.count_documents(),
+    })
+    print_summary(stats)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
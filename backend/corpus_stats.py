@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+# 통계를 나누는 메타데이터 키 (통계 이름 → 메타데이터 키)
+STATS_FIELDS = {
+    'subjects': 'subject',
+    'grades': 'grade',
+    'topics': 'topic',
+    'sources': 'source',
+}
+
+# 메타데이터 값이 없을 때 사용하는 이름
+UNCLASSIFIED = '미분류'
+
+STATS_FILE = "corpus_stats.json"
+
+
+class CorpusStats:
+    """
+    문서(청크) 통계 카운터
+
+    문서를 추가/삭제할 때마다 과목/학년/주제/출처별 개수를 바로 갱신해서
+    통계 조회에 컬렉션 전체를 읽지 않아요. 벡터 DB 옆에 JSON 파일로 저장해요.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: 통계 저장 파일 경로 (None이면 메모리에만 유지)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # 추출/임베딩 스레드와 요청 스레드가 함께 저장하므로 저장은 한 번에 하나씩 (같은 임시 파일을 함께 쓰지 않게)
+        self._save_lock = threading.Lock()
+        self.total = 0
+        self.counts = {name: {} for name in STATS_FIELDS}
+        self.updated_at = None
+
+    def _apply(self, metadatas: Iterable[Dict], sign: int):
+        for metadata in metadatas:
+            metadata = metadata or {}
+            self.total += sign
+            for name, key in STATS_FIELDS.items():
+                value = str(metadata.get(key) or UNCLASSIFIED)
+                counter = self.counts[name]
+                count = counter.get(value, 0) + sign
+                if count > 0:
+                    counter[value] = count
+                else:
+                    counter.pop(value, None)
+        self.total = max(self.total, 0)
+        self.updated_at = datetime.now().isoformat()
+
+    def add(self, metadatas: Iterable[Dict]):
+        """추가된 문서들의 메타데이터 반영"""
+        with self._lock:
+            self._apply(metadatas, 1)
+
+    def remove(self, metadatas: Iterable[Dict]):
+        """삭제된 문서들의 메타데이터 반영"""
+        with self._lock:
+            self._apply(metadatas, -1)
+
+    def clear(self):
+        """모든 카운터 초기화"""
+        with self._lock:
+            self.total = 0
+            self.counts = {name: {} for name in STATS_FIELDS}
+            self.updated_at = datetime.now().isoformat()
+
+    def reset(self, metadatas: Iterable[Dict]):
+        """카운터를 비우고 주어진 메타데이터로 다시 계산 (재구축용)"""
+        with self._lock:
+            self.total = 0
+            self.counts = {name: {} for name in STATS_FIELDS}
+            self._apply(metadatas, 1)
+
+    def summary(self) -> Dict:
+        """총 문서 수 + 과목별 개수 (/health 용)"""
+        with self._lock:
+            return {
+                'total_documents': self.total,
+                'subjects': dict(self.counts['subjects']),
+            }
+
+    def snapshot(self) -> Dict:
+        """과목/학년/주제/출처별 전체 통계 (/documents 용)"""
+        with self._lock:
+            stats = {'total_documents': self.total}
+            stats.update({name: dict(counter) for name, counter in self.counts.items()})
+            stats['updated_at'] = self.updated_at
+            return stats
+
+    def save(self):
+        """통계 파일 저장 (임시 파일에 쓰고 교체해서 중간에 깨지지 않게)"""
+        if not self.path:
+            return
+
+        # 저장 잠금 안에서 스냅샷을 떠야 나중에 저장한 쪽이 항상 최신 내용을 남김
+        with self._save_lock:
+            data = self.snapshot()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def load(self) -> bool:
+        """
+        통계 파일 불러오기
+
+        Returns:
+            불러왔으면 True, 파일이 없거나 깨졌으면 False
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  문서 통계 파일을 읽지 못했습니다: {e}")
+            return False
+
+        with self._lock:
+            self.total = int(data.get('total_documents', 0))
+            self.counts = {name: dict(data.get(name) or {}) for name in STATS_FIELDS}
+            self.updated_at = data.get('updated_at')
+        return True
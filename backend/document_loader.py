@@ -0,0 +1,302 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+import pypdf
+
+import pdf_extract
+from pdf_extract import extract_pdf_pages
+
+# 기본 설정 (환경 변수로 변경 가능)
+# - EXTRACT_PROCESSES: PDF 페이지 추출에 쓰는 프로세스 수 (1 이하면 현재 프로세스에서 순서대로 추출)
+EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+# 프로세스 하나에 한 번에 맡기는 PDF 페이지 수
+PAGES_PER_TASK = 8
+
+# Word/TXT 문서를 청크로 나누기 전에 묶는 최대 글자 수 (문서 전체를 한 문자열로 만들지 않음)
+TEXT_BLOCK_CHARS = 20000
+
+# Word 문서 XML 태그
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+WORD_PARAGRAPH = WORD_NAMESPACE + "p"
+WORD_TABLE = WORD_NAMESPACE + "tbl"
+WORD_RUN = WORD_NAMESPACE + "r"
+WORD_TEXT = WORD_NAMESPACE + "t"
+WORD_TAB = WORD_NAMESPACE + "tab"
+WORD_BREAKS = (WORD_NAMESPACE + "br", WORD_NAMESPACE + "cr")
+
+# PDF 추출 프로세스 이름 (is_extract_worker 가 이 이름으로 추출 프로세스를 구분)
+EXTRACT_PROCESS_NAME = "pdf-extract"
+
+_pool = None
+_pool_processes = 0
+_pool_lock = threading.Lock()
+
+
+def count_pdf_pages(pdf_path: str, processes: int = 1) -> int:
+    """
+    PDF 페이지 수
+
+    프로세스 풀을 쓰면 추출 프로세스에서 세서, 현재 프로세스는 PDF를 파싱하지 않아요.
+    """
+    pool = get_extract_pool(processes)
+    if pool is not None:
+        return pool.submit(pdf_extract.count_pdf_pages, pdf_path).result()
+    return len(pypdf.PdfReader(pdf_path).pages)
+
+
+def get_extract_pool(processes: int = EXTRACT_PROCESSES) -> Optional[ProcessPoolExecutor]:
+    """
+    PDF 추출용 프로세스 풀 (처음 필요할 때 만들고 여러 업로드가 함께 사용)
+
+    Returns:
+        프로세스 풀, processes가 1 이하면 None
+    """
+    global _pool, _pool_processes
+    if processes <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_processes != processes:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # 서버는 여러 스레드가 도는 중이라 fork 하면 자식이 잠긴 lock을 물려받아 멈출 수 있으므로
+            # forkserver(없으면 spawn) 사용. forkserver 는 pdf_extract 만 미리 import 해 두고 거기서 자식을 만들어요.
+            # 자식은 메인 모듈도 다시 import 하므로, 서버 모듈은 is_extract_worker()로 시작 작업을 건너뛰어요.
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = _extract_context('forkserver')
+                context.set_forkserver_preload(['pdf_extract'])
+            else:
+                context = _extract_context('spawn')
+            _pool = ProcessPoolExecutor(max_workers=processes, mp_context=context)
+            _pool_processes = processes
+        return _pool
+
+
+def _extract_context(method: str) -> multiprocessing.context.BaseContext:
+    """
+    추출 프로세스에 EXTRACT_PROCESS_NAME 이름을 붙이는 multiprocessing context
+
+    프로세스 이름은 자식이 메인 모듈을 다시 import 하기 전에 정해지므로(initializer 는 import 뒤에 실행),
+    import 중에 실행되는 시작 작업도 is_extract_worker()로 건너뛸 수 있어요.
+    """
+    class ExtractContext(type(multiprocessing.get_context(method))):
+        def Process(self, *args, **kwargs):
+            process = super().Process(*args, **kwargs)
+            process.name = f"{EXTRACT_PROCESS_NAME}-{process.name}"
+            return process
+
+    return ExtractContext()
+
+
+def is_extract_worker() -> bool:
+    """
+    현재 프로세스가 PDF 추출 프로세스인지
+
+    forkserver/spawn 으로 만든 자식은 메인 모듈(server.py 등)을 다시 import 하므로,
+    모델 로드나 작업 대기열 시작 같은 시작 작업은 이 값이 False일 때만 해요.
+    hypercorn 워커처럼 다른 이유로 만든 자식 프로세스는 추출 프로세스가 아니에요.
+    """
+    return multiprocessing.current_process().name.startswith(EXTRACT_PROCESS_NAME)
+
+
+def shutdown_extract_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def iter_pdf_pages(
+    pdf_path: str,
+    processes: int = EXTRACT_PROCESSES,
+    pages_per_task: int = PAGES_PER_TASK,
+    total_pages: Optional[int] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    PDF 페이지 텍스트를 페이지 순서대로 하나씩 생성
+
+    페이지 범위를 여러 프로세스에 나눠 맡기되, 동시에 맡기는 범위는 프로세스 수의 2배까지만 둬서
+    아주 큰 교과서도 메모리에 올라가는 페이지 수가 일정해요.
+
+    Args:
+        pdf_path: PDF 파일 경로
+        processes: 추출 프로세스 수 (1 이하면 현재 프로세스에서 추출)
+        pages_per_task: 프로세스 하나에 한 번에 맡기는 페이지 수
+        total_pages: 전체 페이지 수 (이미 알고 있으면 다시 세지 않음)
+
+    Yields:
+        (페이지 번호(1부터), 텍스트)
+    """
+    if total_pages is None:
+        total_pages = count_pdf_pages(pdf_path, processes)
+
+    pool = get_extract_pool(processes) if total_pages > pages_per_task else None
+    if pool is None:
+        pages = pypdf.PdfReader(pdf_path).pages
+        for page_num in range(total_pages):
+            yield page_num + 1, pages[page_num].extract_text() or ""
+        return
+
+    ranges = ((start, min(start + pages_per_task, total_pages)) for start in range(0, total_pages, pages_per_task))
+    pending = deque(pool.submit(extract_pdf_pages, pdf_path, *page_range)
+                    for page_range in islice(ranges, processes * 2))
+    try:
+        while pending:
+            pages = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append(pool.submit(extract_pdf_pages, pdf_path, *next_range))
+            yield from pages
+    finally:
+        # 중간에 멈추면(작업 실패 등) 아직 시작하지 않은 범위는 취소
+        for future in pending:
+            future.cancel()
+
+
+def iter_docx_paragraphs(docx_path: str) -> Iterator[str]:
+    """
+    Word 문서 본문 문단을 순서대로 하나씩 생성
+
+    document.xml 을 iterparse 로 읽으면서 처리한 문단은 바로 버려서 문서 전체를 메모리에 올리지 않아요.
+    python-docx 의 Document.paragraphs 처럼 표 안의 문단은 건너뛰어요.
+    w:tab 은 문단 속성(w:pPr/w:tabs)의 탭 위치 정의에도 쓰이므로, 글(w:r) 안에 있는 것만 탭 문자로 바꿔요.
+    """
+    with zipfile.ZipFile(docx_path) as archive, archive.open("word/document.xml") as xml:
+        table_depth = 0
+        run_depth = 0
+        parts = []
+        for event, element in ElementTree.iterparse(xml, events=("start", "end")):
+            if element.tag == WORD_TABLE:
+                table_depth += 1 if event == "start" else -1
+                if event == "end":
+                    element.clear()
+                continue
+            if element.tag == WORD_RUN:
+                run_depth += 1 if event == "start" else -1
+            if event != "end" or table_depth:
+                continue
+
+            if element.tag == WORD_TEXT:
+                parts.append(element.text or "")
+            elif element.tag == WORD_TAB:
+                if run_depth:
+                    parts.append("\t")
+            elif element.tag in WORD_BREAKS:
+                parts.append("\n")
+            elif element.tag == WORD_PARAGRAPH:
+                yield "".join(parts)
+                parts = []
+                element.clear()
+
+
+def iter_txt_lines(txt_path: str) -> Iterator[str]:
+    """텍스트 파일을 줄 단위로 생성 (줄바꿈 제외)"""
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def iter_text_blocks(lines: Iterable[str], max_chars: int = TEXT_BLOCK_CHARS) -> Iterator[Tuple[int, str]]:
+    """
+    문단(줄)을 max_chars 안쪽으로 묶어서 생성
+
+    묶음들을 "\\n" 으로 이으면 문단 전체를 "\\n".join 한 것과 같은 문자열이 돼요.
+
+    Yields:
+        (전체 문서에서 묶음이 시작하는 글자 위치, 묶음 텍스트)
+    """
+    offset = 0
+    block = []
+    block_chars = 0
+    for line in lines:
+        if block and block_chars + len(line) > max_chars:
+            text = "\n".join(block)
+            yield offset, text
+            offset += len(text) + 1
+            block = []
+            block_chars = 0
+        block.append(line)
+        block_chars += len(line) + 1
+    if block:
+        yield offset, "\n".join(block)
+
+
+def iter_document_chunks(
+    path: str,
+    chunker,
+    metadata: Optional[Dict] = None,
+    processes: int = EXTRACT_PROCESSES,
+    progress: Optional[Callable[[int, Optional[int]], None]] = None,
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    파일 형식에 맞게 (청크 텍스트, 메타데이터)를 하나씩 생성
+
+    Args:
+        path: PDF / DOCX / TXT 파일 경로
+        chunker: TextChunker
+        metadata: 모든 청크에 공통으로 붙일 메타데이터
+        processes: PDF 추출 프로세스 수
+        progress: (처리한 페이지/묶음 수, 전체 페이지 수 또는 None) 를 받는 함수
+
+    Yields:
+        (청크 텍스트, 메타데이터)
+    """
+    metadata = metadata or {}
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.pdf':
+        total_pages = count_pdf_pages(path, processes)
+        page_metadata = {**metadata, "total_pages": total_pages}
+        for page_num, text in iter_pdf_pages(path, processes, total_pages=total_pages):
+            if text.strip():
+                yield from chunker.chunk(text, page_metadata, page=page_num)
+            if progress:
+                progress(page_num, total_pages)
+        return
+
+    if extension == '.docx':
+        lines = iter_docx_paragraphs(path)
+    elif extension == '.txt':
+        lines = iter_txt_lines(path)
+    else:
+        raise ValueError(f"지원하지 않는 파일 형식입니다: {os.path.basename(path)}")
+
+    # 묶음마다 나눈 청크의 번호/글자 위치를 문서 전체 기준으로 보정
+    chunk_index = 0
+    for blocks_done, (offset, block) in enumerate(iter_text_blocks(lines), start=1):
+        for chunk_text, chunk_metadata in chunker.chunk(block, metadata):
+            chunk_metadata["chunk_index"] = chunk_index
+            chunk_metadata["char_start"] += offset
+            chunk_metadata["char_end"] += offset
+            chunk_index += 1
+            yield chunk_text, chunk_metadata
+        if progress:
+            progress(blocks_done, None)
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """파일 내용 해시 (sha256, 큰 파일도 조각씩 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """size 개씩 묶어서 생성 (마지막 묶음은 더 작을 수 있음)"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+DOCUMENTS_FILE = "documents.json"
+
+
+class DocumentRegistry:
+    """
+    업로드된 파일 목록 (출처 → 파일 내용 해시)
+
+    파일을 끝까지 저장한 뒤에만 기록해서, 같은 파일을 다시 올리면 추출/임베딩 없이 건너뛰고
+    수정본을 올리면 이전 버전을 교체하는 기준으로 써요. 벡터 DB 옆에 JSON 파일로 저장해요.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: 목록 저장 파일 경로 (None이면 메모리에만 유지)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # 추출/임베딩 스레드와 요청 스레드가 함께 저장하므로 저장은 한 번에 하나씩 (같은 임시 파일을 함께 쓰지 않게)
+        self._save_lock = threading.Lock()
+        self._documents = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def get(self, source: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._documents.get(source)
+            return dict(entry) if entry else None
+
+    def find_by_hash(self, file_hash: str) -> Optional[str]:
+        """같은 내용의 파일이 저장된 출처 (없으면 None)"""
+        with self._lock:
+            for source, entry in self._documents.items():
+                if entry['file_hash'] == file_hash:
+                    return source
+        return None
+
+    def record(self, source: str, file_hash: str, chunks: int):
+        """파일 저장 완료 기록 (같은 출처는 새 버전으로 교체)"""
+        with self._lock:
+            self._documents[source] = {
+                'file_hash': file_hash,
+                'chunks': chunks,
+                'updated_at': datetime.now().isoformat(),
+            }
+
+    def remove(self, sources: Iterable[str]):
+        with self._lock:
+            for source in sources:
+                self._documents.pop(source, None)
+
+    def clear(self):
+        with self._lock:
+            self._documents = {}
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {source: dict(entry) for source, entry in self._documents.items()}
+
+    def save(self):
+        """목록 파일 저장 (임시 파일에 쓰고 교체)"""
+        if not self.path:
+            return
+
+        # 저장 잠금 안에서 스냅샷을 떠야 나중에 저장한 쪽이 항상 최신 내용을 남김
+        with self._save_lock:
+            data = self.snapshot()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def load(self) -> bool:
+        """
+        목록 파일 불러오기
+
+        Returns:
+            불러왔으면 True, 파일이 없거나 깨졌으면 False
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  문서 목록 파일을 읽지 못했습니다: {e}")
+            return False
+
+        with self._lock:
+            self._documents = dict(data)
+        return True
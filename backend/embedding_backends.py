@@ -0,0 +1,272 @@
+import os
+from typing import List, Union
+
+import numpy as np
+
+# 기본 임베딩 모델 (한국어 지원)
+EMBEDDING_MODEL_NAME = 'jhgan/ko-sroberta-multitask'
+
+# ko-sroberta 최대 입력 길이 (특수 토큰 포함, 넘으면 잘라냄)
+EMBEDDING_MAX_SEQ_LENGTH = 128
+
+# 기본 설정 (환경 변수로 변경 가능)
+# - EMBEDDING_BACKEND: torch(기본, sentence-transformers fp32) / onnx (ONNX Runtime fp32) / onnx-int8 (가중치 int8 양자화)
+# - EMBEDDING_THREADS: 임베딩 계산에 쓰는 CPU 스레드 수 (0이면 라이브러리 기본값)
+# - ONNX_MODEL_DIR: 변환한 ONNX 모델 저장 폴더 (없으면 처음 로드할 때 변환)
+EMBEDDING_BACKENDS = ('torch', 'onnx', 'onnx-int8')
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./onnx_models")
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+def onnx_model_dir(model_name: str = EMBEDDING_MODEL_NAME, root: str = ONNX_MODEL_DIR) -> str:
+    """모델별 ONNX 저장 폴더 (jhgan/ko-sroberta-multitask → <root>/jhgan__ko-sroberta-multitask)"""
+    return os.path.join(root, model_name.replace('/', '__'))
+
+
+def export_onnx_model(
+    model_name: str = EMBEDDING_MODEL_NAME,
+    output_dir: str = None,
+    quantize: bool = False
+) -> str:
+    """
+    Hugging Face 모델을 ONNX로 변환 (torch, transformers 필요 — sentence-transformers 설치 시 함께 설치됨)
+
+    변환은 한 번만 하면 되고, 이후에는 torch 없이 ONNX Runtime만으로 임베딩을 계산해요.
+
+    Args:
+        model_name: Hugging Face 모델 이름
+        output_dir: 저장 폴더 (None이면 onnx_model_dir(model_name))
+        quantize: int8 동적 양자화 모델도 함께 만들지 여부 (onnx 패키지 필요)
+
+    Returns:
+        사용할 ONNX 모델 파일 경로
+    """
+    output_dir = output_dir or onnx_model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+
+    if not os.path.exists(model_path):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name).eval()
+
+        class LastHiddenState(torch.nn.Module):
+            """풀링 전 토큰 임베딩만 출력 (평균 풀링은 encode에서 numpy로 계산)"""
+
+            def __init__(self, encoder):
+                super().__init__()
+                self.encoder = encoder
+
+            def forward(self, *inputs):
+                return self.encoder(*inputs, return_dict=False)[0]
+
+        sample = tokenizer(["임베딩 모델 변환"], return_tensors='pt')
+        input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names + ['last_hidden_state']}
+
+        tmp_path = f"{model_path}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                LastHiddenState(model),
+                tuple(sample[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=['last_hidden_state'],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        tokenizer.save_pretrained(output_dir)
+        os.replace(tmp_path, model_path)
+
+    if not quantize:
+        return model_path
+
+    int8_path = os.path.join(output_dir, ONNX_INT8_MODEL_FILE)
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        tmp_path = f"{int8_path}.tmp"
+        quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+    return int8_path
+
+
+class TorchEmbeddingBackend:
+    """sentence-transformers (PyTorch fp32) 임베딩"""
+
+    name = 'torch'
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, threads: int = EMBEDDING_THREADS):
+        """
+        Args:
+            model_name: sentence-transformers 모델 이름
+            threads: torch 연산 스레드 수 (0이면 기본값)
+        """
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.threads = threads
+
+    @property
+    def tokenizer(self):
+        return getattr(self.model, 'tokenizer', None)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        return self.model.encode(sentences, batch_size=batch_size, show_progress_bar=show_progress_bar, **kwargs)
+
+
+class _TokenCounter:
+    """RAGManager._count_tokens 가 쓰는 tokenizer.tokenize 와 같은 모양 (잘라내지 않음, 특수 토큰 제외)"""
+
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+
+    def tokenize(self, text: str) -> List[str]:
+        return self._tokenizer.encode(text, add_special_tokens=False).tokens
+
+
+class OnnxEmbeddingBackend:
+    """
+    ONNX Runtime 임베딩 (fp32 또는 int8 양자화)
+
+    sentence-transformers 와 같은 방식(특수 토큰 포함 128 토큰에서 자르고 평균 풀링)으로 계산해서
+    torch 백엔드와 같은 벡터 공간을 써요. onnxruntime / tokenizers 는 chromadb 의존성으로 이미 설치돼 있어요.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool = False,
+        threads: int = EMBEDDING_THREADS,
+        max_seq_length: int = EMBEDDING_MAX_SEQ_LENGTH
+    ):
+        """
+        Args:
+            model_dir: export_onnx_model 로 만든 폴더 (ONNX 모델 + tokenizer.json)
+            quantized: int8 양자화 모델 사용 여부
+            threads: ONNX Runtime 연산 스레드 수 (0이면 기본값)
+            max_seq_length: 최대 입력 토큰 수
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.name = 'onnx-int8' if quantized else 'onnx'
+        self.threads = threads
+        self.max_seq_length = max_seq_length
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=['CPUExecutionProvider']
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        dimension = self.session.get_outputs()[0].shape[-1]
+        self.dimension = dimension if isinstance(dimension, int) else None
+
+        tokenizer_path = os.path.join(model_dir, TOKENIZER_FILE)
+        self._encoder = Tokenizer.from_file(tokenizer_path)
+        self._encoder.enable_truncation(max_length=max_seq_length)
+        pad_id, pad_token = self._padding_token(self._encoder)
+        self._encoder.enable_padding(pad_id=pad_id, pad_token=pad_token)
+
+        # 청크 토큰 수 계산용 (잘라내지 않는 토크나이저)
+        self.tokenizer = _TokenCounter(Tokenizer.from_file(tokenizer_path))
+
+    @staticmethod
+    def _padding_token(tokenizer):
+        for token in ('[PAD]', '<pad>'):
+            token_id = tokenizer.token_to_id(token)
+            if token_id is not None:
+                return token_id, token
+        return 0, '[PAD]'
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self._encoder.encode_batch(texts)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {
+            'input_ids': np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            'attention_mask': attention_mask,
+            'token_type_ids': np.array([encoding.type_ids for encoding in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {name: value for name, value in feeds.items() if name in self._input_names})[0]
+
+        # 평균 풀링 (패딩 토큰 제외)
+        mask = attention_mask[..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """
+        문장 임베딩 (SentenceTransformer.encode 와 같은 모양)
+
+        Returns:
+            문장 하나면 (차원,), 리스트면 (문장 수, 차원) float32 배열
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+
+        # 길이가 비슷한 문장끼리 묶어서 패딩 계산을 줄임 (sentence-transformers 와 같은 방식)
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        embeddings = None
+        for start in range(0, len(texts), batch_size):
+            indices = order[start:start + batch_size]
+            batch = self._encode_batch([texts[index] for index in indices])
+            if embeddings is None:
+                embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            embeddings[indices] = batch
+
+        if kwargs.get('normalize_embeddings'):
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+def create_embedding_backend(
+    backend: str = EMBEDDING_BACKEND,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    threads: int = EMBEDDING_THREADS,
+    model_root: str = ONNX_MODEL_DIR
+):
+    """
+    환경 설정에 맞는 임베딩 백엔드 생성
+
+    onnx / onnx-int8 은 변환한 모델이 없으면 처음 한 번 변환해서 model_root 에 저장해요.
+
+    Args:
+        backend: torch / onnx / onnx-int8
+        model_name: 임베딩 모델 이름
+        threads: 연산 스레드 수 (0이면 기본값)
+        model_root: ONNX 모델 저장 폴더
+
+    Returns:
+        encode(sentences, batch_size, show_progress_bar) 와 tokenizer 를 가진 백엔드
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"지원하지 않는 임베딩 백엔드입니다: {backend}")
+
+    if backend == 'torch':
+        return TorchEmbeddingBackend(model_name, threads)
+
+    quantized = backend == 'onnx-int8'
+    model_dir = onnx_model_dir(model_name, model_root)
+    model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+    if not os.path.exists(os.path.join(model_dir, model_file)):
+        print(f"🔧 {model_name} 모델을 ONNX({backend})로 변환하는 중...")
+        export_onnx_model(model_name, model_dir, quantize=quantized)
+    return OnnxEmbeddingBackend(model_dir, quantized, threads)
@@ -0,0 +1,156 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# 기본 설정 (환경 변수로 변경 가능)
+# - ENCODE_BATCH_WINDOW_MS: 첫 질문이 들어온 뒤 다른 질문을 기다리는 시간(ms), 0이면 묶지 않고 바로 임베딩
+# - ENCODE_BATCH_MAX_SIZE: 한 번에 임베딩하는 최대 질문 수 (다 차면 기다리지 않고 바로 실행)
+ENCODE_BATCH_WINDOW_MS = float(os.getenv("ENCODE_BATCH_WINDOW_MS", "2"))
+ENCODE_BATCH_MAX_SIZE = int(os.getenv("ENCODE_BATCH_MAX_SIZE", "32"))
+
+# 백그라운드 스레드 종료 신호
+_STOP = object()
+
+
+class EncodeBatcher:
+    """
+    질문 임베딩 마이크로 배치 스케줄러
+
+    여러 요청 스레드가 각자 문장 하나씩 모델을 호출하면 배치 크기 1 연산이 반복되고,
+    스레드끼리 모델 내부 연산 스레드를 두고 다퉈요.
+    요청 스레드는 질문을 큐에 넣고 Future 를 기다리기만 하고, 백그라운드 스레드 하나가
+    짧은 시간(window) 동안 모인 질문을 한 번에 임베딩해서 각 Future 에 결과를 넣어요.
+
+    모델이 바쁜 동안 들어온 질문은 다음 배치에 저절로 모이므로,
+    요청이 몰릴수록 배치가 커지고 한가할 때 늘어나는 지연은 window 정도예요.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        window_ms: float = ENCODE_BATCH_WINDOW_MS,
+        max_batch_size: int = ENCODE_BATCH_MAX_SIZE,
+    ):
+        """
+        Args:
+            encode_fn: 문장 리스트 → 임베딩 2차원 배열 (행 순서는 입력 순서)
+            window_ms: 첫 질문 이후 다른 질문을 기다리는 시간(ms)
+            max_batch_size: 한 번에 임베딩하는 최대 질문 수
+        """
+        self.encode_fn = encode_fn
+        self.window = max(0.0, window_ms) / 1000
+        self.max_batch_size = max(1, max_batch_size)
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.requests = 0
+        self.batches = 0
+        self.encoded = 0
+        self.largest_batch = 0
+        self.errors = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="encode-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """질문 하나를 다음 배치에 넣기 (결과는 Future 로 받음)"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        질문 하나 임베딩 (다른 요청과 묶어서 실행될 때까지 대기)
+
+        Returns:
+            임베딩 벡터 (1차원 배열)
+        """
+        return self.submit(text).result(timeout)
+
+    def _collect(self, first) -> List:
+        """첫 질문 이후 window 동안 (또는 max_batch_size 가 찰 때까지) 질문 모으기"""
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # 종료 신호는 지금 배치를 처리한 뒤 다시 받도록 되돌려 놓음
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            self._process(self._collect(first))
+
+    def _process(self, batch: List):
+        # 이미 취소된 요청은 빼고, 같은 질문은 한 번만 임베딩
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = list(dict.fromkeys(text for text, _ in batch))
+
+        try:
+            vectors = np.asarray(self.encode_fn(texts))
+            if vectors.ndim == 1:
+                vectors = vectors.reshape(1, -1)
+            if len(vectors) != len(texts):
+                raise RuntimeError(f"임베딩 수가 질문 수와 다릅니다: {len(vectors)} (질문 {len(texts)})")
+        except Exception as e:
+            with self._stats_lock:
+                self.errors += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        rows = dict(zip(texts, vectors))
+        with self._stats_lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.encoded += len(texts)
+            self.largest_batch = max(self.largest_batch, len(texts))
+        for text, future in batch:
+            future.set_result(rows[text])
+
+    def close(self, timeout: float = 5.0):
+        """대기 중인 질문을 처리하고 백그라운드 스레드 종료"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                'window_ms': round(self.window * 1000, 3),
+                'max_batch_size': self.max_batch_size,
+                'queued': self._queue.qsize(),
+                'requests': self.requests,
+                'batches': self.batches,
+                'encoded': self.encoded,
+                'mean_batch_size': round(self.encoded / self.batches, 2) if self.batches else 0.0,
+                'largest_batch': self.largest_batch,
+                'errors': self.errors,
+            }
@@ -1,29 +1,53 @@
 # llm/gpt_client.py
-from openai import OpenAI
+import os
+import threading
+import time
+
+from metrics import stage_timer
 from token_logger import log_token_usage
 
 MODEL_NAME = "gpt-4o-mini"
 
+# API 키와 응답 제한 시간(초)은 환경 변수로 설정
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "YOUR_API_KEY")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+
 SYSTEM_PROMPT = (
     "너는 초등학생에게만 대답하는 친절한 선생님이야. "
     "어려운 용어는 쓰지 말고, 예시를 들어 설명해."
 )
 
-client = OpenAI(api_key="YOUR_API_KEY")
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    OpenAI 클라이언트 (GPT를 처음 호출할 때 openai 패키지를 로드)
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=OPENAI_API_KEY, timeout=OPENAI_TIMEOUT)
+    return _client
 
 
 def ask_gpt(user_text: str, messages: list[dict]):
     """
     GPT API 호출 + 토큰 로깅
     """
-    response = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            *messages,
-        ],
-        temperature=0.4,
-    )
+    started = time.perf_counter()
+    with stage_timer("llm_gpt"):
+        response = get_client().chat.completions.create(
+            model=MODEL_NAME,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                *messages,
+            ],
+            temperature=0.4,
+        )
 
     answer = response.choices[0].message.content
 
@@ -35,6 +59,7 @@ def ask_gpt(user_text: str, messages: list[dict]):
         input_tokens=usage.prompt_tokens,
         output_tokens=usage.completion_tokens,
         total_tokens=usage.total_tokens,
+        latency_ms=(time.perf_counter() - started) * 1000,
     )
 
     return answer
@@ -0,0 +1,72 @@
+"""
+gunicorn 설정 (Flask 서버를 워커 여러 개로 실행)
+
+gunicorn 마스터가 시작할 때 RAG 서비스(rag_service.py)를 자식 프로세스로 띄우고,
+워커들은 RAG_SERVICE_ADDRESS 소켓으로 임베딩 모델 / 벡터 DB / 업로드 대기열을 함께 써요.
+워커 수를 늘려도 임베딩 모델은 서비스에 하나만 로드돼요.
+
+- RAG_SERVICE_AUTHKEY 가 없으면 시작할 때마다 임의의 키를 만들어 환경 변수로 서비스와 워커에 넘겨요.
+- 대화 세션은 워커끼리 공유해야 다음 질문이 다른 워커로 가도 이어지므로 SESSION_STORE=sqlite 를 기본으로 써요.
+- 의미 기반 답변 캐시와 모델 라우터 통계(/router/stats)는 워커마다 따로 있어요
+  (같은 질문도 다른 워커에서는 캐시 미스, 통계는 요청을 받은 워커 것만 보임).
+
+실행 (backend 폴더에서):
+    gunicorn -c gunicorn.conf.py server:app
+    WEB_WORKERS=8 WEB_THREADS=16 gunicorn -c gunicorn.conf.py server:app
+"""
+import os
+import secrets
+import subprocess
+import sys
+import time
+
+# 워커들이 server.py 를 import 하기 전에 설정 (RAG 서비스와 워커는 마스터의 환경 변수를 물려받음)
+os.environ.setdefault("RAG_SERVICE_ADDRESS", "./rag_service.sock")
+os.environ.setdefault("RAG_SERVICE_AUTHKEY", secrets.token_hex(32))
+os.environ.setdefault("SESSION_STORE", "sqlite")
+
+from rag_service import RAG_SERVICE_ADDRESS, RemoteRAGManager  # noqa: E402
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# SSE 스트리밍 응답은 답변이 끝날 때까지 스레드 하나를 잡고 있으므로 워커마다 스레드 여러 개 사용
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "8"))
+timeout = int(os.getenv("WEB_TIMEOUT", "300"))
+
+# 앱을 마스터에서 미리 import 하면 문서 변경 알림 연결이 fork 후 워커로 이어지지 않으므로 끔
+preload_app = False
+
+# RAG 서비스 준비(모델 로드 + 기본 자료) 대기 시간(초)
+RAG_SERVICE_START_TIMEOUT = float(os.getenv("RAG_SERVICE_START_TIMEOUT", "600"))
+
+_service_process = None
+
+
+def on_starting(server):
+    """워커를 띄우기 전에 RAG 서비스를 시작하고 연결될 때까지 대기"""
+    global _service_process
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    _service_process = subprocess.Popen([sys.executable, os.path.join(backend_dir, "rag_service.py")])
+
+    client = RemoteRAGManager(RAG_SERVICE_ADDRESS)
+    deadline = time.time() + RAG_SERVICE_START_TIMEOUT
+    while not client.is_ready():
+        if _service_process.poll() is not None:
+            raise RuntimeError(f"RAG 서비스가 시작하지 못했습니다 (종료 코드 {_service_process.returncode})")
+        if time.time() > deadline:
+            _service_process.terminate()
+            raise RuntimeError(f"RAG 서비스가 {RAG_SERVICE_START_TIMEOUT:g}초 안에 준비되지 않았습니다")
+        time.sleep(0.5)
+    server.log.info("RAG 서비스 준비 완료: %s", RAG_SERVICE_ADDRESS)
+
+
+def on_exit(server):
+    """gunicorn 종료 시 RAG 서비스도 종료"""
+    if _service_process is not None and _service_process.poll() is None:
+        _service_process.terminate()
+        try:
+            _service_process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            _service_process.kill()
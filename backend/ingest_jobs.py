@@ -0,0 +1,413 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from document_loader import EXTRACT_PROCESSES, batched, hash_file, iter_document_chunks
+from rag_manager import make_doc_id
+
+# 기본 설정 (환경 변수로 변경 가능)
+# - INGEST_WORKERS: 동시에 처리하는 업로드 작업 수 (텍스트 추출 단계)
+# - INGEST_MAX_QUEUED: 대기열에 쌓아 둘 수 있는 최대 작업 수 (넘으면 업로드 거절)
+# - PDF 추출 프로세스 수는 document_loader.EXTRACT_PROCESSES
+INGEST_JOBS_DB = os.getenv("INGEST_JOBS_DB", "ingest_jobs.db")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_MAX_QUEUED = int(os.getenv("INGEST_MAX_QUEUED", "32"))
+
+# 추출 단계에서 임베딩 단계로 한 번에 넘기는 청크 수
+INGEST_CHUNK_BATCH = 256
+
+# 임베딩 단계 대기열 크기 (청크 묶음 수, 추출이 임베딩보다 너무 앞서 나가지 않게 함)
+EMBED_QUEUE_BATCHES = 16
+
+ACTIVE_STATUSES = ('queued', 'extracting', 'embedding')
+
+
+class QueueFullError(Exception):
+    """업로드 대기열이 가득 찼을 때"""
+
+
+def new_job(filepath: str, filename: str, metadata: Dict) -> Dict:
+    now = time.time()
+    return {
+        'job_id': uuid.uuid4().hex,
+        'filename': filename,
+        'filepath': filepath,
+        'metadata': metadata,
+        'status': 'queued',
+        'pages_total': None,
+        'pages_done': 0,
+        'extracted': False,
+        'chunks_total': 0,
+        'chunks_done': 0,
+        'documents_added': 0,
+        'file_hash': None,
+        'duplicate_of': None,
+        'deleted': 0,
+        'error': None,
+        'attempts': 0,
+        'created_at': now,
+        'updated_at': now,
+        'started_at': None,
+        'finished_at': None,
+    }
+
+
+class JobStore:
+    """
+    업로드 작업 저장소 (SQLite)
+
+    서버가 작업 도중에 재시작돼도 끝나지 않은 작업을 다시 이어서 처리할 수 있게 보관해요.
+    """
+
+    def __init__(self, path: str = INGEST_JOBS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, data TEXT NOT NULL, status TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at)")
+        self._conn.commit()
+
+    def put(self, job: Dict):
+        job['updated_at'] = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, data, status, created_at) VALUES (?, ?, ?, ?)",
+                (job['job_id'], json.dumps(job, ensure_ascii=False), job['status'], job['created_at'])
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list(self, limit: int = 50, status: Optional[str] = None) -> List[Dict]:
+        """최근 작업부터 조회"""
+        query = "SELECT data FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def unfinished(self) -> List[Dict]:
+        """끝나지 않은 작업 (접수 순서대로)"""
+        placeholders = ", ".join("?" for _ in ACTIVE_STATUSES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at ASC",
+                ACTIVE_STATUSES
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class IngestJobQueue:
+    """
+    백그라운드 업로드 처리 대기열
+
+    /upload 는 파일을 저장하고 작업 ID만 바로 돌려주고, 실제 처리는 여기서 해요.
+    - 추출 단계: INGEST_WORKERS 개의 작업 스레드가 document_loader 로 파일을 읽어 청크로 나눔
+      (PDF 페이지 텍스트 추출은 프로세스 풀에서 여러 코어로 나눠서 실행)
+    - 임베딩 단계: 스레드 하나가 여러 작업의 청크를 모아 RAGManager.add_texts 로 한꺼번에 저장
+    - 중복/교체: 같은 내용의 파일은 건너뛰고, 같은 이름의 수정본은 바뀐 청크만 임베딩한 뒤
+      새 버전에 없는 이전 청크를 삭제 (RAGManager.find_duplicate_file / finalize_document)
+    - 재시작: 끝나지 않은 작업은 서버가 다시 켜질 때 처음부터 다시 처리
+      (청크 ID가 내용 해시라서 이미 저장된 청크는 다시 임베딩하지 않음)
+    """
+
+    def __init__(
+        self,
+        rag_manager,
+        store: Optional[JobStore] = None,
+        workers: int = INGEST_WORKERS,
+        extract_processes: int = EXTRACT_PROCESSES,
+        max_queued: int = INGEST_MAX_QUEUED,
+    ):
+        """
+        Args:
+            rag_manager: 청크를 저장할 RAGManager
+            store: 작업 저장소 (None이면 INGEST_JOBS_DB 사용)
+            workers: 추출 단계 작업 스레드 수
+            extract_processes: PDF 추출 프로세스 수 (1 이하면 작업 스레드에서 직접 추출)
+            max_queued: 대기 중인 작업 최대 수
+        """
+        self.rag_manager = rag_manager
+        self.store = store if store is not None else JobStore()
+        self.workers = max(1, workers)
+        self.extract_processes = extract_processes
+        self.max_queued = max_queued
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._embed_queue = queue.Queue(maxsize=EMBED_QUEUE_BATCHES)
+        self._threads = []
+        self._doc_ids = {}
+        self.chunk_counts = {'embedded': 0, 'reused': 0, 'skipped': 0}
+        self._started = False
+        self.resumed = 0
+
+    def start(self) -> 'IngestJobQueue':
+        """작업 스레드 시작 + 끝나지 않은 작업 다시 대기열에 넣기"""
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+
+        for job in self.store.unfinished():
+            job.update(status='queued', pages_done=0, extracted=False,
+                       chunks_total=0, chunks_done=0, documents_added=0, deleted=0)
+            self._enqueue(job)
+            self.resumed += 1
+        if self.resumed:
+            print(f"🔁 끝나지 않은 업로드 작업 {self.resumed}개를 다시 처리합니다")
+
+        for index in range(self.workers):
+            self._start_thread(self._worker_loop, f'ingest-worker-{index}')
+        self._start_thread(self._embed_loop, 'ingest-embed')
+        return self
+
+    def _start_thread(self, target, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _enqueue(self, job: Dict):
+        with self._lock:
+            self._jobs[job['job_id']] = job
+        self.store.put(job)
+        self._queue.put(job['job_id'])
+
+    def submit(self, filepath: str, filename: str, metadata: Dict) -> Dict:
+        """
+        업로드 작업 접수
+
+        Returns:
+            작업 정보 (job_id, status 등)
+
+        Raises:
+            QueueFullError: 대기 중인 작업이 max_queued 개 이상일 때
+        """
+        self.start()
+        if self._queue.qsize() >= self.max_queued:
+            raise QueueFullError(f"업로드 대기열이 가득 찼습니다 ({self.max_queued}개)")
+
+        # 청크 ID와 통계의 출처는 저장 경로가 아니라 원래 파일 이름 기준
+        job = new_job(filepath, filename, {'source': filename, **metadata})
+        self._enqueue(job)
+        return self.describe(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return self.describe(job)
+        job = self.store.get(job_id)
+        return self.describe(job) if job else None
+
+    def list_jobs(self, limit: int = 50, status: Optional[str] = None) -> List[Dict]:
+        return [self.describe(job) for job in self.store.list(limit, status)]
+
+    @staticmethod
+    def describe(job: Dict) -> Dict:
+        """응답용 작업 정보 (진행률 포함, 저장 경로 제외)"""
+        if job['status'] == 'done':
+            progress = 1.0
+        else:
+            if job['extracted']:
+                extract_fraction = 1.0
+            elif job['pages_total']:
+                extract_fraction = job['pages_done'] / job['pages_total']
+            else:
+                extract_fraction = 0.0
+            embed_fraction = job['chunks_done'] / job['chunks_total'] if job['chunks_total'] else 0.0
+            progress = (extract_fraction + embed_fraction) / 2
+
+        info = {key: value for key, value in job.items() if key != 'filepath'}
+        info['progress'] = round(progress, 4)
+        return info
+
+    def _update(self, job: Dict, **changes):
+        with self._lock:
+            job.update(changes)
+            snapshot = dict(job)
+        self.store.put(snapshot)
+
+    def _finish(self, job: Dict, status: str, error: Optional[str] = None):
+        self._update(job, status=status, error=error, finished_at=time.time())
+        with self._lock:
+            self._jobs.pop(job['job_id'], None)
+
+    def _fail(self, job: Dict, error: Exception):
+        print(f"❌ 업로드 처리 실패 ({job['filename']}): {error}")
+        self._finish(job, 'failed', str(error))
+        with self._lock:
+            self._doc_ids.pop(job['job_id'], None)
+
+    # ------------------------------------------------------------------
+    # 추출 단계
+    # ------------------------------------------------------------------
+
+    def _worker_loop(self):
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            try:
+                self._process(job)
+            except Exception as e:
+                self._fail(job, e)
+
+    def _process(self, job: Dict):
+        self._update(job, status='extracting', started_at=time.time(), attempts=job['attempts'] + 1)
+
+        if not os.path.exists(job['filepath']):
+            raise FileNotFoundError(f"업로드 파일이 없습니다: {job['filename']}")
+
+        # 같은 내용의 파일이 이미 저장돼 있으면 추출/임베딩 없이 끝냄
+        # (재시작 후 이어서 처리하는 작업은 앞에서 이미 확인했으므로 건너뜀)
+        if job['file_hash'] is None:
+            file_hash = hash_file(job['filepath'])
+            duplicate_of = self.rag_manager.find_duplicate_file(file_hash)
+            self._update(job, file_hash=file_hash, duplicate_of=duplicate_of)
+            if duplicate_of is not None:
+                self._update(job, extracted=True)
+                self._finish(job, 'done')
+                print(f"⏭️  같은 내용의 파일이 이미 있어 건너뜀: {job['filename']} (= {duplicate_of})")
+                return
+
+        # 다 끝나면 이 ID들에 없는 같은 출처의 이전 청크를 삭제 (수정본 교체)
+        doc_ids = set()
+        with self._lock:
+            self._doc_ids[job['job_id']] = doc_ids
+
+        def progress(done: int, total: Optional[int]):
+            # 페이지마다 DB에 쓰지 않고, 청크 묶음을 넘길 때 함께 저장
+            with self._lock:
+                job['pages_done'] = done
+                job['pages_total'] = total
+
+        chunks = iter_document_chunks(job['filepath'], self.rag_manager.chunker, job['metadata'],
+                                      self.extract_processes, progress)
+        for batch in batched(chunks, INGEST_CHUNK_BATCH):
+            # 임베딩 단계에서 실패한 작업은 더 추출하지 않음
+            if job['status'] == 'failed':
+                chunks.close()
+                return
+            texts, metadatas = zip(*batch)
+            doc_ids.update(make_doc_id(text, metadata) for text, metadata in batch)
+            self._update(job, chunks_total=job['chunks_total'] + len(texts))
+            self._embed_queue.put(('chunks', job['job_id'], list(texts), list(metadatas)))
+
+        self._update(job, extracted=True, status='embedding')
+        self._embed_queue.put(('finish', job['job_id'], None, None))
+
+    # ------------------------------------------------------------------
+    # 임베딩 단계
+    # ------------------------------------------------------------------
+
+    def _next_embed_items(self) -> List[Tuple]:
+        """임베딩 대기열에서 write_batch_size 만큼 청크 묶음을 모음 (작업 종료 표시에서 멈춤)"""
+        items = [self._embed_queue.get()]
+        if items[0][0] != 'chunks':
+            return items
+
+        total = len(items[0][2])
+        while total < self.rag_manager.write_batch_size:
+            try:
+                item = self._embed_queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            if item[0] != 'chunks':
+                break
+            total += len(item[2])
+        return items
+
+    def _embed_loop(self):
+        while True:
+            items = self._next_embed_items()
+            chunks = [item for item in items if item[0] == 'chunks']
+            finishes = [item for item in items if item[0] == 'finish']
+
+            # 실패한 작업(_jobs에서 빠짐)의 남은 청크는 버림
+            with self._lock:
+                chunks = [item for item in chunks if item[1] in self._jobs]
+            if chunks:
+                self._embed(chunks)
+
+            for _, job_id, _, _ in finishes:
+                with self._lock:
+                    job = self._jobs.get(job_id)
+                    doc_ids = self._doc_ids.pop(job_id, set())
+                if job is not None:
+                    self._complete(job, doc_ids)
+
+    def _complete(self, job: Dict, doc_ids: set):
+        """모든 청크를 저장한 작업 마무리 (이전 버전 청크 삭제 + 파일 목록 기록)"""
+        try:
+            deleted = self.rag_manager.finalize_document(job['metadata']['source'], job['file_hash'], doc_ids)
+        except Exception as e:
+            self._fail(job, e)
+            return
+        self._update(job, deleted=deleted)
+        self._finish(job, 'done')
+        print(f"✅ 업로드 처리 완료: {job['filename']} ({job['documents_added']}개 문서, 이전 청크 {deleted}개 삭제)")
+
+    def _embed(self, chunks: List[Tuple]):
+        texts, metadatas = [], []
+        for _, _, batch_texts, batch_metadatas in chunks:
+            texts.extend(batch_texts)
+            metadatas.extend(batch_metadatas)
+
+        try:
+            self.rag_manager.add_texts(texts, metadatas, report=self.chunk_counts)
+        except Exception as e:
+            for _, job_id, _, _ in chunks:
+                with self._lock:
+                    job = self._jobs.get(job_id)
+                if job is not None:
+                    self._fail(job, e)
+            return
+
+        for _, job_id, batch_texts, _ in chunks:
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is not None:
+                self._update(job, chunks_done=job['chunks_done'] + len(batch_texts),
+                             documents_added=job['documents_added'] + len(batch_texts))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            active = len(self._jobs)
+        return {
+            'workers': self.workers,
+            'extract_processes': self.extract_processes,
+            'queued': self._queue.qsize(),
+            'max_queued': self.max_queued,
+            'active': active,
+            'resumed': self.resumed,
+            'chunks': dict(self.chunk_counts),
+            'jobs': self.store.count_by_status(),
+        }
@@ -0,0 +1,303 @@
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 한글 단어 / 영문·숫자 단어
+TOKEN_PATTERN = re.compile(r"[가-힣]+|[a-z0-9]+")
+
+# 단어 끝에서 떼어 낼 조사/어미 (긴 것부터 검사)
+KOREAN_SUFFIXES = sorted([
+    "에서는", "으로는", "에게서", "이에요", "입니다", "이란", "이야", "에서", "으로", "에게",
+    "까지", "부터", "처럼", "보다", "예요", "은", "는", "이", "가", "을", "를", "에", "의",
+    "로", "와", "과", "도", "만", "야", "요", "란",
+], key=len, reverse=True)
+
+INDEX_FILE = "keyword_index.pkl"
+
+
+def strip_suffix(word: str) -> str:
+    """한글 단어 끝의 조사/어미 제거 (어간이 한 글자 이상 남을 때만)"""
+    for suffix in KOREAN_SUFFIXES:
+        if len(word) > len(suffix) and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    한국어 검색용 토큰화 (형태소 분석기 없이)
+
+    조사를 뗀 단어와 함께, 세 글자 이상 한글 단어는 두 글자씩 자른 조각(bigram)도 넣어서
+    '광합성' 같은 합성어를 '광합' '합성'으로도 찾을 수 있게 해요.
+    """
+    text = unicodedata.normalize("NFC", text or "").lower()
+    tokens = []
+    for word in TOKEN_PATTERN.findall(text):
+        if word[0] < "가":
+            tokens.append(word)
+            continue
+        stem = strip_suffix(word)
+        tokens.append(stem)
+        if len(stem) >= 3:
+            tokens.extend(stem[i:i + 2] for i in range(len(stem) - 1))
+    return tokens
+
+
+# matches_where 가 지원하는 비교 연산자
+WHERE_OPERATORS = ("$eq", "$ne", "$in", "$nin", "$gt", "$gte", "$lt", "$lte")
+
+
+def check_where(where: Dict):
+    """
+    where 조건의 연산자가 모두 지원되는지 확인 (검사할 문서가 없어도 벡터 검색과 똑같이 오류를 냄)
+
+    Raises:
+        ValueError: 지원하지 않는 연산자
+    """
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            for sub in condition:
+                check_where(sub)
+        elif key.startswith("$"):
+            raise ValueError(f"지원하지 않는 where 연산자입니다: {key}")
+        elif isinstance(condition, dict):
+            for operator in condition:
+                if operator not in WHERE_OPERATORS:
+                    raise ValueError(f"지원하지 않는 where 연산자입니다: {operator}")
+
+
+def matches_where(metadata: Optional[Dict], where: Optional[Dict]) -> bool:
+    """
+    ChromaDB where 조건과 같은 규칙으로 메타데이터 검사
+
+    지원: {"key": value}, {"key": {"$eq"|"$ne"|"$in"|"$nin"|"$gt"|"$gte"|"$lt"|"$lte": ...}},
+          {"$and": [...]}, {"$or": [...]}
+
+    Raises:
+        ValueError: 지원하지 않는 연산자 (벡터 검색처럼 조건을 무시하지 않고 오류로 알림)
+    """
+    if not where:
+        return True
+    metadata = metadata or {}
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        if key.startswith("$"):
+            raise ValueError(f"지원하지 않는 where 연산자입니다: {key}")
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        for operator, expected in condition.items():
+            if operator not in WHERE_OPERATORS:
+                raise ValueError(f"지원하지 않는 where 연산자입니다: {operator}")
+            if operator == "$eq" and value != expected:
+                return False
+            if operator == "$ne" and value == expected:
+                return False
+            if operator == "$in" and value not in expected:
+                return False
+            if operator == "$nin" and value in expected:
+                return False
+            if operator in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if operator == "$gt" and not value > expected:
+                    return False
+                if operator == "$gte" and not value >= expected:
+                    return False
+                if operator == "$lt" and not value < expected:
+                    return False
+                if operator == "$lte" and not value <= expected:
+                    return False
+    return True
+
+
+class BM25Index:
+    """
+    BM25 역색인 (키워드 검색)
+
+    문서를 추가/삭제할 때마다 메모리에서 바로 갱신하고, save()를 부를 때 벡터 DB 폴더에 pickle로 저장해요.
+    저장한 뒤 처음 바뀔 때 저장 파일을 지워서, 저장하기 전에 프로세스가 죽으면 다음 로드 때 재구축해요.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            path: 색인 저장 파일 경로 (None이면 메모리에만 유지)
+            k1: 단어 빈도 포화 정도
+            b: 문서 길이 보정 정도
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._postings = {}
+        self._docs = {}
+        self._total_length = 0
+        # 변경 횟수 / 마지막으로 저장한 시점의 변경 횟수 (다르면 저장 필요)
+        self._version = 0
+        self._saved_version = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    @property
+    def dirty(self) -> bool:
+        """저장 파일에 아직 반영하지 않은 변경이 있는지"""
+        return self._version != self._saved_version
+
+    def _touch(self):
+        """변경 기록 (lock 안에서 호출, 저장 후 첫 변경이면 낡은 저장 파일 삭제)"""
+        if not self.dirty:
+            self.delete_saved()
+        self._version += 1
+
+    def add(self, doc_ids: Iterable[str], texts: Iterable[str], metadatas: Iterable[Optional[Dict]]):
+        """문서 추가 (이미 있는 ID는 내용을 교체)"""
+        with self._lock:
+            self._touch()
+            for doc_id, text, metadata in zip(doc_ids, texts, metadatas):
+                if doc_id in self._docs:
+                    self._remove_one(doc_id)
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                self._docs[doc_id] = (counts, length, dict(metadata or {}))
+                self._total_length += length
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _remove_one(self, doc_id: str):
+        counts, length, _ = self._docs.pop(doc_id)
+        self._total_length -= length
+        for term in counts:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def remove(self, doc_ids: Iterable[str]):
+        """문서 삭제"""
+        with self._lock:
+            self._touch()
+            for doc_id in doc_ids:
+                if doc_id in self._docs:
+                    self._remove_one(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._touch()
+            self._postings = {}
+            self._docs = {}
+            self._total_length = 0
+
+    def search(self, query: str, n_results: int = 10, where: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """
+        BM25 점수가 높은 문서 검색
+
+        Returns:
+            (문서 ID, 점수) 리스트 (점수 높은 순)
+        """
+        if where:
+            check_where(where)
+        terms = set(tokenize(query))
+        with self._lock:
+            total = len(self._docs)
+            if not total or not terms:
+                return []
+            average_length = self._total_length / total
+
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    length = self._docs[doc_id][1]
+                    denominator = tf + self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / denominator
+
+            if where:
+                scores = {doc_id: score for doc_id, score in scores.items()
+                          if matches_where(self._docs[doc_id][2], where)}
+
+        return heapq.nlargest(n_results, scores.items(), key=lambda item: (item[1], item[0]))
+
+    def save(self) -> bool:
+        """
+        색인 파일 저장 (임시 파일에 쓰고 교체)
+
+        lock 안에서는 메모리로 직렬화만 하고 파일 쓰기는 lock 밖에서 해서 검색을 오래 막지 않아요.
+        쓰는 동안 색인이 또 바뀌었으면 낡은 내용이므로 버려요 (다음 저장 때 다시 씀).
+
+        Returns:
+            저장했으면 True
+        """
+        if not self.path:
+            return False
+        with self._save_lock:
+            with self._lock:
+                if not self.dirty and os.path.exists(self.path):
+                    return False
+                version = self._version
+                data = pickle.dumps({'postings': self._postings, 'docs': self._docs,
+                                     'total_length': self._total_length},
+                                    protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            with self._lock:
+                if version != self._version:
+                    os.remove(tmp_path)
+                    return False
+                os.replace(tmp_path, self.path)
+                self._saved_version = version
+        return True
+
+    def delete_saved(self):
+        """저장 파일 삭제 (다음 로드 때 재구축)"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def load(self) -> bool:
+        """
+        색인 파일 불러오기
+
+        Returns:
+            불러왔으면 True, 파일이 없거나 깨졌으면 False
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️  키워드 색인 파일을 읽지 못했습니다: {e}")
+            return False
+
+        with self._lock:
+            self._postings = data['postings']
+            self._docs = data['docs']
+            self._total_length = data['total_length']
+            self._saved_version = self._version
+        return True
@@ -0,0 +1,336 @@
+"""
+요청 추적 / 단계별 지연 시간 지표
+
+- 단계(stage)별 처리 시간을 히스토그램으로 모아서 Prometheus 텍스트 형식(/metrics)으로 내보내요.
+  (prometheus_client 없이 구현: 관찰 한 번 = 버킷 위치 찾기 + 잠금 한 번)
+- 요청마다 request id 를 붙이고, 끝나면 단계별 시간과 함께 JSON 한 줄로 로그를 남겨요.
+
+단계 이름:
+    encode        질문 임베딩 (캐시 미스일 때만)
+    search        RAGManager.search 전체 (캐시 적중 포함)
+    vector_query  벡터 검색 (ChromaDB 또는 압축 색인)
+    keyword       BM25 키워드 검색
+    prompt        프롬프트(메시지 목록) 구성
+    llm_local     Ollama 전체 답변 호출 (스트리밍 아님)
+    llm_gpt       GPT 호출
+    ttft          스트리밍 요청부터 첫 토큰까지
+    generate      첫 토큰부터 마지막 토큰까지
+    stream        SSE 응답 전체 (첫 이벤트부터 done/error 또는 연결 끊김까지)
+
+스트리밍 응답별 지표(완료/취소/오류 수, 토큰 수, 첫 답변 프레임까지 시간, 초당 토큰)는
+chatbot_stream_* 로 따로 내보내요 (stream_relay.py).
+"""
+import bisect
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+# 기본 설정 (환경 변수로 변경 가능)
+# - METRICS_ENABLED: 0이면 지표 수집을 끔 (/metrics 는 빈 응답)
+# - REQUEST_LOG: json(기본) / off — 요청별 JSON 로그 출력 여부
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+REQUEST_LOG = os.getenv("REQUEST_LOG", "json")
+
+# 히스토그램 버킷 경계(초): 임베딩(수 ms)부터 긴 LLM 답변(수십 초)까지
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# JSON 요청 로그를 남기지 않는 경로 (수집기/헬스 체크가 자주 호출)
+LOG_SKIP_PATHS = ('/metrics', '/health', '/health/ready')
+
+# 클라이언트가 보낸 request id 최대 길이 (넘거나 비어 있으면 새로 만듦)
+MAX_REQUEST_ID_LENGTH = 64
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    단조 증가 카운터 (라벨별)
+
+    값은 <name>_total 로 내보내고, 텍스트 형식 0.0.4 규칙대로 HELP/TYPE 도 같은 이름(<name>_total)에 붙여요.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> str:
+        name = f"{self.name}_total"
+        lines = [f"# HELP {name} {self.documentation}", f"# TYPE {name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    """
+    누적 버킷 히스토그램 (라벨별)
+
+    관찰할 때는 해당 버킷 하나만 올리고, 내보낼 때 누적 합을 계산해요.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, **labels) -> Dict:
+        """라벨 하나의 {count, sum, buckets} (테스트/디버깅용)"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            counts, total, count = self._series.get(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            return {'count': count, 'sum': total, 'buckets': list(counts)}
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(value[0]), value[1], value[2]) for key, value in self._series.items())
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """지표 모음 (/metrics 응답 생성)"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        if not METRICS_ENABLED:
+            return ""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "chatbot_stage_seconds", "요청 처리 단계별 소요 시간(초)", labelnames=("stage",)
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "chatbot_request_seconds", "HTTP 요청 처리 시간(초, 스트리밍은 마지막 이벤트까지)",
+    labelnames=("method", "endpoint", "status")
+))
+ERRORS = REGISTRY.register(Counter(
+    "chatbot_errors", "요청 처리 중 발생한 오류 수", labelnames=("endpoint",)
+))
+
+# 스트리밍 응답별 지표 (stream_relay.StreamStats 가 스트림이 끝날 때 기록)
+STREAMS = REGISTRY.register(Counter(
+    "chatbot_streams", "끝난 스트리밍 응답 수 (completed / cancelled / error)", labelnames=("outcome",)
+))
+STREAM_TOKENS = REGISTRY.register(Counter(
+    "chatbot_stream_tokens", "스트리밍으로 받은 답변 조각(토큰) 수", labelnames=("outcome",)
+))
+STREAM_FIRST_CONTENT_SECONDS = REGISTRY.register(Histogram(
+    "chatbot_stream_first_content_seconds", "스트리밍 요청부터 첫 답변 프레임을 보낼 때까지(초, 검색 포함)"
+))
+STREAM_TOKENS_PER_SECOND = REGISTRY.register(Histogram(
+    "chatbot_stream_tokens_per_second", "스트리밍 답변 생성 속도 (첫 토큰부터 마지막 토큰까지)",
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300)
+))
+
+# 요청별 JSON 로그 (stdout 한 줄 = 요청 하나)
+request_logger = logging.getLogger("chatbot.request")
+if not request_logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    request_logger.addHandler(_handler)
+    request_logger.setLevel(logging.INFO)
+    request_logger.propagate = False
+
+
+class RequestTrace:
+    """요청 하나의 request id 와 단계별 누적 시간"""
+
+    def __init__(self, endpoint: str, method: str = "", request_id: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex[:16]
+        self.endpoint = endpoint
+        self.method = method
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.fields = {}
+        self.error = None
+        self.streaming = False
+        self.finished = False
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current_trace = contextvars.ContextVar("request_trace", default=None)
+
+
+def clean_request_id(value: Optional[str]) -> Optional[str]:
+    """클라이언트가 보낸 X-Request-ID 검사 (영문/숫자/-/_ 만, 길이 제한)"""
+    if not value or len(value) > MAX_REQUEST_ID_LENGTH:
+        return None
+    if not all(char.isascii() and (char.isalnum() or char in "-_.") for char in value):
+        return None
+    return value
+
+
+def start_trace(endpoint: str, method: str = "", request_id: Optional[str] = None) -> RequestTrace:
+    """새 요청 추적 시작 (현재 컨텍스트에 등록)"""
+    trace = RequestTrace(endpoint, method, clean_request_id(request_id))
+    _current_trace.set(trace)
+    return trace
+
+
+def use_trace(trace: Optional[RequestTrace]):
+    """이미 만든 추적을 현재 컨텍스트에 등록 (스트리밍 생성기 안에서 사용)"""
+    _current_trace.set(trace)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace is not None else None
+
+
+def observe_stage(stage: str, seconds: float, trace: Optional[RequestTrace] = None):
+    """단계 소요 시간 기록 (히스토그램 + 현재 요청 추적)"""
+    if not METRICS_ENABLED:
+        return
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    trace = trace or _current_trace.get()
+    if trace is not None:
+        trace.record(stage, seconds)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """with 블록 실행 시간을 stage 단계로 기록"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def annotate(**fields):
+    """현재 요청 로그에 남길 값 추가 (사용한 백엔드, 캐시 적중 여부 등)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.fields.update(fields)
+
+
+def begin_stream() -> Optional[RequestTrace]:
+    """
+    스트리밍 응답 표시
+
+    after_request 는 응답 객체를 돌려줄 때 실행되므로, 스트리밍 응답은 거기서 끝내지 않고
+    생성기가 마지막 이벤트를 보낸 뒤 finish_trace 를 호출해요.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.streaming = True
+    return trace
+
+
+def record_error(error: Exception, trace: Optional[RequestTrace] = None):
+    """현재 요청의 오류 기록 (요청 로그에 함께 남고 오류 카운터 증가)"""
+    trace = trace or _current_trace.get()
+    if trace is None:
+        return
+    trace.error = str(error)
+    ERRORS.inc(endpoint=trace.endpoint)
+
+
+def finish_trace(trace: Optional[RequestTrace], status: int):
+    """
+    요청 처리 끝: 요청 시간 히스토그램 기록 + JSON 로그 한 줄
+
+    스트리밍 응답은 응답 객체를 돌려줄 때가 아니라 마지막 이벤트를 보낸 뒤 호출해요.
+    """
+    if trace is None or trace.finished:
+        return
+    trace.finished = True
+    duration = trace.elapsed()
+    if METRICS_ENABLED:
+        REQUEST_SECONDS.observe(duration, method=trace.method, endpoint=trace.endpoint, status=status)
+
+    if REQUEST_LOG != "json" or trace.endpoint in LOG_SKIP_PATHS:
+        return
+    entry = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "level": "error" if trace.error or status >= 500 else "info",
+        "request_id": trace.request_id,
+        "method": trace.method,
+        "endpoint": trace.endpoint,
+        "status": status,
+        "duration_ms": round(duration * 1000, 2),
+        "stages_ms": {stage: round(seconds * 1000, 2) for stage, seconds in trace.stages.items()},
+        **trace.fields,
+    }
+    if trace.error:
+        entry["error"] = trace.error
+    request_logger.info(json.dumps(entry, ensure_ascii=False, default=str))
@@ -0,0 +1,226 @@
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from token_logger import TokenUsageLogger
+
+EASY_PATTERNS = [
+    r"안녕", r"반가워", r"고마워",
+    r"몇 살", r"이름", r"누구야",
+]
+
+HARD_PATTERNS = [
+    r"왜", r"어떻게", r"설명", r"이유",
+    r"원리", r"과정", r"차이",
+    r"비교", r"단계", r"증명",
+]
+
+# 패턴을 하나의 정규식으로 합쳐서 한 번만 훑음
+QUESTION_PATTERN = re.compile(
+    "(?P<hard>" + "|".join(HARD_PATTERNS) + ")|(?P<easy>" + "|".join(EASY_PATTERNS) + ")"
+)
+
+# 길이 기반 보정 기준 (글자 수)
+LONG_QUESTION_LENGTH = 20
+
+ROUTING_LOG_FILE = "routing_log.jsonl"
+
+
+def classify_question(text: str) -> str:
+    """
+    질문 난이도 분류 ("easy" / "hard")
+
+    어려운 표현이 하나라도 있으면 hard, 없고 쉬운 표현이 있으면 easy,
+    둘 다 없으면 길이로 판단해요.
+    """
+    text = text.strip()
+    easy = False
+
+    for match in QUESTION_PATTERN.finditer(text):
+        if match.lastgroup == "hard":
+            return "hard"
+        easy = True
+
+    if easy:
+        return "easy"
+
+    # 길이 기반 보정
+    if len(text) > LONG_QUESTION_LENGTH:
+        return "hard"
+
+    return "easy"
+
+
+class BackendStats:
+    """백엔드별 지연 시간/실패 기록 (서킷 브레이커 포함)"""
+
+    def __init__(self, name: str, window: int = 200):
+        self.name = name
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma_ms = None
+        self.open_until = 0.0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, latency_ms: float, ok: bool, alpha: float = 0.2):
+        self.calls += 1
+        self.latencies.append(latency_ms)
+        self.ewma_ms = latency_ms if self.ewma_ms is None else alpha * latency_ms + (1 - alpha) * self.ewma_ms
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    def summary(self) -> Dict:
+        ordered = sorted(self.latencies)
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'ewma_ms': round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            'p50_ms': round(ordered[len(ordered) // 2], 1) if ordered else None,
+            'p95_ms': round(ordered[int(round(0.95 * (len(ordered) - 1)))], 1) if ordered else None,
+            'circuit_open': self.open_until > time.time(),
+        }
+
+
+class ModelRouter:
+    """
+    로컬 Ollama / 원격 GPT 라우터
+
+    - 쉬운 질문은 로컬, 어려운 질문은 원격(GPT)을 먼저 시도
+    - 백엔드가 실패하면 다른 백엔드로 대체(fallback)
+    - 연속 실패하면 잠시 제외하고(서킷 브레이커), 평균 지연이 기준보다 느리면 순서를 바꿈
+    - 모든 결정과 지연 시간을 routing_log.jsonl 에 기록해서 기준값 조정에 활용
+    """
+
+    def __init__(
+        self,
+        local: Callable[[str, List[Dict]], str],
+        remote: Optional[Callable[[str, List[Dict]], str]] = None,
+        slow_threshold_ms: float = 15000,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30,
+        log_path: Optional[str] = ROUTING_LOG_FILE,
+    ):
+        """
+        Args:
+            local: 로컬 백엔드 호출 함수 (user_text, messages) → 답변
+            remote: 원격 백엔드 호출 함수 (없으면 항상 로컬 사용)
+            slow_threshold_ms: 평균 지연(EWMA)이 이 값을 넘으면 느린 백엔드로 보고 뒤로 미룸
+            failure_threshold: 연속 실패가 이 횟수에 도달하면 cooldown_seconds 동안 제외
+            cooldown_seconds: 제외 시간(초)
+            log_path: 라우팅 결정 로그 파일 (None이면 기록 안 함)
+        """
+        self.backends = {'local': local}
+        if remote is not None:
+            self.backends['remote'] = remote
+
+        self.slow_threshold_ms = slow_threshold_ms
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.stats = {name: BackendStats(name) for name in self.backends}
+        self.decisions = {}
+        self._lock = threading.Lock()
+        self._log = TokenUsageLogger(path=log_path, hash_text=False) if log_path else None
+
+    def _available(self, name: str) -> bool:
+        return self.stats[name].open_until <= time.time()
+
+    def _slow(self, name: str) -> bool:
+        ewma = self.stats[name].ewma_ms
+        return ewma is not None and ewma > self.slow_threshold_ms
+
+    def plan(self, user_text: str) -> Dict:
+        """
+        질문에 맞는 백엔드 시도 순서 결정
+
+        Returns:
+            {'level': 'easy'|'hard', 'order': [백엔드 이름, ...]}
+        """
+        level = classify_question(user_text)
+        preferred = 'remote' if level == 'hard' and 'remote' in self.backends else 'local'
+        order = [preferred] + [name for name in self.backends if name != preferred]
+
+        # 서킷이 열린(최근 연속 실패) 백엔드와 느린 백엔드는 뒤로
+        order.sort(key=lambda name: (not self._available(name), self._slow(name)))
+
+        return {'level': level, 'order': order}
+
+    def record(self, name: str, latency_ms: float, ok: bool):
+        """백엔드 호출 결과 기록"""
+        with self._lock:
+            stats = self.stats[name]
+            stats.record(latency_ms, ok)
+            if not ok and stats.consecutive_failures >= self.failure_threshold:
+                stats.open_until = time.time() + self.cooldown_seconds
+                print(f"⚠️  {name} 백엔드 {self.cooldown_seconds:.0f}초 동안 제외 (연속 실패 {stats.consecutive_failures}회)")
+
+    def record_decision(self, plan: Dict, backend: str, fallback_used: bool, latency_ms: float,
+                        question_length: int, errors: List[str] = None):
+        """최종 라우팅 결정 기록 (통계 + 로그 파일)"""
+        key = f"{plan['level']}:{backend}"
+        with self._lock:
+            self.decisions[key] = self.decisions.get(key, 0) + 1
+
+        if self._log is not None:
+            self._log.log({
+                'timestamp': datetime.utcnow().isoformat(),
+                'level': plan['level'],
+                'order': plan['order'],
+                'backend': backend,
+                'fallback_used': fallback_used,
+                'latency_ms': round(latency_ms, 1),
+                'question_length': question_length,
+                'errors': errors or [],
+            })
+
+    def route(self, user_text: str, messages: List[Dict]) -> Dict:
+        """
+        질문을 라우팅해서 답변 생성 (실패하면 다음 백엔드로 대체)
+
+        Returns:
+            {'response': 답변, 'backend': 사용한 백엔드, 'level': 난이도, 'fallback_used': 대체 여부}
+        """
+        plan = self.plan(user_text)
+        errors = []
+        started = time.perf_counter()
+
+        for name in plan['order']:
+            call_started = time.perf_counter()
+            try:
+                response = self.backends[name](user_text, messages)
+            except Exception as e:
+                self.record(name, (time.perf_counter() - call_started) * 1000, ok=False)
+                errors.append(f"{name}: {e}")
+                print(f"⚠️  {name} 백엔드 실패, 다음 백엔드로 대체: {e}")
+                continue
+
+            self.record(name, (time.perf_counter() - call_started) * 1000, ok=True)
+            fallback_used = name != plan['order'][0]
+            self.record_decision(plan, name, fallback_used, (time.perf_counter() - started) * 1000,
+                                 len(user_text), errors)
+            return {
+                'response': response,
+                'backend': name,
+                'level': plan['level'],
+                'fallback_used': fallback_used,
+            }
+
+        self.record_decision(plan, 'none', True, (time.perf_counter() - started) * 1000,
+                             len(user_text), errors)
+        raise RuntimeError("모든 LLM 백엔드 호출 실패: " + "; ".join(errors))
+
+    def get_stats(self) -> Dict:
+        """백엔드별 지연/실패 통계와 라우팅 결정 횟수"""
+        with self._lock:
+            return {
+                'backends': {name: stats.summary() for name, stats in self.stats.items()},
+                'decisions': dict(self.decisions),
+                'slow_threshold_ms': self.slow_threshold_ms,
+            }
@@ -0,0 +1,38 @@
+"""
+PDF 페이지 추출 프로세스에서 실행하는 함수
+
+추출 프로세스는 forkserver/spawn 방식으로 만들어서 이 모듈만 import 하므로,
+pypdf 외에 무거운 모듈(torch, chromadb 등)은 import 하지 않아요.
+"""
+import os
+from typing import List, Tuple
+
+import pypdf
+
+# 추출 프로세스 안에서 재사용하는 PdfReader (경로, 수정 시각, reader)
+_worker_reader = None
+
+
+def _open_worker_reader(pdf_path: str) -> pypdf.PdfReader:
+    """같은 PDF의 다음 페이지 범위를 맡았을 때 파일을 다시 파싱하지 않도록 reader 재사용"""
+    global _worker_reader
+    mtime = os.path.getmtime(pdf_path)
+    if _worker_reader is None or _worker_reader[:2] != (pdf_path, mtime):
+        _worker_reader = (pdf_path, mtime, pypdf.PdfReader(pdf_path))
+    return _worker_reader[2]
+
+
+def extract_pdf_pages(pdf_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """
+    PDF 페이지 범위의 텍스트 추출
+
+    Returns:
+        (페이지 번호(1부터), 텍스트) 리스트
+    """
+    pages = _open_worker_reader(pdf_path).pages
+    return [(page_num + 1, pages[page_num].extract_text() or "") for page_num in range(start, stop)]
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    """PDF 페이지 수"""
+    return len(_open_worker_reader(pdf_path).pages)
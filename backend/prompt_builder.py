@@ -0,0 +1,118 @@
+"""
+LLM 프롬프트 구성
+
+Ollama는 직전 요청과 앞부분(prefix)이 같은 프롬프트의 계산 결과를 재사용해요.
+그래서 매번 바뀌는 내용은 뒤로 보내고, 앞부분은 항상 같은 바이트가 되도록 배치해요.
+
+    [system] SYSTEM_PROMPT                 ← 항상 동일 (모든 요청이 공유)
+    [system] 이전 대화 요약               ← 세션 안에서 가끔만 바뀜
+    [user/assistant] 최근 대화 (시간 순)   ← 턴마다 뒤에만 추가됨
+    [user] 참고 자료 + 현재 질문           ← 매 요청마다 바뀜
+
+모델을 다시 로드하면 캐시가 사라지므로 keep_alive 와 num_ctx 같은 옵션도 모델별로 고정해요.
+"""
+import json
+import os
+from typing import Dict, List, Optional
+
+# 초등학생용 시스템 프롬프트 (바이트 단위로 고정 - 여기에 요청마다 바뀌는 내용을 붙이지 않음)
+SYSTEM_PROMPT = """너는 초등학생들을 위한 친절한 한국어 선생님 AI야.
+
+언어 규칙:
+- 반드시 100% 한국어로만 대답해야 해.
+- 영어, 중국어 등 다른 언어는 어떤 상황에서도 사용하지 않아.
+- 외래어가 꼭 필요한 경우에는 괄호 안에 한국어 뜻을 함께 설명해.
+- 한국어 문장 구조와 맞춤법을 정확하게 지켜.
+
+역할:
+1. 초등학생 눈높이에 맞게 쉽고 재미있게 설명해.
+2. 긍정적이고 격려하는 말투를 유지해.
+3. 어려운 단어는 쉬운 말로 풀어줘.
+4. 친구처럼 친근하지만, 존중하는 태도로 이야기해.
+5. 이전 대화 내용을 기억하고 자연스럽게 이어서 대화해.
+
+지원 영역:
+- 학습(국어·수학·과학·영어 기초)
+- 인성교육(감정 표현, 친구 관계, 예절)
+- 고민 상담(학교생활, 가족, 자신감)
+
+규칙:
+- 숙제 답을 직접 주지 않고, 방법과 힌트를 제공해.
+- 폭력적이거나 부적절한 주제는 다루지 않아.
+- 전문적인 내용도 어린이가 이해할 수 있게 쉽게 설명해."""
+
+# RAG 참고자료 + 질문 (/chat 용)
+CHAT_RAG_TEMPLATE = """[📚 참고 자료]
+다음은 업로드된 학습 자료에서 찾은 관련 내용이야:
+
+{rag_context}
+
+위 참고 자료의 내용을 활용해서 정확하게 설명해주되, 
+초등학생이 이해하기 쉽게 풀어서 말해줘.
+
+[질문]
+{question}"""
+
+# RAG 참고자료 + 질문 (/chat/stream 용)
+STREAM_RAG_TEMPLATE = """[📚 참고 자료]
+{rag_context}
+
+위 참고 자료를 활용해서 정확하게 설명해줘.
+
+[질문]
+{question}"""
+
+# 모델 유지 시간과 컨텍스트 길이 (바뀌면 Ollama가 모델을 다시 로드해서 캐시가 사라짐)
+OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+OLLAMA_NUM_CTX = int(os.getenv('OLLAMA_NUM_CTX', '4096'))
+
+# 모델별 옵션 덮어쓰기 (JSON, 예: {"elementary-kor-teacher": {"keep_alive": "1h", "options": {"num_ctx": 8192}}})
+MODEL_OPTIONS = json.loads(os.getenv('OLLAMA_MODEL_OPTIONS', '{}'))
+
+
+def model_options(model: str) -> Dict:
+    """
+    모델 호출 옵션 (ollama chat 의 keep_alive, options 인자)
+
+    같은 모델은 항상 같은 옵션으로 호출해야 모델을 다시 로드하지 않아요.
+    """
+    override = MODEL_OPTIONS.get(model, {})
+    return {
+        'keep_alive': override.get('keep_alive', OLLAMA_KEEP_ALIVE),
+        'options': {'num_ctx': OLLAMA_NUM_CTX, **override.get('options', {})},
+    }
+
+
+def build_messages(
+    user_message: str,
+    history: Optional[List[Dict]] = None,
+    rag_context: str = "",
+    rag_template: str = CHAT_RAG_TEMPLATE
+) -> List[Dict]:
+    """
+    LLM에 전달할 메시지 목록 구성 (앞부분이 요청마다 같도록)
+
+    Args:
+        user_message: 현재 사용자 메시지
+        history: 이전 대화 이력 (요약 시스템 메시지 + 최근 메시지, 시간 순)
+        rag_context: 검색한 참고 자료 (검색 순위 순서로 정리된 텍스트)
+        rag_template: 참고 자료와 질문을 묶는 템플릿
+
+    Returns:
+        메시지 리스트
+    """
+    # 1. 고정된 시스템 프롬프트
+    messages = [{'role': 'system', 'content': SYSTEM_PROMPT}]
+
+    # 2. 이전 대화 (세션 안에서는 뒤에만 추가되므로 앞부분이 유지됨)
+    if history:
+        messages.extend({'role': m['role'], 'content': m['content']} for m in history)
+
+    # 3. 참고 자료 + 현재 질문 (요청마다 바뀌는 부분은 맨 뒤)
+    if rag_context:
+        content = rag_template.format(rag_context=rag_context, question=user_message)
+    else:
+        content = user_message
+    messages.append({'role': 'user', 'content': content})
+
+    return messages
@@ -0,0 +1,94 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# 질문 끝의 문장 부호와 공백 (정규화할 때 제거)
+TRAILING_PUNCTUATION = re.compile(r'[\s.!?~。？！]+$')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(text: str) -> str:
+    """
+    캐시 키용 질문 정규화
+
+    "분수가 뭐야?", " 분수가  뭐야 " 처럼 표기만 다른 질문을 같은 키로 만들어요.
+    """
+    text = unicodedata.normalize('NFC', text).lower().strip()
+    text = WHITESPACE.sub(' ', text)
+    return TRAILING_PUNCTUATION.sub('', text)
+
+
+class LRUTTLCache:
+    """크기 제한(LRU)과 유효 시간(TTL)이 있는 스레드 안전 캐시"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = 600):
+        """
+        Args:
+            max_size: 최대 항목 수 (넘으면 가장 오래 안 쓴 항목부터 제거)
+            ttl_seconds: 항목 유효 시간(초), None이면 만료 없음
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """캐시 조회 (없거나 만료되면 default)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, stored_at = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """캐시 저장"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """모든 항목 삭제 (통계는 유지)"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
@@ -1,37 +1,471 @@
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional, Tuple
 import os
-import pypdf
-from docx import Document
+import numpy as np
+import json
+import hashlib
+import threading
+import time
+import atexit
+from document_loader import EXTRACT_PROCESSES, batched, hash_file, iter_document_chunks
+from text_chunker import TextChunker, approximate_token_count
+from query_cache import LRUTTLCache, normalize_query
+from corpus_stats import CorpusStats, STATS_FILE
+from document_registry import DocumentRegistry, DOCUMENTS_FILE
+from keyword_index import BM25Index, INDEX_FILE, matches_where
+from embedding_backends import EMBEDDING_BACKEND, EMBEDDING_BACKENDS, EMBEDDING_MODEL_NAME, create_embedding_backend
+from vector_index import CompactVectorIndex, VECTOR_INDEX, VECTOR_INDEX_DIR, VECTOR_INDEX_MODES
+from encode_batcher import EncodeBatcher, ENCODE_BATCH_MAX_SIZE, ENCODE_BATCH_WINDOW_MS
+from metrics import stage_timer
+
+# 컬렉션 이름
+COLLECTION_NAME = "elementary_materials"
+
+# 문서 ID를 만들 때 내용과 함께 사용하는 메타데이터 키
+ID_METADATA_KEYS = ('source', 'filename', 'page')
+
+# 검색 방식
+# - vector: 임베딩 유사도만
+# - keyword: BM25 키워드 점수만
+# - hybrid: 두 결과의 순위를 합침 (Reciprocal Rank Fusion)
+SEARCH_MODES = ('vector', 'keyword', 'hybrid')
+SEARCH_MODE = os.getenv('SEARCH_MODE', 'hybrid')
+
+# hybrid 검색에서 각 방식으로 먼저 뽑는 후보 수 (n_results의 배수)
+HYBRID_CANDIDATES = 4
+
+# Reciprocal Rank Fusion 상수 (클수록 순위 차이의 영향이 작아짐)
+RRF_K = 60
+
+# where 조건 검색 시 조건 없이 먼저 뽑아 보는 후보 수 (n_results의 배수)
+# ChromaDB의 where 검색은 조건에 맞는 문서를 전부 비교해서 느리므로,
+# 조건 없는 검색 결과를 걸러서 충분하면 그대로 쓰고 부족할 때만 where 검색을 해요.
+FILTER_OVERFETCH = 8
+
+# 압축 벡터 색인(float16/int8)에서 먼저 뽑는 후보 수 (n_results의 배수)
+# 후보는 ChromaDB에 저장된 float32 임베딩으로 거리를 다시 계산해서 순서를 정해요.
+RERANK_CANDIDATES = 4
+
+# 문서가 바뀐 뒤 검색 색인 파일을 저장하기까지 기다리는 시간(초)
+# 배치마다 색인 전체를 다시 쓰지 않고, 이 시간 동안 들어온 변경을 모아서 한 번만 저장해요.
+# 0이면 자동 저장을 끄고 save_indexes()를 부를 때와 프로세스 종료 때만 저장해요.
+INDEX_SAVE_DELAY = float(os.getenv('INDEX_SAVE_DELAY', '5'))
+
+
+def build_where(filters: Optional[Dict]) -> Optional[Dict]:
+    """
+    {"grade": "3학년", "subject": "수학"} 같은 간단한 필터를 ChromaDB where 조건으로 변환
+    
+    이미 $and/$or 같은 연산자를 쓴 조건이면 그대로 사용하고, 값이 비어 있는 키는 무시해요.
+    """
+    if not filters:
+        return None
+    if any(key.startswith('$') for key in filters):
+        return filters
+    
+    conditions = [{key: value} for key, value in filters.items() if value not in (None, '')]
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {'$and': conditions}
+
+
+def content_hash(text: str) -> str:
+    """청크 텍스트 해시 (출처와 상관없이 같은 텍스트면 같은 값, 임베딩 재사용에 사용)"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:20]
+
+
+def make_doc_id(text: str, metadata: Dict = None) -> str:
+    """
+    내용 기반 문서 ID 생성 (컬렉션을 조회하지 않음)
+
+    같은 텍스트와 같은 출처 정보면 항상 같은 ID가 나와요.
+    """
+    identity = {key: metadata[key] for key in ID_METADATA_KEYS if metadata and key in metadata}
+    payload = json.dumps([text, identity], ensure_ascii=False, sort_keys=True)
+    return f"doc_{hashlib.sha1(payload.encode('utf-8')).hexdigest()[:20]}"
+
 
 class RAGManager:
-    """초등학생 학습 자료용 RAG 매니저"""
+    """
+    초등학생 학습 자료용 RAG 매니저
+    
+    임베딩 모델(torch)과 ChromaDB 클라이언트는 처음 필요할 때 로드해요.
+    서버 시작 직후 준비시키려면 start_warm_up()으로 백그라운드에서 미리 로드해요.
+    """
     
-    def __init__(self, persist_directory: str = "./chroma_db"):
+    def __init__(
+        self,
+        persist_directory: str = "./chroma_db",
+        embedding_model=None,
+        encode_batch_size: int = 64,
+        write_batch_size: int = 2048,
+        chunk_tokens: int = 120,
+        chunk_overlap: int = 20,
+        query_cache_size: int = 1024,
+        query_cache_ttl: Optional[float] = 600,
+        search_mode: str = SEARCH_MODE,
+        embedding_backend: str = EMBEDDING_BACKEND,
+        vector_index: str = VECTOR_INDEX,
+        encode_batch_window_ms: float = ENCODE_BATCH_WINDOW_MS,
+        index_save_delay: float = INDEX_SAVE_DELAY
+    ):
         """
         Args:
             persist_directory: ChromaDB 저장 경로
+            embedding_model: 사용할 임베딩 모델 (없으면 ko-sroberta 로드)
+            encode_batch_size: 임베딩 모델에 한 번에 넣는 문장 수
+            write_batch_size: ChromaDB에 한 번에 쓰는 문서 수
+            chunk_tokens: 청크 하나의 최대 토큰 수 (ko-sroberta 입력 길이 128 이하)
+            chunk_overlap: 이웃한 청크끼리 겹치는 토큰 수
+            query_cache_size: 질문 임베딩/검색 결과 캐시 최대 항목 수 (0이면 캐시 끔)
+            query_cache_ttl: 캐시 유효 시간(초)
+            search_mode: 기본 검색 방식 (vector / keyword / hybrid)
+            embedding_backend: embedding_model이 없을 때 만들 임베딩 백엔드 (torch / onnx / onnx-int8)
+            vector_index: 벡터 검색 색인 (chroma / float16 / int8, vector_index.py 참고)
+            encode_batch_window_ms: 동시에 들어온 질문을 묶어서 임베딩할 때 기다리는 시간(ms, 0이면 질문마다 바로 임베딩)
+            index_save_delay: 문서 변경 후 검색 색인을 저장하기까지 기다리는 시간(초, 0이면 자동 저장 안 함)
         """
-        # ChromaDB 초기화
-        self.client = chromadb.Client(Settings(
-            persist_directory=persist_directory,
-            anonymized_telemetry=False
-        ))
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"지원하지 않는 검색 방식입니다: {search_mode}")
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"지원하지 않는 임베딩 백엔드입니다: {embedding_backend}")
+        if vector_index not in VECTOR_INDEX_MODES:
+            raise ValueError(f"지원하지 않는 벡터 색인입니다: {vector_index}")
+
+        self.persist_directory = persist_directory
         
-        # 임베딩 모델 (한국어 지원)
-        self.embedding_model = SentenceTransformer('jhgan/ko-sroberta-multitask')
+        # 무거운 구성요소는 지연 로딩 (ChromaDB 클라이언트/컬렉션, 임베딩 모델)
+        self._client = None
+        self._collection = None
+        self._embedding_model = embedding_model
+        self.embedding_backend = embedding_backend
+        self._load_lock = threading.RLock()
+        self._warm_up_thread = None
+        self.warm_up_error = None
+        self.load_times = {}
         
-        # 컬렉션 생성/로드
-        try:
-            self.collection = self.client.get_collection(name="elementary_materials")
-        except:
-            self.collection = self.client.create_collection(
-                name="elementary_materials",
-                metadata={"description": "초등학생 학습 자료"}
+        # 배치 크기 (ChromaDB 최대 배치 크기는 클라이언트 로드 시 반영)
+        self.encode_batch_size = encode_batch_size
+        self.write_batch_size = write_batch_size
+        
+        # 문서 청킹 (임베딩 모델의 토크나이저로 토큰 수 계산)
+        self.chunker = TextChunker(
+            max_tokens=chunk_tokens,
+            overlap_tokens=chunk_overlap,
+            token_counter=self._count_tokens
+        )
+        
+        # 질문 캐시 (정규화된 질문 → 임베딩 / 검색 결과)
+        # 임베딩은 컬렉션과 무관하지만, 검색 결과는 문서가 바뀌면 무효화해요.
+        self.embedding_cache = LRUTTLCache(query_cache_size, query_cache_ttl)
+        self.search_cache = LRUTTLCache(query_cache_size, query_cache_ttl)
+        self._collection_version = 0
+        
+        # 문서 통계 카운터 (추가/삭제 때마다 갱신, 벡터 DB 폴더에 함께 저장)
+        self.stats = CorpusStats(os.path.join(persist_directory, STATS_FILE))
+        
+        # 업로드된 파일 목록 (출처 → 파일 해시, 같은 파일 중복 업로드 / 수정본 교체 판단)
+        self.documents = DocumentRegistry(os.path.join(persist_directory, DOCUMENTS_FILE))
+        self.documents.load()
+        
+        # 키워드(BM25) 색인 (hybrid/keyword 검색을 처음 할 때 로드)
+        self.search_mode = search_mode
+        self._keyword_index = None
+        
+        # 압축 벡터 색인 (vector_index가 chroma가 아니면 벡터 검색을 처음 할 때 로드)
+        self.vector_index_mode = vector_index
+        self._vector_index = None
+        self._vector_dimension = None
+        
+        # 검색 색인 지연 저장 (배치마다 저장하지 않고 index_save_delay 뒤에 모아서 저장)
+        self.index_save_delay = index_save_delay
+        self._save_timer = None
+        self._save_timer_lock = threading.Lock()
+        atexit.register(self.save_indexes)
+        
+        # 문서 변경 알림을 받을 함수들 (event, doc_ids) - 답변 캐시 무효화 등
+        self._change_listeners = []
+        
+        # 동시에 들어온 질문 임베딩을 묶어서 실행 (캐시 미스일 때만, encode_batcher.py 참고)
+        self.encode_batcher = None
+        if encode_batch_window_ms > 0:
+            self.encode_batcher = EncodeBatcher(
+                self._encode_query_batch,
+                window_ms=encode_batch_window_ms,
+                max_batch_size=ENCODE_BATCH_MAX_SIZE
             )
     
+    @property
+    def client(self):
+        """ChromaDB 클라이언트 (디스크에 저장되어 재시작해도 유지됨)"""
+        if self._client is None:
+            with self._load_lock:
+                if self._client is None:
+                    started = time.perf_counter()
+                    import chromadb
+                    from chromadb.config import Settings
+                    
+                    client = chromadb.PersistentClient(
+                        path=self.persist_directory,
+                        settings=Settings(anonymized_telemetry=False)
+                    )
+                    self.write_batch_size = min(self.write_batch_size, client.max_batch_size)
+                    self._client = client
+                    self.load_times['vector_store'] = round(time.perf_counter() - started, 3)
+        return self._client
+    
+    @property
+    def collection(self):
+        """학습 자료 컬렉션 (전체 문서를 읽지 않으므로 코퍼스 크기와 무관)"""
+        if self._collection is None:
+            with self._load_lock:
+                if self._collection is None:
+                    collection = self.client.get_or_create_collection(
+                        name=COLLECTION_NAME,
+                        metadata={"description": "초등학생 학습 자료"}
+                    )
+                    self._load_stats(collection)
+                    self._collection = collection
+        return self._collection
+    
+    def _load_stats(self, collection):
+        """저장된 통계 불러오기 (없거나 문서 수가 맞지 않으면 컬렉션에서 재구축)"""
+        count = collection.count()
+        if self.stats.load() and self.stats.total == count:
+            return
+        if count == 0:
+            self.stats.clear()
+            return
+        self._rebuild_stats(collection)
+    
+    def _rebuild_stats(self, collection, page_size: int = 5000):
+        """컬렉션의 메타데이터만 페이지 단위로 읽어서 통계 재계산"""
+        started = time.perf_counter()
+        total = collection.count()
+        metadatas = []
+        for offset in range(0, total, page_size):
+            page = collection.get(include=['metadatas'], limit=page_size, offset=offset)
+            metadatas.extend(page['metadatas'])
+        
+        self.stats.reset(metadatas)
+        self.stats.save()
+        self.load_times['stats_rebuild'] = round(time.perf_counter() - started, 3)
+        print(f"📊 문서 통계 재구축: {self.stats.total}개 문서")
+    
+    def rebuild_stats(self) -> Dict:
+        """문서 통계를 컬렉션에서 다시 계산 (통계가 어긋났을 때 수동 실행)"""
+        with self._load_lock:
+            self._rebuild_stats(self.collection)
+        return self.get_stats()
+    
+    @property
+    def embedding_model(self):
+        """임베딩 모델 (처음 사용할 때 설정한 백엔드로 로드)"""
+        if self._embedding_model is None:
+            with self._load_lock:
+                if self._embedding_model is None:
+                    started = time.perf_counter()
+                    self._embedding_model = create_embedding_backend(self.embedding_backend, EMBEDDING_MODEL_NAME)
+                    self.load_times['embedding_model'] = round(time.perf_counter() - started, 3)
+        return self._embedding_model
+    
+    @property
+    def keyword_index(self) -> BM25Index:
+        """BM25 키워드 색인 (저장된 파일이 없거나 문서 수가 맞지 않으면 컬렉션에서 재구축)"""
+        if self._keyword_index is None:
+            with self._load_lock:
+                if self._keyword_index is None:
+                    started = time.perf_counter()
+                    collection = self.collection
+                    index = BM25Index(os.path.join(self.persist_directory, INDEX_FILE))
+                    if not index.load() or len(index) != collection.count():
+                        self._rebuild_keyword_index(index, collection)
+                    self._keyword_index = index
+                    self.load_times['keyword_index'] = round(time.perf_counter() - started, 3)
+        return self._keyword_index
+    
+    def _rebuild_keyword_index(self, index: BM25Index, collection, page_size: int = 5000):
+        """컬렉션의 문서를 페이지 단위로 읽어서 키워드 색인 재구축"""
+        index.clear()
+        total = collection.count()
+        for offset in range(0, total, page_size):
+            page = collection.get(include=['documents', 'metadatas'], limit=page_size, offset=offset)
+            index.add(page['ids'], page['documents'], page['metadatas'])
+        index.save()
+        print(f"🔤 키워드 색인 재구축: {len(index)}개 문서")
+    
+    def _update_keyword_index(self, added: Optional[Tuple[List[str], List[str], List[Dict]]] = None,
+                              removed: Optional[List[str]] = None, clear: bool = False):
+        """
+        문서 변경을 키워드 색인에 반영 (색인을 아직 로드하지 않았으면 저장 파일만 지워서 다음 로드 때 재구축)
+        
+        파일 저장은 index_save_delay 뒤로 미뤄서 대량 추가 때 배치마다 색인 전체를 다시 쓰지 않아요.
+        """
+        index = self._keyword_index
+        if index is None:
+            path = os.path.join(self.persist_directory, INDEX_FILE)
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        
+        if clear:
+            index.clear()
+        if removed:
+            index.remove(removed)
+        if added:
+            index.add(*added)
+        self._schedule_index_save()
+    
+    def _schedule_index_save(self):
+        """index_save_delay 뒤에 검색 색인 저장 (이미 예약돼 있으면 그 저장에 합침)"""
+        if self.index_save_delay <= 0:
+            return
+        with self._save_timer_lock:
+            if self._save_timer is not None and self._save_timer.is_alive():
+                return
+            self._save_timer = threading.Timer(self.index_save_delay, self.save_indexes)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def save_indexes(self) -> List[str]:
+        """
+        바뀐 검색 색인을 파일로 저장 (대량 추가/삭제가 끝난 뒤나 종료할 때 호출)
+        
+        Returns:
+            저장한 색인 이름 리스트
+        """
+        saved = []
+        indexes = [('keyword', self._keyword_index), ('vector', self._vector_index)]
+        for name, index in indexes:
+            if index is None or not index.dirty:
+                continue
+            try:
+                if index.save():
+                    saved.append(name)
+            except OSError as e:
+                print(f"⚠️  {name} 색인을 저장하지 못했습니다: {e}")
+        return saved
+    
+    @property
+    def vector_index(self) -> CompactVectorIndex:
+        """압축 벡터 색인 (저장된 파일이 없거나 문서 수가 맞지 않으면 컬렉션의 임베딩으로 재구축)"""
+        if self._vector_index is None:
+            with self._load_lock:
+                if self._vector_index is None:
+                    started = time.perf_counter()
+                    collection = self.collection
+                    index = CompactVectorIndex(os.path.join(self.persist_directory, VECTOR_INDEX_DIR),
+                                               dtype=self.vector_index_mode)
+                    if not index.load() or len(index) != collection.count():
+                        self._rebuild_vector_index(index, collection)
+                    self._vector_index = index
+                    self.load_times['vector_index'] = round(time.perf_counter() - started, 3)
+        return self._vector_index
+    
+    def _rebuild_vector_index(self, index: CompactVectorIndex, collection, page_size: int = 5000):
+        """컬렉션의 임베딩을 페이지 단위로 읽어서 압축 벡터 색인 재구축"""
+        index.clear()
+        total = collection.count()
+        for offset in range(0, total, page_size):
+            page = collection.get(include=['embeddings'], limit=page_size, offset=offset)
+            index.add(page['ids'], page['embeddings'])
+        index.save()
+        print(f"🗜  압축 벡터 색인({index.dtype}) 재구축: {len(index)}개 벡터")
+    
+    def _update_vector_index(self, added: Optional[Tuple[List[str], List[List[float]]]] = None,
+                             removed: Optional[List[str]] = None, clear: bool = False):
+        """문서 변경을 압축 벡터 색인에 반영 (색인을 아직 로드하지 않았으면 저장 파일만 무효화, 파일 저장은 지연)"""
+        if self.vector_index_mode == 'chroma':
+            return
+        
+        index = self._vector_index
+        if index is None:
+            CompactVectorIndex(os.path.join(self.persist_directory, VECTOR_INDEX_DIR),
+                               dtype=self.vector_index_mode).delete_saved()
+            return
+        
+        if clear:
+            index.clear()
+        if removed:
+            index.remove(removed)
+        if added:
+            index.add(*added)
+        self._schedule_index_save()
+    
+    def warm_up(self):
+        """임베딩 모델, 벡터 DB, 키워드 색인을 미리 로드 (첫 요청 지연 방지)"""
+        try:
+            self.collection.count()
+            self.embedding_model.encode("준비", show_progress_bar=False)
+            if self.search_mode != 'vector':
+                self.keyword_index
+            if self.vector_index_mode != 'chroma':
+                self.vector_index
+        except Exception as e:
+            self.warm_up_error = str(e)
+            raise
+    
+    def start_warm_up(self) -> threading.Thread:
+        """백그라운드 스레드에서 warm_up 실행"""
+        if self._warm_up_thread is None:
+            def run():
+                try:
+                    self.warm_up()
+                except Exception as e:
+                    print(f"❌ 모델 준비 실패: {e}")
+            
+            self._warm_up_thread = threading.Thread(target=run, name='rag-warm-up', daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+    
+    def is_ready(self) -> bool:
+        """임베딩 모델과 벡터 DB(압축 벡터 색인을 쓰면 색인까지)가 모두 로드되었는지 여부"""
+        if self.vector_index_mode != 'chroma' and self._vector_index is None:
+            return False
+        return self._embedding_model is not None and self._collection is not None
+    
+    def readiness(self) -> Dict:
+        """구성요소별 로드 상태"""
+        return {
+            'ready': self.is_ready(),
+            'embedding_model': self._embedding_model is not None,
+            'embedding_backend': self.embedding_backend,
+            'vector_store': self._collection is not None,
+            'vector_index': self.vector_index_mode == 'chroma' or self._vector_index is not None,
+            'warming_up': self._warm_up_thread is not None and self._warm_up_thread.is_alive(),
+            'error': self.warm_up_error,
+            'load_times': dict(self.load_times)
+        }
+    
+    def _count_tokens(self, text: str) -> int:
+        """임베딩 모델 토크나이저 기준 토큰 수 (토크나이저가 없으면 추정치)"""
+        tokenizer = getattr(self.embedding_model, 'tokenizer', None)
+        if tokenizer is None:
+            return approximate_token_count(text)
+        return len(tokenizer.tokenize(text))
+    
+    def add_change_listener(self, listener):
+        """
+        문서 변경 알림 등록
+        
+        Args:
+            listener: listener(event, doc_ids) 형태의 함수 (event: 'add' / 'delete' / 'clear')
+        """
+        self._change_listeners.append(listener)
+    
+    def _notify_change(self, event: str, doc_ids: Optional[List[str]] = None):
+        for listener in self._change_listeners:
+            try:
+                listener(event, doc_ids)
+            except Exception as e:
+                print(f"⚠️  문서 변경 알림 처리 실패: {e}")
+    
+    def _invalidate_search_cache(self):
+        """컬렉션이 바뀌었을 때 검색 결과 캐시 무효화"""
+        self._collection_version += 1
+        self.search_cache.clear()
+    
     def add_text(self, text: str, metadata: Dict = None) -> str:
         """
         텍스트를 벡터 DB에 추가
@@ -43,28 +477,231 @@ class RAGManager:
         Returns:
             문서 ID
         """
-        if metadata is None:
-            metadata = {}
+        return self.add_texts([text], [metadata])[0]
+    
+    def add_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict]] = None,
+        batch_size: Optional[int] = None,
+        report: Optional[Dict] = None
+    ) -> List[str]:
+        """
+        여러 텍스트를 한 번에 벡터 DB에 추가
+        
+        임베딩은 encode_batch_size 단위로, 저장은 write_batch_size 단위로 묶어서 처리해요.
+        같은 내용은 같은 ID(내용 해시)를 가지므로, 이미 저장된 문서는 임베딩하지 않고 건너뛰어요.
+        ID는 새롭지만 같은 텍스트가 이미 저장돼 있으면(예: 수정본에서 페이지가 밀린 경우)
+        저장된 임베딩을 재사용해요.
+        
+        Args:
+            texts: 추가할 텍스트 리스트
+            metadatas: 텍스트별 메타데이터 리스트
+            batch_size: 한 번에 임베딩+저장할 문서 수 (기본값 write_batch_size)
+            report: 주면 'embedded'(새로 임베딩), 'reused'(임베딩 재사용), 'skipped'(이미 저장됨) 수를 더해 줌
+        
+        Returns:
+            입력 순서와 같은 문서 ID 리스트
+        """
+        if metadatas is None:
+            metadatas = [None] * len(texts)
+        if len(metadatas) != len(texts):
+            raise ValueError("texts와 metadatas의 길이가 다릅니다")
         
-        # 문서 ID 생성
-        doc_id = f"doc_{len(self.collection.get()['ids'])}"
+        metadatas = [{**(metadata or {}), 'content_hash': content_hash(text)}
+                     for text, metadata in zip(texts, metadatas)]
+        doc_ids = [make_doc_id(text, metadata) for text, metadata in zip(texts, metadatas)]
         
-        # 임베딩 생성
-        embedding = self.embedding_model.encode(text).tolist()
+        # 같은 배치 안의 중복 ID 제거 (ChromaDB는 한 번의 호출에 중복 ID를 허용하지 않음)
+        unique = {}
+        for doc_id, text, metadata in zip(doc_ids, texts, metadatas):
+            unique.setdefault(doc_id, (text, metadata))
         
-        # ChromaDB에 추가
-        self.collection.add(
-            ids=[doc_id],
-            embeddings=[embedding],
-            documents=[text],
-            metadatas=[metadata]
+        items = list(unique.items())
+        batch_size = min(batch_size or self.write_batch_size, self.write_batch_size)
+        added_ids, added_texts, added_metadatas, added_embeddings = [], [], [], []
+        counts = {'embedded': 0, 'reused': 0, 'skipped': 0}
+        
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            
+            # 이미 저장된 문서(같은 내용 해시)는 다시 임베딩하지 않음
+            existing = set(self.collection.get(ids=[doc_id for doc_id, _ in batch], include=[])['ids'])
+            counts['skipped'] += len(existing)
+            batch = [item for item in batch if item[0] not in existing]
+            if not batch:
+                continue
+            
+            batch_ids = [doc_id for doc_id, _ in batch]
+            batch_texts = [text for _, (text, _) in batch]
+            batch_metadatas = [metadata for _, (_, metadata) in batch]
+            
+            # 같은 텍스트의 임베딩이 이미 있으면 재사용하고, 나머지만 임베딩 생성 (배치)
+            reusable = self._reusable_embeddings([metadata['content_hash'] for metadata in batch_metadatas])
+            embeddings = [reusable.get(metadata['content_hash']) for metadata in batch_metadatas]
+            missing = [index for index, embedding in enumerate(embeddings) if embedding is None]
+            if missing:
+                encoded = self.embedding_model.encode(
+                    [batch_texts[index] for index in missing],
+                    batch_size=self.encode_batch_size,
+                    show_progress_bar=False
+                ).tolist()
+                for index, embedding in zip(missing, encoded):
+                    embeddings[index] = embedding
+            counts['embedded'] += len(missing)
+            counts['reused'] += len(batch) - len(missing)
+            
+            # ChromaDB에 추가 (위에서 이미 있는 ID는 걸렀으므로 새 문서만 들어감)
+            # add 대신 upsert: 삭제했던 ID를 다시 넣을 때(수정본 교체 후 이전 버전 재업로드 등)
+            # ChromaDB 0.4 HNSW 색인이 "이미 있는 ID"로 보고 벡터를 빠뜨리는 문제를 피함
+            self.collection.upsert(
+                ids=batch_ids,
+                embeddings=embeddings,
+                documents=batch_texts,
+                metadatas=batch_metadatas
+            )
+            self.stats.add(batch_metadatas)
+            added_ids.extend(batch_ids)
+            added_texts.extend(batch_texts)
+            added_metadatas.extend(batch_metadatas)
+            if self.vector_index_mode != 'chroma':
+                added_embeddings.extend(embeddings)
+        
+        if added_ids:
+            self._update_keyword_index(added=(added_ids, added_texts, added_metadatas))
+            self._update_vector_index(added=(added_ids, added_embeddings))
+            self.stats.save()
+            self._invalidate_search_cache()
+            self._notify_change('add', added_ids)
+        
+        if report is not None:
+            for key, value in counts.items():
+                report[key] = report.get(key, 0) + value
+        
+        return doc_ids
+    
+    def _reusable_embeddings(self, hashes: List[str]) -> Dict[str, List[float]]:
+        """content_hash가 같은 저장된 청크의 임베딩 (해시 → 임베딩)"""
+        found = self.collection.get(
+            where={'content_hash': {'$in': list(set(hashes))}},
+            include=['embeddings', 'metadatas']
         )
+        return {metadata['content_hash']: list(embedding)
+                for metadata, embedding in zip(found['metadatas'], found['embeddings'])}
+    
+    def add_chunks(
+        self,
+        chunks: Iterable[Tuple[str, Dict]],
+        batch_size: Optional[int] = None,
+        report: Optional[Dict] = None
+    ) -> List[str]:
+        """
+        (청크 텍스트, 메타데이터) 스트림을 write_batch_size 묶음씩 벡터 DB에 추가
+        
+        청크를 모두 모으지 않고 묶음이 찰 때마다 임베딩해서, 아주 큰 문서도 메모리 사용량이 일정해요.
+        
+        Args:
+            chunks: (청크 텍스트, 메타데이터) 를 생성하는 iterable (document_loader.iter_document_chunks 등)
+            batch_size: 한 번에 임베딩+저장할 청크 수 (기본값 write_batch_size)
+            report: add_texts 의 report 와 같음
+        
+        Returns:
+            추가된 문서 ID 리스트
+        """
+        doc_ids = []
+        for batch in batched(chunks, batch_size or self.write_batch_size):
+            texts, metadatas = zip(*batch)
+            doc_ids.extend(self.add_texts(list(texts), list(metadatas), report=report))
+        return doc_ids
+    
+    def find_duplicate_file(self, file_hash: str) -> Optional[str]:
+        """
+        같은 내용의 파일이 이미 저장돼 있는지 확인
+        
+        Returns:
+            이미 저장된 파일의 source, 없으면 None
+        """
+        source = self.documents.find_by_hash(file_hash)
+        if source is None:
+            return None
+        
+        # 목록에는 있지만 청크가 모두 지워진 파일이면 목록에서도 삭제
+        if not self.collection.get(where={'source': source}, limit=1, include=[])['ids']:
+            self.documents.remove([source])
+            self.documents.save()
+            return None
+        return source
+    
+    def finalize_document(self, source: str, file_hash: str, doc_ids: Iterable[str]) -> int:
+        """
+        파일 저장 마무리: 새 버전에 없는 이전 청크를 지우고 파일 목록에 기록
+        
+        Args:
+            source: 문서 출처 (파일 이름)
+            file_hash: 새 파일 내용 해시
+            doc_ids: 새 버전의 청크 ID들
+        
+        Returns:
+            삭제한 이전 청크 수
+        """
+        keep = set(doc_ids)
+        existing = self.collection.get(where={'source': source}, include=[])['ids']
+        stale = [doc_id for doc_id in existing if doc_id not in keep]
+        deleted = self.delete_documents(ids=stale) if stale else 0
         
-        return doc_id
+        self.documents.record(source, file_hash, len(keep))
+        self.documents.save()
+        return deleted
+    
+    def ingest_document(self, path: str, metadata: Dict = None, processes: int = EXTRACT_PROCESSES) -> Dict:
+        """
+        파일을 추가하거나, 같은 출처(source)의 이전 버전을 교체
+        
+        - 같은 내용의 파일이 이미 있으면 아무것도 하지 않음 (파일 단위 중복 제거)
+        - 바뀌지 않은 청크는 그대로 두고 새 청크만 임베딩 (청크 단위 중복 제거)
+        - 새 버전에 없는 이전 청크는 삭제
+        
+        Args:
+            path: 파일 경로
+            metadata: 메타데이터 (source 기본값은 파일 이름)
+            processes: PDF 페이지 추출 프로세스 수
+        
+        Returns:
+            {'status': 'duplicate' | 'added' | 'replaced', 'doc_ids', 'embedded', 'reused', 'skipped', 'deleted', ...}
+        """
+        metadata = {"source": os.path.basename(path), **(metadata or {})}
+        source = metadata['source']
+        file_hash = hash_file(path)
+        report = {'source': source, 'file_hash': file_hash, 'embedded': 0, 'reused': 0, 'skipped': 0, 'deleted': 0}
+        
+        duplicate_of = self.find_duplicate_file(file_hash)
+        if duplicate_of is not None:
+            report.update(status='duplicate', duplicate_of=duplicate_of, doc_ids=[])
+            return report
+        
+        replacing = bool(self.collection.get(where={'source': source}, limit=1, include=[])['ids'])
+        doc_ids = self.add_chunks(iter_document_chunks(path, self.chunker, metadata, processes), report=report)
+        report['deleted'] = self.finalize_document(source, file_hash, doc_ids)
+        report.update(status='replaced' if replacing else 'added', doc_ids=doc_ids)
+        return report
+    
+    def add_file(self, path: str, metadata: Dict = None, processes: int = EXTRACT_PROCESSES) -> List[str]:
+        """
+        PDF / DOCX / TXT 파일을 스트리밍으로 읽어서 벡터 DB에 추가 (같은 출처의 이전 버전은 교체)
+        
+        Args:
+            path: 파일 경로
+            metadata: 메타데이터 (source 기본값은 파일 이름)
+            processes: PDF 페이지 추출 프로세스 수
+        
+        Returns:
+            새 버전의 문서 ID 리스트 (같은 파일이 이미 있으면 빈 리스트)
+        """
+        return self.ingest_document(path, metadata, processes)['doc_ids']
     
     def add_pdf(self, pdf_path: str, metadata: Dict = None) -> List[str]:
         """
-        PDF 파일을 처리하여 벡터 DB에 추가
+        PDF 파일을 처리하여 벡터 DB에 추가 (페이지별로 청크 분할, 여러 프로세스에서 추출)
         
         Args:
             pdf_path: PDF 파일 경로
@@ -73,70 +710,166 @@ class RAGManager:
         Returns:
             추가된 문서 ID 리스트
         """
-        if metadata is None:
-            metadata = {"source": pdf_path}
-        
-        doc_ids = []
+        return self.add_file(pdf_path, metadata)
+    
+    def add_docx(self, docx_path: str, metadata: Dict = None) -> List[str]:
+        """
+        Word 문서를 처리하여 벡터 DB에 추가 (문단 단위로 읽음)
         
-        # PDF 읽기
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = pypdf.PdfReader(file)
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                text = page.extract_text()
-                
-                if text.strip():  # 텍스트가 있는 경우만
-                    page_metadata = {
-                        **metadata,
-                        "page": page_num + 1,
-                        "total_pages": len(pdf_reader.pages)
-                    }
-                    
-                    doc_id = self.add_text(text, page_metadata)
-                    doc_ids.append(doc_id)
+        Args:
+            docx_path: Word 파일 경로
+            metadata: 메타데이터
         
-        return doc_ids
+        Returns:
+            추가된 문서 ID 리스트
+        """
+        return self.add_file(docx_path, metadata)
     
-    def add_docx(self, docx_path: str, metadata: Dict = None) -> str:
+    def add_txt(self, txt_path: str, metadata: Dict = None) -> List[str]:
         """
-        Word 문서를 처리하여 벡터 DB에 추가
+        텍스트 파일을 처리하여 벡터 DB에 추가 (줄 단위로 읽음)
         
         Args:
-            docx_path: Word 파일 경로
+            txt_path: TXT 파일 경로
             metadata: 메타데이터
         
         Returns:
-            문서 ID
+            추가된 문서 ID 리스트
+        """
+        return self.add_file(txt_path, metadata)
+    
+    def add_document_text(self, text: str, metadata: Dict = None) -> List[str]:
+        """
+        긴 텍스트를 청크로 나눠서 벡터 DB에 추가
+        
+        Args:
+            text: 문서 전체 텍스트
+            metadata: 모든 청크에 공통으로 붙일 메타데이터
+        
+        Returns:
+            추가된 청크 ID 리스트
+        """
+        chunks = self.chunker.chunk(text, metadata)
+        if not chunks:
+            return []
+        
+        texts, metadatas = zip(*chunks)
+        return self.add_texts(list(texts), list(metadatas))
+    
+    def encode_query(self, query: str) -> List[float]:
         """
-        if metadata is None:
-            metadata = {"source": docx_path}
+        질문 임베딩 (정규화된 질문 기준으로 캐시)
         
-        # Word 문서 읽기
-        doc = Document(docx_path)
+        Args:
+            query: 검색 질문
+        
+        Returns:
+            임베딩 벡터
+        """
+        cache_key = normalize_query(query)
+        embedding = self.embedding_cache.get(cache_key)
         
-        # 전체 텍스트 추출
-        full_text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+        if embedding is None:
+            # 배치 스케줄러를 쓰면 다른 요청과 묶여서 끝날 때까지 기다린 시간도 포함
+            with stage_timer('encode'):
+                if self.encode_batcher is not None:
+                    embedding = self.encode_batcher.encode(query).tolist()
+                else:
+                    embedding = self.embedding_model.encode(query).tolist()
+            self.embedding_cache.set(cache_key, embedding)
         
-        return self.add_text(full_text, metadata)
+        return embedding
     
-    def search(self, query: str, n_results: int = 3) -> List[Dict]:
+    def _encode_query_batch(self, queries: List[str]) -> np.ndarray:
+        """질문 여러 개를 한 번에 임베딩 (EncodeBatcher 백그라운드 스레드에서 호출)"""
+        return self.embedding_model.encode(queries, batch_size=len(queries), show_progress_bar=False)
+    
+    def encode_batch_stats(self) -> Dict:
+        """질문 임베딩 배치 통계 (묶어서 실행하지 않으면 enabled=False)"""
+        if self.encode_batcher is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.encode_batcher.stats()}
+    
+    def search(
+        self,
+        query: str,
+        n_results: int = 3,
+        where: Optional[Dict] = None,
+        mode: Optional[str] = None
+    ) -> List[Dict]:
         """
         질문과 관련된 문서 검색
         
         Args:
             query: 검색 질문
             n_results: 반환할 문서 개수
+            where: 메타데이터 조건 (예: {"grade": "3학년"}, build_where 참고)
+            mode: 검색 방식 (vector / keyword / hybrid, 기본값 search_mode)
         
         Returns:
-            검색 결과 리스트
+            검색 결과 리스트 (id/text/metadata/distance, hybrid/keyword는 score 포함)
         """
+        with stage_timer('search'):
+            return self._search(query, n_results, where, mode)
+    
+    def _search(self, query: str, n_results: int, where: Optional[Dict], mode: Optional[str]) -> List[Dict]:
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"지원하지 않는 검색 방식입니다: {mode}")
+        
+        cache_key = (normalize_query(query), n_results, json.dumps(where, sort_keys=True, ensure_ascii=False), mode)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return [dict(result) for result in cached]
+        
+        # 검색 도중 문서가 바뀌면 결과를 캐시하지 않도록 버전을 기억
+        version = self._collection_version
+        
+        if mode == 'vector':
+            formatted_results = self._vector_search(query, n_results, where)
+        elif mode == 'keyword':
+            formatted_results = self._fetch_results(self._keyword_search(query, n_results, where))
+        else:
+            formatted_results = self._hybrid_search(query, n_results, where)
+        
+        if version == self._collection_version:
+            self.search_cache.set(cache_key, [dict(result) for result in formatted_results])
+        
+        return formatted_results
+    
+    def _vector_search(self, query: str, n_results: int, where: Optional[Dict] = None) -> List[Dict]:
+        """임베딩 유사도 검색"""
         # 질문 임베딩
-        query_embedding = self.embedding_model.encode(query).tolist()
+        query_embedding = self.encode_query(query)
+        
+        if where:
+            # 조건 없이 넉넉히 뽑은 결과에서 먼저 걸러 봄
+            candidates = self._vector_query(query_embedding, n_results * FILTER_OVERFETCH)
+            matched = [result for result in candidates if matches_where(result['metadata'], where)]
+            if len(matched) >= n_results or len(candidates) < n_results * FILTER_OVERFETCH:
+                return matched[:n_results]
+        
+        return self._vector_query(query_embedding, n_results, where)
+    
+    def _keyword_search(self, query: str, n_results: int, where: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """BM25 키워드 검색 → (문서 ID, 점수) 리스트"""
+        with stage_timer('keyword'):
+            return self.keyword_index.search(query, n_results, where)
+    
+    def _vector_query(self, query_embedding: List[float], n_results: int, where: Optional[Dict] = None) -> List[Dict]:
+        with stage_timer('vector_query'):
+            return self._query_vectors(query_embedding, n_results, where)
+    
+    def _query_vectors(self, query_embedding: List[float], n_results: int, where: Optional[Dict] = None) -> List[Dict]:
+        # 압축 색인은 조건 없는 검색에만 사용 (where 검색은 ChromaDB가 조건에 맞는 문서만 비교)
+        if self.vector_index_mode != 'chroma' and not where:
+            return self._compact_vector_query(query_embedding, n_results)
         
         # 유사도 검색
         results = self.collection.query(
             query_embeddings=[query_embedding],
-            n_results=n_results
+            n_results=n_results,
+            where=where or None
         )
         
         # 결과 포맷팅
@@ -151,19 +884,107 @@ class RAGManager:
         
         return formatted_results
     
-    def get_context_for_query(self, query: str, n_results: int = 3) -> str:
+    def _compact_vector_query(self, query_embedding: List[float], n_results: int) -> List[Dict]:
+        """압축 벡터로 후보를 넉넉히 뽑고, 저장된 float32 임베딩으로 정확한 거리를 다시 계산해서 정렬"""
+        candidates = self.vector_index.search(query_embedding, n_results * RERANK_CANDIDATES)
+        if not candidates:
+            return []
+        
+        found = self.collection.get(
+            ids=[doc_id for doc_id, _ in candidates],
+            include=['embeddings', 'documents', 'metadatas']
+        )
+        if not found['ids']:
+            return []
+        
+        query = np.asarray(query_embedding, dtype=np.float32)
+        differences = np.asarray(found['embeddings'], dtype=np.float32) - query
+        distances = np.einsum('ij,ij->i', differences, differences)
+        order = np.argsort(distances, kind='stable')[:n_results]
+        return [
+            {
+                'id': found['ids'][i],
+                'text': found['documents'][i],
+                'metadata': found['metadatas'][i],
+                'distance': float(distances[i])
+            }
+            for i in order
+        ]
+    
+    def _fetch_results(self, scored: List[Tuple[str, float]], known: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+        """(문서 ID, 점수) 리스트 → 검색 결과 (본문/메타데이터는 이미 가진 것 외에만 조회)"""
+        known = known or {}
+        missing = [doc_id for doc_id, _ in scored if doc_id not in known]
+        fetched = {}
+        if missing:
+            found = self.collection.get(ids=missing, include=['documents', 'metadatas'])
+            fetched = {
+                doc_id: {'id': doc_id, 'text': text, 'metadata': metadata, 'distance': None}
+                for doc_id, text, metadata in zip(found['ids'], found['documents'], found['metadatas'])
+            }
+        
+        results = []
+        for doc_id, score in scored:
+            result = known.get(doc_id) or fetched.get(doc_id)
+            if result is not None:
+                results.append({**result, 'score': round(score, 6)})
+        return results
+    
+    def _hybrid_search(self, query: str, n_results: int, where: Optional[Dict] = None) -> List[Dict]:
+        """벡터 검색과 BM25 검색 결과를 순위 기반으로 합침 (Reciprocal Rank Fusion)"""
+        candidates = n_results * HYBRID_CANDIDATES
+        vector_results = self._vector_search(query, candidates, where)
+        keyword_results = self._keyword_search(query, candidates, where)
+        
+        scores = {}
+        for rank, result in enumerate(vector_results):
+            scores[result['id']] = scores.get(result['id'], 0.0) + 1.0 / (RRF_K + rank + 1)
+        for rank, (doc_id, _) in enumerate(keyword_results):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:n_results]
+        return self._fetch_results(ranked, known={result['id']: result for result in vector_results})
+    
+    def get_context_for_query(self, query: str, n_results: int = 3, where: Optional[Dict] = None) -> str:
         """
         질문에 대한 컨텍스트 생성 (LLM에 전달할 용도)
         
         Args:
             query: 사용자 질문
             n_results: 검색할 문서 개수
+            where: 메타데이터 조건
         
         Returns:
             컨텍스트 텍스트
         """
-        results = self.search(query, n_results)
+        return self.format_context(self.search(query, n_results, where))
+    
+    def retrieve(self, query: str, n_results: int = 3, where: Optional[Dict] = None) -> Tuple[str, List[Dict]]:
+        """
+        한 번의 검색으로 컨텍스트와 검색 결과를 함께 반환
+        
+        Args:
+            query: 사용자 질문
+            n_results: 검색할 문서 개수
+            where: 메타데이터 조건
+        
+        Returns:
+            (컨텍스트 텍스트, 검색 결과 리스트 - id/text/metadata/distance)
+        """
+        results = self.search(query, n_results, where)
+        return self.format_context(results), results
+    
+    @staticmethod
+    def format_context(results: List[Dict]) -> str:
+        """
+        검색 결과를 LLM에 전달할 컨텍스트 텍스트로 변환
         
+        Args:
+            results: search() 결과 리스트
+        
+        Returns:
+            컨텍스트 텍스트
+        """
         if not results:
             return ""
         
@@ -179,27 +1000,138 @@ class RAGManager:
         
         return "\n".join(context_parts)
     
+    def delete_documents(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> int:
+        """
+        문서 삭제 (ID 목록 또는 메타데이터 조건)
+        
+        Args:
+            ids: 삭제할 문서 ID 리스트
+            where: 메타데이터 조건 (예: {"source": "lesson.pdf"})
+        
+        Returns:
+            삭제한 문서 수
+        """
+        if not ids and not where:
+            return 0
+        
+        # 통계를 줄이기 위해 삭제할 문서의 메타데이터만 먼저 조회
+        found = self.collection.get(ids=ids or None, where=where or None, include=['metadatas'])
+        if not found['ids']:
+            return 0
+        
+        self.collection.delete(ids=found['ids'])
+        self._update_keyword_index(removed=found['ids'])
+        self._update_vector_index(removed=found['ids'])
+        self.stats.remove(found['metadatas'])
+        self.stats.save()
+        
+        # 청크가 하나도 남지 않은 파일은 파일 목록에서도 삭제
+        sources = {metadata.get('source') for metadata in found['metadatas'] if metadata}
+        emptied = [source for source in sources if self.documents.get(source)
+                   and not self.collection.get(where={'source': source}, limit=1, include=[])['ids']]
+        if emptied:
+            self.documents.remove(emptied)
+            self.documents.save()
+        self._invalidate_search_cache()
+        self._notify_change('delete', found['ids'])
+        return len(found['ids'])
+    
     def clear_collection(self):
         """모든 문서 삭제"""
-        self.client.delete_collection(name="elementary_materials")
-        self.collection = self.client.create_collection(
-            name="elementary_materials",
+        # 컬렉션을 아직 한 번도 로드하지 않았으면 먼저 로드 (없는 컬렉션은 삭제할 수 없음)
+        self.collection
+        self.client.delete_collection(name=COLLECTION_NAME)
+        self._collection = self.client.create_collection(
+            name=COLLECTION_NAME,
             metadata={"description": "초등학생 학습 자료"}
         )
+        self._update_keyword_index(clear=True)
+        self._update_vector_index(clear=True)
+        self.stats.clear()
+        self.stats.save()
+        self.documents.clear()
+        self.documents.save()
+        self._invalidate_search_cache()
+        self._notify_change('clear')
     
-    def get_stats(self) -> Dict:
-        """저장된 문서 통계"""
-        data = self.collection.get()
+    def count_documents(self) -> int:
+        """저장된 문서(청크) 수 (전체 문서를 읽지 않음)"""
+        return self.collection.count()
+    
+    def cache_stats(self) -> Dict:
+        """질문 캐시 적중/미스 통계"""
+        return {
+            'embedding': self.embedding_cache.stats(),
+            'search': self.search_cache.stats()
+        }
+    
+    def get_stats(self, detailed: bool = True) -> Dict:
+        """
+        저장된 문서 통계 (카운터에서 바로 읽으므로 코퍼스 크기와 무관)
+        
+        Args:
+            detailed: True면 과목/학년/주제/출처별 통계와 벡터 색인 크기,
+                False면 총 개수와 과목별 개수만 (/health 처럼 자주 부르는 곳)
+        """
+        # 컬렉션이 로드될 때 통계도 함께 불러옴
+        self.collection
+        if not detailed:
+            return self.stats.summary()
+        stats = self.stats.snapshot()
+        stats['vector_index'] = self.vector_index_stats()
+        return stats
+    
+    def vector_index_stats(self) -> Dict:
+        """
+        벡터 색인 크기
         
-        subjects = {}
-        for metadata in data['metadatas']:
-            subject = metadata.get('subject', '미분류')
-            subjects[subject] = subjects.get(subject, 0) + 1
+        압축 색인(float16/int8)은 ChromaDB 색인 옆에 하나 더 두는 것이라서,
+        total_bytes(압축 색인)와 함께 ChromaDB의 float32 벡터 / HNSW 파일 크기도 알려 줘요.
         
+        Returns:
+            mode, vectors, dimension, bytes_per_vector, total_bytes, float32_bytes,
+            chroma_bytes (ChromaDB HNSW 색인 크기, 아직 디스크에 쓰지 않았으면 float32 벡터 크기),
+            footprint_bytes (압축 색인 + ChromaDB, 벡터 검색에 쓰는 전체 크기)
+            압축 색인이 아직 로드되지 않았으면 mode 와 loaded=False 만 (통계 때문에 색인을 로드/재구축하지 않음)
+        """
+        if self.vector_index_mode != 'chroma':
+            if self._vector_index is None:
+                return {'mode': self.vector_index_mode, 'loaded': False}
+            stats = self.vector_index.stats()
+            stats['loaded'] = True
+            stats['chroma_bytes'] = max(self._chroma_hnsw_bytes(), stats['float32_bytes'])
+            stats['footprint_bytes'] = stats['total_bytes'] + stats['chroma_bytes']
+            return stats
+        
+        count = self.collection.count()
+        if self._vector_dimension is None and count:
+            sample = self.collection.get(limit=1, include=['embeddings'])['embeddings']
+            self._vector_dimension = len(sample[0]) if sample else None
+        dimension = self._vector_dimension or 0
+        chroma_bytes = max(self._chroma_hnsw_bytes(), count * dimension * 4)
         return {
-            'total_documents': len(data['ids']),
-            'subjects': subjects
+            'mode': 'chroma',
+            'vectors': count,
+            'dimension': self._vector_dimension,
+            'bytes_per_vector': dimension * 4,
+            'total_bytes': count * dimension * 4,
+            'float32_bytes': count * dimension * 4,
+            'chroma_bytes': chroma_bytes,
+            'footprint_bytes': chroma_bytes,
         }
+    
+    def _chroma_hnsw_bytes(self) -> int:
+        """ChromaDB HNSW 색인 파일 크기 합계 (벡터 DB 폴더 안의 세그먼트 폴더들, float32 벡터 + 그래프)"""
+        total = 0
+        if not os.path.isdir(self.persist_directory):
+            return total
+        for entry in os.scandir(self.persist_directory):
+            if not entry.is_dir() or entry.name == VECTOR_INDEX_DIR:
+                continue
+            if not os.path.exists(os.path.join(entry.path, 'header.bin')):
+                continue
+            total += sum(item.stat().st_size for item in os.scandir(entry.path) if item.is_file())
+        return total
 
 
 # 사용 예시
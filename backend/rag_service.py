@@ -0,0 +1,533 @@
+"""
+여러 서버 프로세스가 함께 쓰는 RAG 서비스
+
+gunicorn/hypercorn 워커를 여러 개 띄우면 워커마다 임베딩 모델과 ChromaDB 클라이언트를 따로 로드해서
+메모리가 워커 수만큼 늘고, 한 워커에서 올린 문서가 다른 워커의 색인(BM25/압축 벡터/캐시)에는 보이지 않아요.
+
+이 모듈은 RAGManager 와 업로드 대기열(IngestJobQueue)을 프로세스 하나(RAG 서비스)에만 두고,
+웹 워커는 로컬 소켓(multiprocessing.connection)으로 요청을 보내요.
+- 임베딩 모델 / 벡터 DB / 키워드 색인 / 질문 캐시는 서비스에 하나만 있음
+- 동시에 들어온 질문 임베딩은 서비스의 EncodeBatcher 가 워커와 상관없이 묶어서 처리
+- 업로드 처리도 서비스에서 하므로 어느 워커에서 올린 문서든 모든 워커의 검색에 바로 보임
+- 문서 삭제 알림은 모든 워커로 보내서 워커별 답변 캐시를 무효화
+
+워커마다 따로 있는 것 (워커 수만큼 나뉨):
+- 대화 세션: 기본 memory 저장소는 워커별이라 다음 질문이 다른 워커로 가면 이전 대화가 없으므로
+  워커 여러 개로 띄울 때는 SESSION_STORE=sqlite 로 같은 DB 파일을 함께 써요 (gunicorn.conf.py 는 자동 설정)
+- 의미 기반 답변 캐시(answer_cache.py)와 모델 라우터 통계(/router/stats): 워커마다 따로 쌓여요
+
+보안: 서비스는 받은 요청을 pickle 로 풀기 때문에 인증 키를 아는 프로세스는 서비스에서 코드를 실행할 수 있어요.
+- RAG_SERVICE_AUTHKEY 는 기본값이 없어서 설정하지 않으면 서비스/워커 모두 시작하지 않아요
+  (gunicorn.conf.py 는 시작할 때마다 임의의 키를 만들어 환경 변수로 서비스와 워커에 넘겨요)
+- host:port 주소는 루프백(127.0.0.1, localhost)만 허용하고, 유닉스 소켓은 소유자만 접근(0600)
+
+실행 (backend 폴더에서):
+    gunicorn -c gunicorn.conf.py server:app     # 서비스 + Flask 워커 여러 개
+    export RAG_SERVICE_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+    RAG_SERVICE_ADDRESS=./rag_service.sock python rag_service.py          # 서비스만 실행
+    RAG_SERVICE_ADDRESS=./rag_service.sock SESSION_STORE=sqlite hypercorn async_server:app --workers 4
+
+워커는 RAG_SERVICE_ADDRESS 가 설정되어 있으면 RAGManager 대신 RemoteRAGManager 를 써요.
+"""
+import ipaddress
+import os
+import pickle
+import queue
+import signal
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional, Tuple, Union
+
+from ingest_jobs import QueueFullError
+from metrics import RequestTrace, observe_stage, use_trace
+
+# 기본 설정 (환경 변수로 변경 가능)
+# - RAG_SERVICE_ADDRESS: 유닉스 소켓 경로 또는 루프백 host:port (비어 있으면 서비스를 쓰지 않고 워커 안에서 RAGManager 사용)
+# - RAG_SERVICE_AUTHKEY: 연결 인증 키 (서비스와 워커가 같아야 함, 기본값 없음 - 필수)
+# - RAG_SERVICE_TIMEOUT: 요청 하나의 응답 제한 시간(초)
+# - RAG_SERVICE_CONNECTIONS: 워커 하나가 유지하는 최대 유휴 연결 수
+RAG_SERVICE_ADDRESS = os.getenv("RAG_SERVICE_ADDRESS", "")
+RAG_SERVICE_AUTHKEY = os.getenv("RAG_SERVICE_AUTHKEY", "").encode("utf-8")
+RAG_SERVICE_TIMEOUT = float(os.getenv("RAG_SERVICE_TIMEOUT", "300"))
+RAG_SERVICE_CONNECTIONS = int(os.getenv("RAG_SERVICE_CONNECTIONS", "16"))
+
+# 워커가 호출할 수 있는 메서드 (이 목록에 없는 이름은 거절)
+RAG_METHODS = (
+    'encode_query', 'search', 'retrieve', 'get_context_for_query',
+    'add_text', 'add_texts', 'add_file', 'ingest_document',
+    'find_duplicate_file', 'finalize_document', 'delete_documents', 'clear_collection',
+    'count_documents', 'get_stats', 'rebuild_stats', 'vector_index_stats',
+    'cache_stats', 'encode_batch_stats', 'is_ready', 'readiness', 'warm_up',
+)
+INGEST_METHODS = ('submit', 'get', 'list_jobs', 'stats')
+
+# 서비스에서 난 오류 중 워커에서도 같은 종류로 다시 발생시키는 것 (나머지는 RAGServiceError)
+REMOTE_ERRORS = {
+    error.__name__: error
+    for error in (ValueError, KeyError, FileNotFoundError, TimeoutError, QueueFullError)
+}
+
+
+class RAGServiceError(RuntimeError):
+    """RAG 서비스에 연결할 수 없거나 서비스에서 처리하지 못한 오류"""
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """
+    'host:port' → (host, port), 그 밖에는 유닉스 소켓 경로
+
+    요청을 pickle 로 주고받으므로 host 는 루프백만 허용해요 (다른 호스트에 열면 ValueError).
+    """
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit() and os.sep not in address:
+        host = host or '127.0.0.1'
+        if not is_loopback(host):
+            raise ValueError(f"RAG 서비스는 루프백 주소에서만 열 수 있습니다: {host}")
+        return host, int(port)
+    return address
+
+
+def is_loopback(host: str) -> bool:
+    """localhost / 127.0.0.0/8 인지 (이름은 localhost 만 허용하고 DNS 조회는 하지 않음, TCP 주소는 IPv4만 지원)"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.IPv4Address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def require_authkey(authkey: bytes) -> bytes:
+    """인증 키가 비어 있으면 RAGServiceError (기본 키로 열린 서비스는 누구나 코드를 실행할 수 있음)"""
+    if not authkey:
+        raise RAGServiceError("RAG_SERVICE_AUTHKEY 를 설정해야 합니다 (기본 키는 없음)")
+    return authkey
+
+
+class RAGService:
+    """
+    RAGManager / IngestJobQueue 를 로컬 소켓으로 제공하는 서버
+
+    연결마다 스레드 하나가 요청을 처리해요 (워커의 연결 풀이 요청 스레드 수만큼 연결을 만듦).
+    요청: (대상, 메서드, args, kwargs) → 응답: ('ok', 결과, 단계별 시간) / ('error', 오류 종류, 메시지, 단계별 시간)
+    """
+
+    def __init__(self, rag_manager, ingest_jobs=None, address: str = RAG_SERVICE_ADDRESS,
+                 authkey: bytes = RAG_SERVICE_AUTHKEY):
+        """
+        Args:
+            rag_manager: 공유할 RAGManager
+            ingest_jobs: 공유할 IngestJobQueue (None이면 업로드 요청 거절)
+            address: 유닉스 소켓 경로 또는 host:port
+            authkey: 연결 인증 키
+        """
+        if not address:
+            raise ValueError("RAG 서비스 주소(RAG_SERVICE_ADDRESS)가 필요합니다")
+        self.rag_manager = rag_manager
+        self.ingest_jobs = ingest_jobs
+        self.address = parse_address(address)
+        self.authkey = require_authkey(authkey)
+        self._listener = None
+        self._closed = threading.Event()
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+
+        rag_manager.add_change_listener(self._broadcast)
+
+    def _bind(self) -> Listener:
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            # 이전 서비스가 남긴 소켓 파일이면 지우고, 실제로 다른 서비스가 떠 있으면 중단
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.remove(self.address)
+            except Exception:
+                raise RAGServiceError(f"이미 실행 중인 RAG 서비스가 있습니다: {self.address}")
+            if os.path.exists(self.address):
+                raise RAGServiceError(f"이미 실행 중인 RAG 서비스가 있습니다: {self.address}")
+
+        # 소켓 파일은 만들어질 때부터 소유자만 접근하도록 (bind 후 chmod 하면 그 사이에 다른 사용자가 연결 가능)
+        previous_umask = os.umask(0o177)
+        try:
+            return Listener(self.address, authkey=self.authkey, backlog=128)
+        finally:
+            os.umask(previous_umask)
+
+    def start(self) -> 'RAGService':
+        """백그라운드 스레드에서 연결 받기 시작"""
+        self._listener = self._bind()
+        threading.Thread(target=self._accept_loop, name='rag-service', daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        """현재 스레드에서 연결 받기 (close() 또는 종료 신호까지)"""
+        self._listener = self._bind()
+        self._accept_loop()
+
+    def _accept_loop(self):
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                # close()로 리스너를 닫았거나 인증에 실패한 연결
+                continue
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), name='rag-service-conn', daemon=True).start()
+
+    def _handle(self, conn):
+        try:
+            while True:
+                target, method, args, kwargs = conn.recv()
+                if target == 'events':
+                    # 이 연결은 문서 변경 알림 전용으로 사용 (닫지 않고 보관)
+                    conn.send(('ok', None, {}))
+                    with self._subscribers_lock:
+                        self._subscribers.append(conn)
+                    return
+                reply = self._dispatch(target, method, args, kwargs)
+                try:
+                    conn.send(reply)
+                except (pickle.PicklingError, TypeError, AttributeError) as e:
+                    # 보낼 수 없는 결과 (직렬화는 쓰기 전에 하므로 연결은 그대로 사용 가능)
+                    conn.send(('error', 'RAGServiceError', f"응답을 보낼 수 없습니다 ({method}): {e}", reply[-1]))
+        except (EOFError, OSError):
+            conn.close()
+
+    def _dispatch(self, target: str, method: str, args, kwargs) -> Tuple:
+        self.requests += 1
+        # 서비스 안에서 기록한 단계별 시간(encode, search 등)을 워커의 요청 추적으로 돌려줌
+        trace = RequestTrace('rag_service')
+        use_trace(trace)
+        try:
+            if target == 'rag' and method in RAG_METHODS:
+                result = getattr(self.rag_manager, method)(*args, **kwargs)
+            elif target == 'rag' and method == 'settings':
+                result = self.settings()
+            elif target == 'ingest' and method in INGEST_METHODS and self.ingest_jobs is not None:
+                result = getattr(self.ingest_jobs, method)(*args, **kwargs)
+            else:
+                raise RAGServiceError(f"지원하지 않는 요청입니다: {target}.{method}")
+            return 'ok', result, trace.stages
+        except Exception as e:
+            return 'error', type(e).__name__, str(e), trace.stages
+        finally:
+            use_trace(None)
+
+    def settings(self) -> Dict:
+        """워커가 속성으로 읽는 설정값"""
+        return {
+            'search_mode': self.rag_manager.search_mode,
+            'vector_index_mode': self.rag_manager.vector_index_mode,
+            'embedding_backend': self.rag_manager.embedding_backend,
+            'write_batch_size': self.rag_manager.write_batch_size,
+        }
+
+    def _broadcast(self, event: str, doc_ids: Optional[List[str]] = None):
+        """문서 변경 알림을 모든 워커에 전달 (끊어진 워커는 목록에서 제거)"""
+        with self._subscribers_lock:
+            alive = []
+            for conn in self._subscribers:
+                try:
+                    conn.send(('event', event, doc_ids))
+                    alive.append(conn)
+                except (EOFError, OSError):
+                    conn.close()
+            self._subscribers = alive
+
+    def close(self):
+        self._closed.set()
+        if self._listener is not None:
+            self._listener.close()
+        with self._subscribers_lock:
+            for conn in self._subscribers:
+                conn.close()
+            self._subscribers = []
+
+    def stats(self) -> Dict:
+        with self._subscribers_lock:
+            subscribers = len(self._subscribers)
+        return {'connections': self.connections, 'requests': self.requests, 'workers': subscribers}
+
+
+class _RemoteClient:
+    """RAG 서비스 연결 풀 (요청 스레드마다 연결 하나를 빌려 쓰고 돌려놓음)"""
+
+    def __init__(self, address: str, authkey: bytes, timeout: float, max_idle: int):
+        self.address = parse_address(address)
+        self.authkey = require_authkey(authkey)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max(1, max_idle))
+
+    def connect(self):
+        try:
+            return Client(self.address, authkey=self.authkey)
+        except OSError as e:
+            raise RAGServiceError(f"RAG 서비스에 연결할 수 없습니다 ({self.address}): {e}")
+
+    def call(self, target: str, method: str, *args, **kwargs):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+
+        try:
+            conn.send((target, method, args, kwargs))
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"RAG 서비스 응답 시간 초과 ({target}.{method}, {self.timeout}초)")
+            reply = conn.recv()
+        except TimeoutError:
+            # 늦게 도착한 응답이 다음 요청과 섞이지 않도록 연결을 버림
+            conn.close()
+            raise
+        except (EOFError, OSError) as e:
+            conn.close()
+            raise RAGServiceError(f"RAG 서비스 연결이 끊어졌습니다 ({target}.{method}): {e}")
+
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+        stages = reply[-1]
+        for stage, seconds in stages.items():
+            observe_stage(stage, seconds)
+        if reply[0] == 'ok':
+            return reply[1]
+        _, error_type, message, _ = reply
+        raise REMOTE_ERRORS.get(error_type, RAGServiceError)(message)
+
+
+class RemoteRAGManager:
+    """
+    RAG 서비스에 요청을 보내는 RAGManager 대역 (서버가 쓰는 메서드만 제공)
+
+    메서드 이름과 인자는 RAGManager 와 같아요.
+    """
+
+    def __init__(self, address: str = RAG_SERVICE_ADDRESS, authkey: bytes = RAG_SERVICE_AUTHKEY,
+                 timeout: float = RAG_SERVICE_TIMEOUT, max_idle_connections: int = RAG_SERVICE_CONNECTIONS):
+        """
+        Args:
+            address: 유닉스 소켓 경로 또는 host:port
+            authkey: 연결 인증 키
+            timeout: 요청 하나의 응답 제한 시간(초)
+            max_idle_connections: 유지하는 최대 유휴 연결 수
+        """
+        self.address = address
+        self._client = _RemoteClient(address, authkey, timeout, max_idle_connections)
+        self._settings = None
+        self._change_listeners = []
+        self._events_thread = None
+        self._events_lock = threading.Lock()
+
+    def _call(self, method: str, *args, **kwargs):
+        return self._client.call('rag', method, *args, **kwargs)
+
+    def _setting(self, name: str):
+        if self._settings is None:
+            self._settings = self._call('settings')
+        return self._settings[name]
+
+    @property
+    def search_mode(self) -> str:
+        return self._setting('search_mode')
+
+    @property
+    def vector_index_mode(self) -> str:
+        return self._setting('vector_index_mode')
+
+    @property
+    def embedding_backend(self) -> str:
+        return self._setting('embedding_backend')
+
+    @property
+    def write_batch_size(self) -> int:
+        return self._setting('write_batch_size')
+
+    def encode_query(self, query: str) -> List[float]:
+        return self._call('encode_query', query)
+
+    def search(self, query: str, n_results: int = 3, where: Optional[Dict] = None,
+               mode: Optional[str] = None) -> List[Dict]:
+        return self._call('search', query, n_results, where, mode)
+
+    def retrieve(self, query: str, n_results: int = 3, where: Optional[Dict] = None) -> Tuple[str, List[Dict]]:
+        return self._call('retrieve', query, n_results, where)
+
+    def get_context_for_query(self, query: str, n_results: int = 3, where: Optional[Dict] = None) -> str:
+        return self._call('get_context_for_query', query, n_results, where)
+
+    def add_text(self, text: str, metadata: Dict = None) -> str:
+        return self._call('add_text', text, metadata)
+
+    def add_texts(self, texts: List[str], metadatas: Optional[List[Dict]] = None, **kwargs) -> List[str]:
+        return self._call('add_texts', texts, metadatas, **kwargs)
+
+    def add_file(self, path: str, metadata: Dict = None, **kwargs) -> List[str]:
+        return self._call('add_file', path, metadata, **kwargs)
+
+    def ingest_document(self, path: str, metadata: Dict = None, **kwargs) -> Dict:
+        return self._call('ingest_document', path, metadata, **kwargs)
+
+    def find_duplicate_file(self, file_hash: str) -> Optional[str]:
+        return self._call('find_duplicate_file', file_hash)
+
+    def delete_documents(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> int:
+        return self._call('delete_documents', ids, where)
+
+    def clear_collection(self):
+        return self._call('clear_collection')
+
+    def count_documents(self) -> int:
+        return self._call('count_documents')
+
+    def get_stats(self, detailed: bool = True) -> Dict:
+        return self._call('get_stats', detailed)
+
+    def rebuild_stats(self) -> Dict:
+        return self._call('rebuild_stats')
+
+    def vector_index_stats(self) -> Dict:
+        return self._call('vector_index_stats')
+
+    def cache_stats(self) -> Dict:
+        return self._stats_or_error('cache_stats')
+
+    def encode_batch_stats(self) -> Dict:
+        return self._stats_or_error('encode_batch_stats')
+
+    def _stats_or_error(self, method: str) -> Dict:
+        """/health 용 통계 (서비스에 연결할 수 없어도 오류 대신 사유를 돌려줌)"""
+        try:
+            return self._call(method)
+        except RAGServiceError as e:
+            return {'error': str(e)}
+
+    def is_ready(self) -> bool:
+        try:
+            return self._call('is_ready')
+        except RAGServiceError:
+            return False
+
+    def readiness(self) -> Dict:
+        """서비스 쪽 구성요소 상태 (서비스에 연결할 수 없으면 ready=False)"""
+        try:
+            readiness = self._call('readiness')
+        except RAGServiceError as e:
+            return {'ready': False, 'service': self.address, 'error': str(e)}
+        readiness['service'] = self.address
+        return readiness
+
+    def warm_up(self):
+        return self._call('warm_up')
+
+    def start_warm_up(self):
+        """서비스가 시작할 때 이미 준비하므로 워커에서는 할 일 없음"""
+        return None
+
+    def add_change_listener(self, listener):
+        """
+        문서 변경 알림 받기 (서비스에 알림 전용 연결을 하나 열고 백그라운드 스레드에서 수신)
+
+        서비스가 재시작되면 다시 연결하고, 그 사이 놓친 변경이 있을 수 있으므로 'clear' 로 알려요.
+        """
+        self._change_listeners.append(listener)
+        with self._events_lock:
+            if self._events_thread is None:
+                self._events_thread = threading.Thread(target=self._events_loop, name='rag-service-events', daemon=True)
+                self._events_thread.start()
+
+    def _notify_change(self, event: str, doc_ids: Optional[List[str]] = None):
+        for listener in list(self._change_listeners):
+            try:
+                listener(event, doc_ids)
+            except Exception as e:
+                print(f"⚠️  문서 변경 알림 처리 실패: {e}")
+
+    def _events_loop(self):
+        connected_before = False
+        while True:
+            try:
+                conn = self._client.connect()
+                conn.send(('events', None, (), {}))
+                conn.recv()
+            except (RAGServiceError, EOFError, OSError):
+                time.sleep(1.0)
+                continue
+
+            if connected_before:
+                self._notify_change('clear')
+            connected_before = True
+            try:
+                while True:
+                    _, event, doc_ids = conn.recv()
+                    self._notify_change(event, doc_ids)
+            except (EOFError, OSError):
+                conn.close()
+                time.sleep(1.0)
+
+
+class RemoteIngestJobs:
+    """RAG 서비스의 업로드 대기열에 요청을 보내는 IngestJobQueue 대역"""
+
+    def __init__(self, rag_manager: RemoteRAGManager):
+        self._client = rag_manager._client
+
+    def start(self) -> 'RemoteIngestJobs':
+        return self
+
+    def submit(self, filepath: str, filename: str, metadata: Dict) -> Dict:
+        return self._client.call('ingest', 'submit', os.path.abspath(filepath), filename, metadata)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self._client.call('ingest', 'get', job_id)
+
+    def list_jobs(self, limit: int = 50, status: Optional[str] = None) -> List[Dict]:
+        return self._client.call('ingest', 'list_jobs', limit, status)
+
+    def stats(self) -> Dict:
+        try:
+            return self._client.call('ingest', 'stats')
+        except RAGServiceError as e:
+            return {'error': str(e)}
+
+
+def main():
+    from ingest_jobs import IngestJobQueue
+    from rag_manager import RAGManager
+    from seed_materials import load_seed_materials
+
+    address = RAG_SERVICE_ADDRESS or "./rag_service.sock"
+    # 모델을 로드하기 전에 주소/인증 키부터 확인
+    parse_address(address)
+    require_authkey(RAG_SERVICE_AUTHKEY)
+    print("=" * 60)
+    print(f"🧠 RAG 서비스 시작: {address}")
+    print("=" * 60)
+
+    rag_manager = RAGManager()
+    print("⏳ 임베딩 모델/벡터 DB 로딩 중...")
+    rag_manager.warm_up()
+    load_seed_materials(rag_manager)
+    print(f"✅ 총 {rag_manager.count_documents()}개 문서 로드 완료")
+
+    ingest_jobs = IngestJobQueue(rag_manager).start()
+    service = RAGService(rag_manager, ingest_jobs, address)
+
+    def stop(signum, frame):
+        service.close()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print("🚀 워커 연결 대기 중\n")
+    service.serve_forever()
+    if isinstance(service.address, str) and os.path.exists(service.address):
+        os.remove(service.address)
+    print("👋 RAG 서비스 종료")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from typing import List
+
+# 서버 시작 시 기본으로 넣어두는 학습 자료 (텍스트, 메타데이터)
+SEED_MATERIALS = [
+    (
+        """분수는 전체를 똑같이 나눈 것 중 일부를 나타내는 수예요.
+        분자는 위에 있는 숫자로, 선택한 부분의 개수를 말해요.
+        분모는 아래에 있는 숫자로, 전체를 나눈 개수를 말해요.
+        예를 들어, 피자 한 판을 4등분했을 때 그중 1조각은 1/4(4분의 1)이 돼요.
+        분수를 더할 때는 분모가 같으면 분자끼리만 더하면 돼요.""",
+        {"subject": "수학", "grade": "3학년", "topic": "분수"}
+    ),
+    (
+        """곱셈은 같은 수를 여러 번 더하는 것을 간단하게 나타낸 거예요.
+        예를 들어, 3 × 4는 3을 4번 더한다는 뜻이에요. 즉, 3 + 3 + 3 + 3 = 12죠.
+        곱셈구구는 1부터 9까지의 곱셈을 외우는 거예요.
+        2단은 2, 4, 6, 8... 이렇게 2씩 커지는 규칙이 있어요.""",
+        {"subject": "수학", "grade": "2학년", "topic": "곱셈"}
+    ),
+    (
+        """광합성은 식물이 햇빛을 이용해서 양분을 만드는 과정이에요.
+        식물의 잎에 있는 엽록체라는 곳에서 일어나요.
+        햇빛과 물과 이산화탄소를 이용해서 포도당(양분)과 산소를 만들어요.
+        우리가 숨쉬는 산소도 식물이 광합성을 해서 만들어진 거예요.""",
+        {"subject": "과학", "grade": "4학년", "topic": "광합성"}
+    ),
+]
+
+
+def load_seed_materials(rag_manager) -> List[str]:
+    """
+    기본 학습 자료 로딩
+
+    내용 해시로 ID를 만들기 때문에 이미 저장된 자료는 다시 임베딩하지 않아요.
+    (서버를 몇 번 재시작해도 결과가 같음)
+
+    Returns:
+        기본 자료 문서 ID 리스트
+    """
+    texts = [text for text, _ in SEED_MATERIALS]
+    metadatas = [dict(metadata) for _, metadata in SEED_MATERIALS]
+    return rag_manager.add_texts(texts, metadatas)
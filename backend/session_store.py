@@ -0,0 +1,389 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from text_chunker import approximate_token_count
+
+# 기본 설정 (환경 변수로 변경 가능)
+# - SESSION_STORE: memory(기본) / sqlite
+# - HISTORY_TOKEN_BUDGET: LLM에 넘기는 대화 이력(요약 포함)의 최대 토큰 수
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+SESSION_MAX = int(os.getenv("SESSION_MAX", "1000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", str(60 * 60)))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1024"))
+
+# 요약 길이 제한 (글자 수) - 요약이 계속 길어지지 않도록
+SUMMARY_MAX_CHARS = 800
+
+# 세션별 잠금 개수 (세션 ID 해시로 나눠 씀)
+LOCK_STRIPES = 64
+
+
+def new_session(session_id: Optional[str] = None) -> Dict:
+    """빈 세션 생성"""
+    now = time.time()
+    return {
+        'session_id': session_id or uuid.uuid4().hex,
+        'summary': '',
+        'messages': [],
+        'summarized_messages': 0,
+        'created_at': now,
+        'last_active': now,
+    }
+
+
+class MemorySessionStore:
+    """
+    메모리 세션 저장소
+
+    최근에 사용한 순서(LRU)로 유지하고, 오래 쉬었거나 개수를 넘은 세션부터 지워요.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_MAX, idle_ttl: float = SESSION_IDLE_TTL):
+        """
+        Args:
+            max_sessions: 최대 세션 수 (넘으면 가장 오래 쓰지 않은 세션부터 삭제)
+            idle_ttl: 이 시간(초) 동안 사용하지 않은 세션은 삭제
+        """
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            return json.loads(json.dumps(session))
+
+    def put(self, session: Dict):
+        session['last_active'] = time.time()
+        with self._lock:
+            self._sessions[session['session_id']] = json.loads(json.dumps(session))
+            self._sessions.move_to_end(session['session_id'])
+            self._evict()
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _evict(self):
+        # 앞쪽이 가장 오래 쓰지 않은 세션
+        cutoff = time.time() - self.idle_ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest['last_active'] >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'idle_ttl': self.idle_ttl,
+                'evictions': self.evictions,
+            }
+
+
+class SQLiteSessionStore:
+    """
+    SQLite 세션 저장소 (서버를 재시작해도 대화가 유지됨)
+
+    last_active 인덱스로 오래 쉰 세션과 개수를 넘은 세션을 지워요.
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH, max_sessions: int = SESSION_MAX,
+                 idle_ttl: float = SESSION_IDLE_TTL):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, last_active REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_active ON sessions(last_active)")
+        self._conn.commit()
+        self.evictions = 0
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, last_active FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None or row[1] < time.time() - self.idle_ttl:
+                return None
+            return json.loads(row[0])
+
+    def put(self, session: Dict):
+        session['last_active'] = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, last_active) VALUES (?, ?, ?)",
+                (session['session_id'], json.dumps(session, ensure_ascii=False), session['last_active'])
+            )
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount
+            self._conn.commit()
+            return deleted > 0
+
+    def _evict(self):
+        cursor = self._conn.execute(
+            "DELETE FROM sessions WHERE last_active < ?", (time.time() - self.idle_ttl,)
+        )
+        self.evictions += cursor.rowcount
+
+        count = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        if count > self.max_sessions:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE session_id IN "
+                "(SELECT session_id FROM sessions ORDER BY last_active ASC LIMIT ?)",
+                (count - self.max_sessions,)
+            )
+            self.evictions += cursor.rowcount
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            'sessions': count,
+            'max_sessions': self.max_sessions,
+            'idle_ttl': self.idle_ttl,
+            'evictions': self.evictions,
+        }
+
+
+def create_session_store(backend: str = SESSION_STORE):
+    """환경 설정에 맞는 세션 저장소 생성"""
+    if backend == 'sqlite':
+        return SQLiteSessionStore()
+    return MemorySessionStore()
+
+
+def format_turns(messages: List[Dict]) -> str:
+    """대화 메시지를 '학생: ... / 선생님: ...' 형식의 텍스트로 변환"""
+    speakers = {'user': '학생', 'assistant': '선생님'}
+    return "\n".join(f"{speakers.get(m['role'], m['role'])}: {m['content']}" for m in messages)
+
+
+def extractive_summary(previous_summary: str, messages: List[Dict]) -> str:
+    """LLM 요약을 쓸 수 없을 때의 대체 요약 (학생 질문 위주로 이어 붙임)"""
+    questions = [m['content'].strip().replace("\n", " ")[:80] for m in messages if m['role'] == 'user']
+    parts = [previous_summary] if previous_summary else []
+    parts.extend(f"- 학생 질문: {question}" for question in questions)
+    return "\n".join(parts)[-SUMMARY_MAX_CHARS:]
+
+
+class SessionManager:
+    """
+    서버 측 대화 세션 관리
+
+    - 클라이언트는 session_id와 새 메시지만 보내고, 대화 이력은 서버가 보관
+    - LLM에는 토큰 예산 안에 들어가는 최근 메시지 + 이전 대화 요약만 전달
+    - 예산을 넘은 오래된 메시지는 기존 요약에 이어서 요약(처음부터 다시 요약하지 않음)
+    """
+
+    def __init__(
+        self,
+        store=None,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        summarizer: Optional[Callable[[str, List[Dict]], str]] = None,
+        token_counter: Callable[[str], int] = approximate_token_count,
+        background: bool = True,
+    ):
+        """
+        Args:
+            store: 세션 저장소 (기본값: 환경 설정에 따라 메모리/SQLite)
+            token_budget: 대화 이력(요약 포함) 최대 토큰 수
+            summarizer: (기존 요약, 새로 밀려난 메시지) → 새 요약 (없거나 실패하면 extractive_summary 사용)
+            token_counter: 토큰 수 계산 함수
+            background: True면 요약을 백그라운드 스레드에서 실행 (응답을 늦추지 않음)
+        """
+        self.store = store if store is not None else create_session_store()
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.count_tokens = token_counter
+        self.background = background
+
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._summarizing = set()
+        self._summarizing_lock = threading.Lock()
+        self._executor = None
+        self.summaries = 0
+        self.summary_failures = 0
+
+    def _lock_for(self, session_id: str) -> threading.Lock:
+        return self._locks[hash(session_id) % LOCK_STRIPES]
+
+    def _message_tokens(self, message: Dict) -> int:
+        # 역할 표시 등 메시지 구분에 드는 토큰 포함
+        return self.count_tokens(message['content']) + 4
+
+    def get_or_create(self, session_id: Optional[str] = None, legacy_history: Optional[List[Dict]] = None) -> Dict:
+        """
+        세션 가져오기 (없거나 만료되었으면 새로 생성)
+
+        새 세션의 ID는 항상 서버가 만들어요. 클라이언트가 보낸 ID로 만들면 남이 고른 ID로 세션을 만들 수 있어서,
+        없는 ID를 보내면 새 ID를 돌려줘요 (클라이언트는 응답의 session_id를 사용).
+
+        Args:
+            session_id: 클라이언트가 보낸 세션 ID
+            legacy_history: 예전 방식 클라이언트가 보낸 대화 이력 (새 세션일 때만 사용)
+        """
+        if session_id:
+            session = self.store.get(session_id)
+            if session is not None:
+                return session
+
+        session = new_session()
+        if legacy_history:
+            session['messages'] = [
+                {'role': m['role'], 'content': m['content']}
+                for m in legacy_history if m.get('role') in ('user', 'assistant') and m.get('content')
+            ]
+        self.store.put(session)
+        return session
+
+    def build_history(self, session: Dict) -> List[Dict]:
+        """
+        토큰 예산에 맞춰 LLM에 넘길 대화 이력 구성
+
+        Returns:
+            [요약 시스템 메시지(있으면)] + 예산 안에 들어가는 최근 메시지들 (시간 순)
+        """
+        history = []
+        budget = self.token_budget
+
+        if session['summary']:
+            summary_message = {'role': 'system', 'content': f"[이전 대화 요약]\n{session['summary']}"}
+            budget -= self._message_tokens(summary_message)
+            history.append(summary_message)
+
+        recent = []
+        for message in reversed(session['messages']):
+            tokens = self._message_tokens(message)
+            if tokens > budget:
+                break
+            budget -= tokens
+            recent.append(message)
+
+        history.extend(reversed(recent))
+        return history
+
+    def record_turn(self, session_id: str, user_message: str, assistant_message: str):
+        """질문/답변 한 턴을 세션에 저장하고, 예산을 넘으면 오래된 메시지 요약"""
+        with self._lock_for(session_id):
+            session = self.store.get(session_id) or new_session(session_id)
+            session['messages'].append({'role': 'user', 'content': user_message})
+            session['messages'].append({'role': 'assistant', 'content': assistant_message})
+            self.store.put(session)
+            needs_summary = self._overflow(session) > 0
+
+        if needs_summary:
+            if self.background:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='session-summary')
+                self._executor.submit(self.summarize, session_id)
+            else:
+                self.summarize(session_id)
+
+    def _overflow(self, session: Dict) -> int:
+        """
+        요약으로 넘길 오래된 메시지 수
+
+        메시지 토큰이 예산을 넘으면 예산의 절반만 남기고 앞쪽을 넘겨요.
+        (매 턴마다 요약하지 않고 몇 턴씩 모아서 요약)
+        """
+        tokens = [self._message_tokens(m) for m in session['messages']]
+        if sum(tokens) <= self.token_budget:
+            return 0
+
+        keep_budget = self.token_budget // 2
+        kept = 0
+        keep_count = 0
+        for count in reversed(tokens):
+            if kept + count > keep_budget:
+                break
+            kept += count
+            keep_count += 1
+        return len(tokens) - keep_count
+
+    def summarize(self, session_id: str):
+        """오래된 메시지를 기존 요약에 이어서 요약 (같은 세션은 한 번에 하나만)"""
+        with self._summarizing_lock:
+            if session_id in self._summarizing:
+                return
+            self._summarizing.add(session_id)
+
+        try:
+            with self._lock_for(session_id):
+                session = self.store.get(session_id)
+                if session is None:
+                    return
+                folded = session['messages'][:self._overflow(session)]
+                previous_summary = session['summary']
+            if not folded:
+                return
+
+            # LLM 호출은 잠금 밖에서 (그동안 새 턴이 뒤에 추가될 수 있음)
+            summary = None
+            if self.summarizer is not None:
+                try:
+                    summary = self.summarizer(previous_summary, folded)
+                except Exception as e:
+                    self.summary_failures += 1
+                    print(f"⚠️  대화 요약 실패, 간단 요약 사용: {e}")
+            if not summary:
+                summary = extractive_summary(previous_summary, folded)
+
+            with self._lock_for(session_id):
+                session = self.store.get(session_id)
+                if session is None:
+                    return
+                # 요약하는 동안 세션이 바뀌었으면(다른 워커가 먼저 요약, 세션을 지우고 다시 시작 등)
+                # 요약한 메시지가 여전히 맨 앞에 있을 때만 제거하고, 아니면 다음 턴에 다시 요약
+                if session['summary'] != previous_summary or session['messages'][:len(folded)] != folded:
+                    return
+                session['messages'] = session['messages'][len(folded):]
+                session['summary'] = summary[-SUMMARY_MAX_CHARS:]
+                session['summarized_messages'] += len(folded)
+                self.store.put(session)
+                self.summaries += 1
+        finally:
+            with self._summarizing_lock:
+                self._summarizing.discard(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        """세션 삭제 (새 대화 시작)"""
+        return self.store.delete(session_id)
+
+    def stats(self) -> Dict:
+        stats = self.store.stats()
+        stats.update({
+            'token_budget': self.token_budget,
+            'summaries': self.summaries,
+            'summary_failures': self.summary_failures,
+        })
+        return stats
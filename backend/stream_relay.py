@@ -0,0 +1,429 @@
+"""
+SSE 스트리밍 중계 (토큰 묶기, keep-alive, 연결 끊김 시 생성 중단)
+
+/chat/stream 이 Ollama 토큰 하나마다 SSE 프레임을 하나씩 보내면 프레임 수가 토큰 수만큼 늘고,
+첫 토큰 전(검색/prefill)에는 아무것도 보내지 않아서 프록시가 연결을 끊거나
+클라이언트가 창을 닫아도 서버가 알아채지 못해요.
+
+StreamRelay 는 답변 조각을 받는 쪽(Ollama 스트림)과 보내는 쪽(SSE 응답)을 나눠서
+- 첫 조각은 바로, 이후 조각은 글자 수(STREAM_FLUSH_CHARS) 또는 시간(STREAM_FLUSH_MS) 기준으로 묶어서 보내고
+- 보낼 것이 없으면 STREAM_HEARTBEAT_SECONDS 마다 SSE 주석(": keep-alive")을 보내고
+- 클라이언트가 연결을 끊으면(쓰기 실패 → 생성기 종료) 받는 쪽을 닫아서 Ollama 생성을 멈춰요.
+  (Ollama 는 HTTP 연결이 닫히면 생성을 중단함. 동기 서버는 받는 쪽 스레드가 다음 토큰을 기다리며 막혀 있으므로
+   close_on_disconnect 로 등록해 둔 Ollama 소켓을 보내는 쪽에서 바로 닫음)
+- 검색/임베딩처럼 답변 전에 오래 걸리는 작업도 run_with_heartbeats / aheartbeats_until 로 기다리면서 keep-alive 를 보내요.
+
+받는 쪽은 따로 실행(동기: 스레드, 비동기: 태스크)하고 크기 제한 큐로 이어서,
+클라이언트가 느리면 큐가 찬 만큼만 앞서 나가고 Ollama 스트림 읽기도 멈춰요.
+"""
+import asyncio
+import contextvars
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Generator, Iterator, List, Optional
+
+from metrics import (
+    METRICS_ENABLED,
+    STREAMS,
+    STREAM_FIRST_CONTENT_SECONDS,
+    STREAM_TOKENS,
+    STREAM_TOKENS_PER_SECOND,
+    RequestTrace,
+)
+
+# 기본 설정 (환경 변수로 변경 가능)
+# - STREAM_FLUSH_CHARS: 이만큼 글자가 모이면 바로 프레임 전송
+# - STREAM_FLUSH_MS: 첫 조각이 모인 뒤 이 시간이 지나면 글자 수와 상관없이 전송
+# - STREAM_HEARTBEAT_SECONDS: 이 시간 동안 보낸 것이 없으면 keep-alive 주석 전송 (0이면 보내지 않음)
+STREAM_FLUSH_CHARS = int(os.getenv("STREAM_FLUSH_CHARS", "24"))
+STREAM_FLUSH_MS = float(os.getenv("STREAM_FLUSH_MS", "50"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "10"))
+
+# 받는 쪽이 보내는 쪽보다 앞서 나갈 수 있는 최대 조각 수
+STREAM_QUEUE_SIZE = 256
+
+HEARTBEAT_FRAME = ": keep-alive\n\n"
+
+# SSE 응답 헤더 (프록시가 응답을 모아서 보내거나 캐시하지 않도록)
+STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+# 큐에 넣는 항목 종류
+_CHUNK, _END, _ERROR = "chunk", "end", "error"
+
+# 받는 쪽 스레드가 중계 중인 StreamRelay (close_on_disconnect 가 소켓을 등록할 곳)
+_active_relay = contextvars.ContextVar('stream_relay', default=None)
+
+
+def close_on_disconnect(response):
+    """
+    httpx 응답 hook: 동기 StreamRelay 의 받는 쪽 스레드에서 연 응답이면, 클라이언트 연결이 끊길 때
+    이 응답의 소켓을 바로 닫도록 등록 (그 밖의 요청에서는 아무것도 하지 않음)
+
+    등록한 소켓은 응답 도중에 shutdown 하므로 연결을 재사용하지 않는(keep-alive 끈) 클라이언트에서만 써요.
+    """
+    relay = _active_relay.get()
+    stream = response.extensions.get('network_stream')
+    if relay is None or stream is None:
+        return
+    sock = stream.get_extra_info('socket')
+    if sock is not None:
+        relay._upstream_sockets.append(sock)
+
+
+def upstream_cancelled() -> bool:
+    """받는 쪽 스레드에서: 클라이언트 연결이 끊겨서 StreamRelay 가 소켓을 닫았는지 (백엔드 실패와 구분)"""
+    relay = _active_relay.get()
+    return relay is not None and relay._cancelled
+
+
+def sse_event(payload: dict) -> str:
+    """SSE data 프레임 (기존 응답과 같은 json.dumps 형식)"""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+class StreamStats:
+    """스트리밍 응답 하나의 카운터 (끝날 때 /metrics 와 요청 로그에 기록)"""
+
+    def __init__(self, trace: Optional[RequestTrace] = None):
+        self.trace = trace
+        self.started = trace.started if trace is not None else time.perf_counter()
+        self.first_token_at = None
+        self.last_token_at = None
+        self.first_content_at = None
+        self.tokens = 0
+        self.frames = 0
+        self.heartbeats = 0
+        self.finished = False
+
+    def token(self):
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.last_token_at = now
+        self.tokens += 1
+
+    def frame(self):
+        if self.first_content_at is None:
+            self.first_content_at = time.perf_counter()
+        self.frames += 1
+
+    def tokens_per_second(self) -> Optional[float]:
+        """첫 토큰부터 마지막 토큰까지 초당 토큰 수 (토큰이 2개 미만이면 None)"""
+        if self.tokens < 2 or self.last_token_at == self.first_token_at:
+            return None
+        return (self.tokens - 1) / (self.last_token_at - self.first_token_at)
+
+    def finish(self, outcome: str):
+        """
+        스트림 종료 기록
+
+        Args:
+            outcome: completed / cancelled (클라이언트가 연결을 끊음) / error
+        """
+        if self.finished:
+            return
+        self.finished = True
+        rate = self.tokens_per_second()
+        if METRICS_ENABLED:
+            STREAMS.inc(outcome=outcome)
+            STREAM_TOKENS.inc(self.tokens, outcome=outcome)
+            if self.first_content_at is not None:
+                STREAM_FIRST_CONTENT_SECONDS.observe(self.first_content_at - self.started)
+            if rate is not None:
+                STREAM_TOKENS_PER_SECOND.observe(rate)
+
+        if self.trace is not None:
+            self.trace.fields.update({
+                'stream_outcome': outcome,
+                'stream_tokens': self.tokens,
+                'stream_frames': self.frames,
+                'stream_heartbeats': self.heartbeats,
+                'first_content_ms': (round((self.first_content_at - self.started) * 1000, 2)
+                                     if self.first_content_at is not None else None),
+                'tokens_per_sec': round(rate, 2) if rate is not None else None,
+            })
+
+
+class StreamRelay:
+    """
+    답변 조각 → SSE 프레임 중계 (토큰 묶기 + keep-alive + 연결 끊김 시 받는 쪽 종료)
+
+    frames() (동기 생성기) / aframes() (비동기 생성기) 가 끝나면 text 에 전체 답변이 남아요.
+    """
+
+    def __init__(
+        self,
+        stats: Optional[StreamStats] = None,
+        flush_chars: int = STREAM_FLUSH_CHARS,
+        flush_ms: float = STREAM_FLUSH_MS,
+        heartbeat_seconds: float = STREAM_HEARTBEAT_SECONDS,
+        queue_size: int = STREAM_QUEUE_SIZE,
+    ):
+        """
+        Args:
+            stats: 카운터를 기록할 StreamStats (None이면 새로 만듦)
+            flush_chars: 이만큼 글자가 모이면 바로 전송
+            flush_ms: 모으기 시작한 뒤 이 시간(ms)이 지나면 전송
+            heartbeat_seconds: 보낸 것이 없을 때 keep-alive 주석 간격(초, 0이면 끔)
+            queue_size: 받는 쪽이 앞서 나갈 수 있는 최대 조각 수
+        """
+        self.stats = stats or StreamStats()
+        self.flush_chars = max(1, flush_chars)
+        self.flush_interval = max(0.0, flush_ms) / 1000
+        self.heartbeat_interval = heartbeat_seconds
+        self.queue_size = queue_size
+        self.parts: List[str] = []
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._pending_since = None
+        self._last_sent = time.perf_counter()
+        self._upstream_sockets = []
+        self._cancelled = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    # ------------------------------------------------------------------
+    # 묶기 / keep-alive 계산 (동기/비동기 공통)
+    # ------------------------------------------------------------------
+
+    def _add(self, chunk: str):
+        self.stats.token()
+        if not chunk:
+            return
+        self.parts.append(chunk)
+        if not self._pending:
+            self._pending_since = time.perf_counter()
+        self._pending.append(chunk)
+        self._pending_chars += len(chunk)
+
+    def _should_flush(self, now: float) -> bool:
+        if not self._pending:
+            return False
+        # 첫 프레임은 묶지 않고 바로 보냄 (첫 글자까지 시간을 늘리지 않음)
+        return (self.stats.first_content_at is None
+                or self._pending_chars >= self.flush_chars
+                or now - self._pending_since >= self.flush_interval)
+
+    def _flush(self) -> str:
+        content = "".join(self._pending)
+        self._pending = []
+        self._pending_chars = 0
+        self._pending_since = None
+        self._last_sent = time.perf_counter()
+        self.stats.frame()
+        return sse_event({'content': content})
+
+    def _heartbeat_due(self, now: float) -> bool:
+        return self.heartbeat_interval > 0 and now - self._last_sent >= self.heartbeat_interval
+
+    def _heartbeat(self) -> str:
+        self._last_sent = time.perf_counter()
+        self.stats.heartbeats += 1
+        return HEARTBEAT_FRAME
+
+    def _wait_time(self, now: float) -> Optional[float]:
+        """다음 조각을 기다릴 최대 시간 (묶어 둔 조각 전송 또는 keep-alive 시점까지)"""
+        deadlines = []
+        if self._pending:
+            deadlines.append(self._pending_since + self.flush_interval)
+        if self.heartbeat_interval > 0:
+            deadlines.append(self._last_sent + self.heartbeat_interval)
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - now)
+
+    def _on_idle(self, now: float) -> Optional[str]:
+        """기다리다 시간이 다 됐을 때 보낼 프레임"""
+        if self._should_flush(now):
+            return self._flush()
+        if self._heartbeat_due(now):
+            return self._heartbeat()
+        return None
+
+    # ------------------------------------------------------------------
+    # 동기 (Flask)
+    # ------------------------------------------------------------------
+
+    def run_with_heartbeats(self, func: Callable, *args, **kwargs) -> Generator[str, None, Any]:
+        """
+        func 를 스레드에서 실행하는 동안 keep-alive 프레임 생성 (yield from 의 값이 func 의 반환값)
+
+        검색/임베딩처럼 첫 프레임 전에 오래 걸리는 작업 중에도 연결을 유지하고,
+        그 사이 클라이언트가 끊으면 keep-alive 쓰기가 실패해서 바로 알 수 있어요.
+        """
+        done = queue.Queue(maxsize=1)
+
+        def run():
+            try:
+                done.put((_END, func(*args, **kwargs)))
+            except Exception as e:
+                done.put((_ERROR, e))
+
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(run,), name='stream-wait', daemon=True).start()
+        while True:
+            try:
+                kind, value = done.get(timeout=self._wait_time(time.perf_counter()))
+            except queue.Empty:
+                frame = self._on_idle(time.perf_counter())
+                if frame:
+                    yield frame
+                continue
+            if kind == _ERROR:
+                raise value
+            return value
+
+    def _close_upstream(self):
+        """등록된 받는 쪽 소켓을 닫아서 막혀 있는 읽기를 바로 끝냄 (Ollama 는 연결이 끊기면 생성 중단)"""
+        self._cancelled = True
+        sockets, self._upstream_sockets = self._upstream_sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def frames(self, chunks: Iterator[str]) -> Iterator[str]:
+        """
+        답변 조각 생성기를 스레드에서 읽으면서 SSE 프레임 생성
+
+        이 생성기가 끝나기 전에 닫히면(클라이언트 연결 끊김 - 프레임이나 keep-alive 쓰기 실패)
+        close_on_disconnect 로 등록된 소켓을 바로 닫고, 받는 쪽 스레드는 chunks 를 닫아요.
+        """
+        items = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        producing = threading.Event()
+        producing.set()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    items.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            _active_relay.set(self)
+            try:
+                for chunk in chunks:
+                    if not put((_CHUNK, chunk)):
+                        break
+                else:
+                    put((_END, None))
+            except Exception as e:
+                put((_ERROR, e))
+            finally:
+                producing.clear()
+                if stop.is_set() and hasattr(chunks, 'close'):
+                    chunks.close()
+
+        # 요청 추적(ttft 등 단계 기록)이 받는 쪽 스레드에서도 이어지도록 컨텍스트 복사
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(produce,), name='stream-relay', daemon=True).start()
+
+        try:
+            while True:
+                try:
+                    kind, value = items.get(timeout=self._wait_time(time.perf_counter()))
+                except queue.Empty:
+                    frame = self._on_idle(time.perf_counter())
+                    if frame:
+                        yield frame
+                    continue
+
+                if kind == _CHUNK:
+                    self._add(value)
+                    if self._should_flush(time.perf_counter()):
+                        yield self._flush()
+                    continue
+                if self._pending:
+                    yield self._flush()
+                if kind == _ERROR:
+                    raise value
+                return
+        finally:
+            stop.set()
+            # 받는 쪽이 아직 읽는 중이면(연결 끊김) 다음 토큰을 기다리지 않고 바로 닫음
+            if producing.is_set():
+                self._close_upstream()
+
+    # ------------------------------------------------------------------
+    # 비동기 (Quart)
+    # ------------------------------------------------------------------
+
+    async def aheartbeats_until(self, future: asyncio.Future) -> AsyncIterator[str]:
+        """
+        future 가 끝날 때까지 keep-alive 프레임 생성 (결과는 끝난 뒤 future.result() 로 읽음)
+
+        이 생성기가 닫히면(클라이언트 연결 끊김) future 를 취소해요.
+        """
+        try:
+            while not future.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), self._wait_time(time.perf_counter()))
+                except asyncio.TimeoutError:
+                    frame = self._on_idle(time.perf_counter())
+                    if frame:
+                        yield frame
+                except Exception:
+                    # 오류는 호출한 쪽이 future.result() 에서 받음
+                    break
+        finally:
+            if not future.done():
+                future.cancel()
+
+    async def aframes(self, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        답변 조각 비동기 생성기를 태스크에서 읽으면서 SSE 프레임 생성
+
+        이 생성기가 취소되거나 닫히면 받는 쪽 태스크를 취소하고 chunks 를 닫아요.
+        """
+        items = asyncio.Queue(maxsize=self.queue_size)
+
+        async def produce():
+            try:
+                async for chunk in chunks:
+                    await items.put((_CHUNK, chunk))
+                await items.put((_END, None))
+            except Exception as e:
+                await items.put((_ERROR, e))
+
+        # 태스크는 현재 컨텍스트(요청 추적)를 복사해서 실행됨
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                try:
+                    kind, value = await asyncio.wait_for(items.get(), self._wait_time(time.perf_counter()))
+                except asyncio.TimeoutError:
+                    frame = self._on_idle(time.perf_counter())
+                    if frame:
+                        yield frame
+                    continue
+
+                if kind == _CHUNK:
+                    self._add(value)
+                    if self._should_flush(time.perf_counter()):
+                        yield self._flush()
+                    continue
+                if self._pending:
+                    yield self._flush()
+                if kind == _ERROR:
+                    raise value
+                return
+        finally:
+            if not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except asyncio.CancelledError:
+                    pass
+            if hasattr(chunks, 'aclose'):
+                await chunks.aclose()
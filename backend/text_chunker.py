@@ -0,0 +1,167 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 문장 경계: 마침표/물음표/느낌표(소수점 제외), 말줄임표, 줄바꿈
+SENTENCE_BOUNDARY = re.compile(r'(?:(?<!\d)[.!?。？！…]+(?!\d)["\'”’)\]]*|\n)\s*')
+
+# 한 문장이 창보다 길 때 잘라낼 단위 (공백)
+WORD_PATTERN = re.compile(r'\S+')
+
+
+def approximate_token_count(text: str) -> int:
+    """
+    토크나이저가 없을 때 쓰는 토큰 수 추정
+
+    한국어 wordpiece는 보통 1.5글자당 1토큰 정도라서 공백을 뺀 글자 수로 계산해요.
+    """
+    return max(1, (len(text.replace(' ', '')) * 2 + 2) // 3)
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    한국어 문장 단위로 나누기
+
+    Returns:
+        각 문장의 (시작, 끝) 글자 위치 리스트 (앞뒤 공백 제외)
+    """
+    spans = []
+    start = 0
+
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        end = match.end()
+        if end > start:
+            spans.append((start, end))
+        start = end
+
+    if start < len(text):
+        spans.append((start, len(text)))
+
+    # 앞뒤 공백을 뺀 실제 문장 위치로 보정
+    stripped = []
+    for start, end in spans:
+        segment = text[start:end]
+        left = len(segment) - len(segment.lstrip())
+        right = len(segment.rstrip())
+        if right > left:
+            stripped.append((start + left, start + right))
+
+    return stripped
+
+
+class TextChunker:
+    """문장 경계를 지키면서 토큰 창 크기로 텍스트를 자르는 청커"""
+
+    def __init__(
+        self,
+        max_tokens: int = 120,
+        overlap_tokens: int = 20,
+        token_counter: Optional[Callable[[str], int]] = None
+    ):
+        """
+        Args:
+            max_tokens: 청크 하나의 최대 토큰 수 (임베딩 모델 입력 길이 이하)
+            overlap_tokens: 이웃한 청크끼리 겹치는 토큰 수
+            token_counter: 텍스트의 토큰 수를 세는 함수 (없으면 글자 수로 추정)
+        """
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens는 max_tokens보다 작아야 합니다")
+
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = token_counter or approximate_token_count
+
+    def _sentence_units(self, text: str) -> List[Tuple[int, int, int]]:
+        """문장 (시작, 끝, 토큰 수) 리스트. 창보다 긴 문장은 단어 단위로 쪼갬"""
+        units = []
+
+        for start, end in split_sentences(text):
+            tokens = self.count_tokens(text[start:end])
+            if tokens <= self.max_tokens:
+                units.append((start, end, tokens))
+                continue
+
+            # 너무 긴 문장은 단어를 모아서 창 크기에 맞춤
+            piece_start = None
+            piece_end = None
+            for word in WORD_PATTERN.finditer(text, start, end):
+                if piece_start is None:
+                    piece_start = word.start()
+                elif self.count_tokens(text[piece_start:word.end()]) > self.max_tokens:
+                    units.append((piece_start, piece_end, self.count_tokens(text[piece_start:piece_end])))
+                    piece_start = word.start()
+                piece_end = word.end()
+
+            if piece_start is not None:
+                units.append((piece_start, piece_end, self.count_tokens(text[piece_start:piece_end])))
+
+        return units
+
+    def split(self, text: str) -> List[Tuple[int, int]]:
+        """
+        텍스트를 청크 위치로 나누기
+
+        Returns:
+            각 청크의 (시작, 끝) 글자 위치 리스트
+        """
+        units = self._sentence_units(text)
+        chunks = []
+        window = []
+        window_tokens = 0
+
+        for unit in units:
+            if window and window_tokens + unit[2] > self.max_tokens:
+                chunks.append((window[0][0], window[-1][1]))
+
+                # 뒤쪽 문장들을 겹침 구간으로 남김
+                overlap = []
+                overlap_tokens = 0
+                for previous in reversed(window):
+                    if overlap_tokens + previous[2] > self.overlap_tokens:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_tokens += previous[2]
+
+                # 겹침 구간 + 새 문장이 창을 넘으면 겹침을 줄임
+                while overlap and overlap_tokens + unit[2] > self.max_tokens:
+                    overlap_tokens -= overlap.pop(0)[2]
+
+                window = overlap
+                window_tokens = overlap_tokens
+
+            window.append(unit)
+            window_tokens += unit[2]
+
+        if window:
+            chunks.append((window[0][0], window[-1][1]))
+
+        return chunks
+
+    def chunk(self, text: str, metadata: Dict = None, page: Optional[int] = None) -> List[Tuple[str, Dict]]:
+        """
+        텍스트를 청크와 청크별 메타데이터로 나누기
+
+        Args:
+            text: 원본 텍스트 (PDF 한 페이지, Word 문서, TXT 파일 등)
+            metadata: 모든 청크에 공통으로 붙일 메타데이터 (source 등)
+            page: 페이지 번호 (PDF인 경우)
+
+        Returns:
+            (청크 텍스트, 메타데이터) 리스트
+        """
+        if metadata is None:
+            metadata = {}
+
+        results = []
+        for index, (start, end) in enumerate(self.split(text)):
+            chunk_metadata = {
+                **metadata,
+                "chunk_index": index,
+                "char_start": start,
+                "char_end": end
+            }
+            if page is not None:
+                chunk_metadata["page"] = page
+
+            results.append((text[start:end], chunk_metadata))
+
+        return results
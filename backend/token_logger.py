@@ -1,8 +1,208 @@
+import atexit
+import glob
+import gzip
+import hashlib
 import json
+import os
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime
 
 LOG_FILE = "token_usage_log.jsonl"
 
+# 기본 설정 (환경 변수로 변경 가능)
+MAX_QUEUE_SIZE = int(os.getenv("TOKEN_LOG_QUEUE_SIZE", "10000"))
+FLUSH_INTERVAL = float(os.getenv("TOKEN_LOG_FLUSH_INTERVAL", "1.0"))
+MAX_BYTES = int(os.getenv("TOKEN_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+ROTATE_INTERVAL = float(os.getenv("TOKEN_LOG_ROTATE_INTERVAL", str(24 * 60 * 60)))
+BACKUP_COUNT = int(os.getenv("TOKEN_LOG_BACKUP_COUNT", "14"))
+COMPRESS = os.getenv("TOKEN_LOG_COMPRESS", "1") == "1"
+HASH_TEXT = os.getenv("TOKEN_LOG_HASH_TEXT", "0") == "1"
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class TokenUsageLogger:
+    """
+    토큰 사용량 비동기 로거
+
+    요청 스레드는 제한된 큐에 기록만 넣고 바로 돌아가요(큐가 꽉 차면 버림).
+    백그라운드 스레드가 모아서 한 번에 쓰고, 크기/시간 기준으로 파일을 교체(+gzip)해요.
+    """
+
+    def __init__(
+        self,
+        path: str = LOG_FILE,
+        max_queue_size: int = MAX_QUEUE_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_bytes: int = MAX_BYTES,
+        rotate_interval: float = ROTATE_INTERVAL,
+        backup_count: int = BACKUP_COUNT,
+        compress: bool = COMPRESS,
+        hash_text: bool = HASH_TEXT,
+    ):
+        """
+        Args:
+            path: 로그 파일 경로
+            max_queue_size: 대기 큐 최대 크기 (넘으면 기록을 버리고 dropped 증가)
+            flush_interval: 파일에 모아서 쓰는 주기(초)
+            max_bytes: 파일 크기가 이 값을 넘으면 교체 (0이면 크기 기준 교체 안 함)
+            rotate_interval: 파일을 연 지 이 시간(초)이 지나면 교체 (0이면 시간 기준 교체 안 함)
+            backup_count: 보관할 교체 파일 수
+            compress: 교체한 파일을 gzip으로 압축할지 여부
+            hash_text: 질문/답변 원문 대신 SHA-256 해시와 길이만 저장
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.hash_text = hash_text
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # 재시작해도 시간 기준 교체가 계속 미뤄지지 않도록 기존 파일이 있으면 그 파일의 수정 시각부터 셈
+        try:
+            self._opened_at = os.path.getmtime(path)
+        except OSError:
+            self._opened_at = time.time()
+
+        # 카운터는 요청 스레드와 백그라운드 스레드가 함께 바꾸므로 잠금 안에서 갱신
+        self._lock = threading.Lock()
+
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.write_errors = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="token-logger", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def log(self, record: dict) -> bool:
+        """
+        기록을 큐에 넣기 (절대 블로킹하지 않음)
+
+        Returns:
+            큐에 들어갔으면 True, 큐가 꽉 차서 버렸으면 False
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            except queue.Empty:
+                self._maybe_rotate()
+                continue
+
+            # 한 번에 쓸 수 있는 만큼 모으기
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch):
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+        try:
+            self._maybe_rotate(incoming=len(lines.encode("utf-8")))
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            with self._lock:
+                self.written += len(batch)
+        except OSError as e:
+            with self._lock:
+                self.write_errors += 1
+            print(f"❌ 토큰 로그 기록 실패: {e}")
+
+    def _maybe_rotate(self, incoming: int = 0):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            self._opened_at = time.time()
+            return
+
+        too_big = self.max_bytes and size > 0 and size + incoming > self.max_bytes
+        too_old = self.rotate_interval and time.time() - self._opened_at >= self.rotate_interval
+        if size > 0 and (too_big or too_old):
+            self._rotate()
+
+    def _rotate(self):
+        rotated = f"{self.path}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        os.replace(self.path, rotated)
+
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+
+        self._opened_at = time.time()
+        with self._lock:
+            self.rotations += 1
+
+        # 오래된 교체 파일 정리
+        backups = sorted(glob.glob(glob.escape(self.path) + ".*"))
+        for old in backups[:max(0, len(backups) - self.backup_count)]:
+            os.remove(old)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """큐에 쌓인 기록이 모두 쓰일 때까지 대기 (종료/테스트용)"""
+        if self._thread is None:
+            return True
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def close(self, timeout: float = 5.0):
+        """남은 기록을 쓰고 백그라운드 스레드 종료"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "dropped": self.dropped,
+                "rotations": self.rotations,
+                "write_errors": self.write_errors,
+            }
+
+
+_logger = TokenUsageLogger()
+
+
+def get_logger() -> TokenUsageLogger:
+    return _logger
+
+
 def log_token_usage(
     *,
     model: str,
@@ -11,16 +211,33 @@ def log_token_usage(
     input_tokens: int,
     output_tokens: int,
     total_tokens: int,
+    backend: str = "openai",
+    latency_ms: float = None,
 ):
     record = {
         "timestamp": datetime.utcnow().isoformat(),
+        "backend": backend,
         "model": model,
-        "user_text": user_text,
-        "response_text": response_text,
         "input_tokens": input_tokens,
         "output_tokens": output_tokens,
         "total_tokens": total_tokens,
     }
 
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    if _logger.hash_text:
+        record.update({
+            "user_text_sha256": hash_text(user_text),
+            "user_text_length": len(user_text or ""),
+            "response_text_sha256": hash_text(response_text),
+            "response_text_length": len(response_text or ""),
+        })
+    else:
+        record.update({
+            "user_text": user_text,
+            "response_text": response_text,
+        })
+
+    if latency_ms is not None:
+        record["latency_ms"] = round(latency_ms, 1)
+
+    # 요청 경로를 막지 않도록 큐에만 넣음
+    _logger.log(record)
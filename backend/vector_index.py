@@ -0,0 +1,318 @@
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 벡터 검색 색인 (환경 변수로 변경 가능)
+# - chroma: ChromaDB HNSW 색인에서 바로 검색 (float32)
+# - float16: 벡터를 float16으로 줄여서 numpy 배열로 전체 비교 (메모리 절반)
+# - int8: 벡터마다 scale을 두고 int8로 양자화 (메모리 약 1/4)
+# 압축 색인에서 뽑은 후보는 ChromaDB에 저장된 원래 임베딩으로 거리를 다시 계산해요 (RAGManager).
+# 주의: 압축 색인은 ChromaDB를 대신하지 않고 그 옆에 하나 더 두는 색인이에요.
+# ChromaDB는 여전히 float32 임베딩과 HNSW 그래프를 갖고 있으므로 전체 메모리는 압축 색인 크기만큼 늘어나요.
+# 압축 색인이 줄이는 것은 검색할 때 훑는 벡터 크기(메모리 대역폭)이고, 전체 크기는 RAGManager.vector_index_stats() 참고.
+VECTOR_INDEX_MODES = ('chroma', 'float16', 'int8')
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "chroma")
+
+# 압축 색인 저장 폴더 (벡터 DB 폴더 안)
+VECTOR_INDEX_DIR = "compact_vectors"
+
+# 한 번에 float32로 바꿔서 비교하는 벡터 수 (임시 버퍼 = 행 수 × 차원 × 4 바이트, CPU 캐시에 들어갈 만큼 작게)
+SCORE_BLOCK_ROWS = 2048
+
+COMPACT_DTYPES = {'float16': np.float16, 'int8': np.int8}
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    float32 벡터를 압축
+
+    Returns:
+        (압축한 벡터, 벡터별 scale - int8만, float16은 None)
+    """
+    if dtype == 'float16':
+        return vectors.astype(np.float16), None
+
+    # 벡터마다 가장 큰 절댓값이 127이 되도록 scale을 정해서 대칭 양자화
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class CompactVectorIndex:
+    """
+    압축 벡터 색인 (float16 / int8, 전체 비교)
+
+    질문과 모든 벡터의 L2 거리(제곱, ChromaDB 기본값과 같음)를 블록 단위로 계산해서 가까운 후보를 골라요.
+    저장 파일은 .npy 라서 다시 불러올 때 memmap 으로 열고, 문서가 바뀔 때만 메모리로 복사해요.
+    변경은 메모리에만 반영하고 save()를 부를 때 저장해요 (저장 후 첫 변경 때 낡은 저장 파일은 무효화).
+    """
+
+    def __init__(self, path: Optional[str] = None, dtype: str = 'float16'):
+        """
+        Args:
+            path: 색인 저장 폴더 (None이면 메모리에만 유지)
+            dtype: float16 / int8
+        """
+        if dtype not in COMPACT_DTYPES:
+            raise ValueError(f"지원하지 않는 압축 형식입니다: {dtype}")
+        self.path = path
+        self.dtype = dtype
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        # 변경 횟수 / 마지막으로 저장한 시점의 변경 횟수 (다르면 저장 필요)
+        self._version = 0
+        self._saved_version = 0
+        self._reset()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._positions
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return None if self._vectors is None else self._vectors.shape[1]
+
+    @property
+    def bytes_per_vector(self) -> int:
+        """벡터 하나에 쓰는 바이트 (압축 벡터 + 거리 계산용 제곱 노름 + int8 scale)"""
+        if self.dimension is None:
+            return 0
+        extra = 8 if self.dtype == 'int8' else 4
+        return self.dimension * np.dtype(COMPACT_DTYPES[self.dtype]).itemsize + extra
+
+    @property
+    def dirty(self) -> bool:
+        """저장 파일에 아직 반영하지 않은 변경이 있는지"""
+        return self._version != self._saved_version
+
+    def _touch(self):
+        """변경 기록 (lock 안에서 호출, 저장 후 첫 변경이면 낡은 저장 파일 무효화)"""
+        if not self.dirty:
+            self.delete_saved()
+        self._version += 1
+
+    def clear(self):
+        with self._lock:
+            self._touch()
+            self._reset()
+
+    def _reset(self):
+        with self._lock:
+            self._ids = []
+            self._positions = {}
+            self._vectors = None
+            self._scales = None
+            self._sq_norms = None
+            self._size = 0
+
+    def _arrays(self) -> Tuple[str, ...]:
+        """색인이 가진 배열 이름 (scale은 int8만)"""
+        return ('vectors', 'sq_norms', 'scales') if self.dtype == 'int8' else ('vectors', 'sq_norms')
+
+    def _reserve(self, rows: int, dimension: int):
+        """rows 개를 담을 수 있도록 배열 확보 (memmap 이거나 모자라면 메모리 배열로 복사, 2배씩 늘림)"""
+        if self._vectors is None:
+            capacity = max(rows, 1024)
+            self._vectors = np.empty((capacity, dimension), dtype=COMPACT_DTYPES[self.dtype])
+            self._sq_norms = np.empty(capacity, dtype=np.float32)
+            if self.dtype == 'int8':
+                self._scales = np.empty(capacity, dtype=np.float32)
+            return
+
+        capacity = len(self._vectors)
+        if rows <= capacity and self._vectors.flags.writeable:
+            return
+        if rows > capacity:
+            capacity = max(rows, capacity * 2)
+        for name in self._arrays():
+            old = getattr(self, f"_{name}")
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, f"_{name}", new)
+
+    def add(self, doc_ids: Iterable[str], embeddings):
+        """벡터 추가 (이미 있는 ID는 교체)"""
+        doc_ids = list(doc_ids)
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(doc_ids), -1)
+        if not doc_ids:
+            return
+
+        with self._lock:
+            if self.dimension is not None and vectors.shape[1] != self.dimension:
+                raise ValueError(f"임베딩 차원이 다릅니다: {vectors.shape[1]} (색인 {self.dimension})")
+
+            # 같은 호출 안에서 ID가 겹치면 마지막 벡터 사용
+            rows = {}
+            for row, doc_id in enumerate(doc_ids):
+                rows[doc_id] = row
+            new_ids = [doc_id for doc_id in rows if doc_id not in self._positions]
+            self._touch()
+            self._reserve(self._size + len(new_ids), vectors.shape[1])
+
+            for doc_id in new_ids:
+                self._positions[doc_id] = self._size
+                self._ids.append(doc_id)
+                self._size += 1
+
+            positions = np.array([self._positions[doc_id] for doc_id in rows], dtype=np.int64)
+            source = vectors[list(rows.values())]
+            codes, scales = quantize(source, self.dtype)
+            self._vectors[positions] = codes
+            if scales is not None:
+                self._scales[positions] = scales
+            self._sq_norms[positions] = np.einsum('ij,ij->i', source, source)
+
+    def remove(self, doc_ids: Iterable[str]):
+        """벡터 삭제 (마지막 벡터를 빈 자리로 옮김)"""
+        with self._lock:
+            targets = [doc_id for doc_id in set(doc_ids) if doc_id in self._positions]
+            if not targets:
+                return
+            self._touch()
+            self._reserve(self._size, self.dimension)
+            for doc_id in targets:
+                position = self._positions.pop(doc_id)
+                last = self._size - 1
+                if position != last:
+                    moved = self._ids[last]
+                    self._ids[position] = moved
+                    self._positions[moved] = position
+                    for name in self._arrays():
+                        array = getattr(self, f"_{name}")
+                        array[position] = array[last]
+                self._ids.pop()
+                self._size -= 1
+
+    def search(self, query_embedding, n_results: int = 10) -> List[Tuple[str, float]]:
+        """
+        L2 거리(제곱)가 가까운 벡터 검색 (압축 벡터 기준 근사 거리)
+
+        Returns:
+            (문서 ID, 거리) 리스트 (가까운 순)
+        """
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        with self._lock:
+            if not self._size or n_results <= 0:
+                return []
+            if query.shape[0] != self.dimension:
+                raise ValueError(f"질문 임베딩 차원이 다릅니다: {query.shape[0]} (색인 {self.dimension})")
+
+            # |q - v|^2 = |q|^2 - 2 q·v + |v|^2 (int8은 q·v = scale × q·codes)
+            distances = np.empty(self._size, dtype=np.float32)
+            buffer = np.empty((min(SCORE_BLOCK_ROWS, self._size), self.dimension), dtype=np.float32)
+            for start in range(0, self._size, SCORE_BLOCK_ROWS):
+                stop = min(start + SCORE_BLOCK_ROWS, self._size)
+                block = buffer[:stop - start]
+                block[...] = self._vectors[start:stop]
+                dots = block @ query
+                if self.dtype == 'int8':
+                    dots *= self._scales[start:stop]
+                distances[start:stop] = self._sq_norms[start:stop] - 2 * dots
+            distances += float(query @ query)
+
+            count = min(n_results, self._size)
+            top = np.argpartition(distances, count - 1)[:count] if count < self._size else np.arange(self._size)
+            top = top[np.argsort(distances[top], kind='stable')]
+            return [(self._ids[position], float(distances[position])) for position in top]
+
+    def stats(self) -> Dict:
+        """벡터 수 / 차원 / 벡터당 바이트 / 압축 색인 크기 (ChromaDB 쪽 크기는 포함하지 않음)"""
+        with self._lock:
+            dimension = self.dimension
+            return {
+                'mode': self.dtype,
+                'vectors': self._size,
+                'dimension': dimension,
+                'bytes_per_vector': self.bytes_per_vector,
+                'total_bytes': self._size * self.bytes_per_vector,
+                'float32_bytes': self._size * (dimension or 0) * 4,
+            }
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def save(self) -> bool:
+        """
+        색인 저장 (배열을 먼저 임시 파일에 쓰고 교체, 목록 파일은 마지막에 교체)
+
+        lock 안에서는 배열을 복사만 하고 파일 쓰기는 lock 밖에서 해서 검색을 오래 막지 않아요.
+        쓰는 동안 색인이 또 바뀌었으면 목록 파일을 바꾸지 않아요 (다음 저장 때 다시 씀).
+
+        Returns:
+            저장했으면 True
+        """
+        if not self.path:
+            return False
+        with self._save_lock:
+            with self._lock:
+                if not self.dirty and os.path.exists(self._file("index.json")):
+                    return False
+                version = self._version
+                arrays = {}
+                if self._vectors is not None:
+                    arrays = {name: np.array(getattr(self, f"_{name}")[:self._size]) for name in self._arrays()}
+                meta = {'dtype': self.dtype, 'count': self._size, 'dimension': self.dimension,
+                        'ids': list(self._ids)}
+
+            os.makedirs(self.path, exist_ok=True)
+            for name, array in arrays.items():
+                tmp_path = self._file(f"{name}.tmp.npy")
+                np.save(tmp_path, array)
+                os.replace(tmp_path, self._file(f"{name}.npy"))
+            tmp_path = self._file("index.json.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+
+            with self._lock:
+                if version != self._version:
+                    os.remove(tmp_path)
+                    return False
+                os.replace(tmp_path, self._file("index.json"))
+                self._saved_version = version
+        return True
+
+    def delete_saved(self):
+        """저장 파일 무효화 (다음 로드 때 재구축)"""
+        if self.path and os.path.exists(self._file("index.json")):
+            os.remove(self._file("index.json"))
+
+    def load(self) -> bool:
+        """
+        색인 불러오기 (배열은 memmap 으로 열어서 실제로 읽는 부분만 메모리에 올라감)
+
+        Returns:
+            불러왔으면 True, 파일이 없거나 형식이 다르거나 깨졌으면 False
+        """
+        if not self.path or not os.path.exists(self._file("index.json")):
+            return False
+        try:
+            with open(self._file("index.json"), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta['dtype'] != self.dtype:
+                return False
+            arrays = {}
+            if meta['count']:
+                for name in self._arrays():
+                    arrays[name] = np.load(self._file(f"{name}.npy"), mmap_mode='r')
+                    if len(arrays[name]) != meta['count']:
+                        return False
+        except Exception as e:
+            print(f"⚠️  압축 벡터 색인을 읽지 못했습니다: {e}")
+            return False
+
+        with self._lock:
+            self._reset()
+            self._saved_version = self._version
+            if meta['count']:
+                for name, array in arrays.items():
+                    setattr(self, f"_{name}", array)
+                self._ids = list(meta['ids'])
+                self._positions = {doc_id: position for position, doc_id in enumerate(self._ids)}
+                self._size = meta['count']
+        return True
@@ -52,7 +52,11 @@ export default function DocumentUpload() {
         ApiService.uploadFile(file, { subject, grade, topic }).subscribe({
             next: (response) => {
                 setUploadStatus('success');
-                setMessage(`${response.documents_added}개의 문서가 추가되었어요!`);
+                setMessage(
+                    response.duplicate_of
+                        ? `이미 같은 자료가 있어요 (${response.duplicate_of})`
+                        : `${response.documents_added}개의 문서가 추가되었어요!`
+                );
                 setFile(null);
                 setSubject('');
                 setGrade('');
@@ -2,16 +2,22 @@
 
 import { motion } from 'framer-motion';
 import { Sparkles, RotateCcw } from 'lucide-react';
-import { useSetAtom } from 'jotai';
-import { clearMessagesAtom } from '@/store/chatStore';
+import { useAtomValue, useSetAtom } from 'jotai';
+import { clearMessagesAtom, sessionIdAtom } from '@/store/chatStore';
+import { ApiService } from '@/services/api.service';
 import DocumentUpload from './DocumentUpload';
 import DocumentStats from './DocumentStats';
 
 export default function Header() {
     const clearMessages = useSetAtom(clearMessagesAtom);
+    const sessionId = useAtomValue(sessionIdAtom);
 
     const handleReset = () => {
         if (confirm('대화를 처음부터 다시 시작할까요?')) {
+            // 서버에 보관된 대화 이력도 삭제
+            if (sessionId) {
+                ApiService.deleteSession(sessionId).subscribe();
+            }
             clearMessages();
         }
     };
@@ -10,6 +10,7 @@ import {
     addMessageAtom,
     ragEnabledAtom,
     documentStatsAtom,
+    sessionIdAtom,
     chatRequestSubject,
     uploadRequestSubject,
     healthCheckSubject,
@@ -21,6 +22,7 @@ export function useChatController() {
     const [isLoading, setIsLoading] = useAtom(isLoadingAtom);
     const [error, setError] = useAtom(errorAtom);
     const [ragEnabled] = useAtom(ragEnabledAtom);
+    const [sessionId, setSessionId] = useAtom(sessionIdAtom);
     const setDocumentStats = useSetAtom(documentStatsAtom);
     const addMessage = useSetAtom(addMessageAtom);
 
@@ -40,29 +42,20 @@ export function useChatController() {
                     // 사용자 메시지 추가
                     addMessage({ content: message, role: 'user' });
                 }),
-                switchMap(({ message: userMessage, useRag }) => {
-                    console.log('🔄 switchMap 시작');
-                    console.log('messages:', messages);
-                    // 대화 이력 준비
-                    const conversationHistory = messages
-                        .filter((msg) => msg.id !== 'welcome')
-                        .concat([
-                            {
-                                id: `temp-${Date.now()}`,
-                                role: 'user' as const,
-                                content: userMessage,
-                                timestamp: new Date(),
-                            },
-                        ]);
-
-                    console.log('📜 대화 이력:', conversationHistory.length, '개');
-
-                    // API 호출 Observable 생성
-                    return ApiService.sendMessage(userMessage, conversationHistory, useRag).pipe(
+                switchMap(({ message: userMessage, sessionId: currentSessionId, useRag }) => {
+                    console.log('🔄 switchMap 시작, 세션:', currentSessionId);
+
+                    // API 호출 Observable 생성 (대화 이력은 서버 세션에 있음)
+                    return ApiService.sendMessage(userMessage, currentSessionId, useRag).pipe(
                         tap((response) => {
                             console.log('✅ tap 실행 - API 응답:', response);
                             console.log('✅ 응답 내용:', response.response.substring(0, 100));
 
+                            // 다음 요청에 사용할 세션 ID 저장
+                            if (response.session_id) {
+                                setSessionId(response.session_id);
+                            }
+
                             // 응답 메시지 추가
                             addMessage({
                                 content: response.response,
@@ -164,6 +157,7 @@ export function useChatController() {
         setIsLoading,
         setError,
         setDocumentStats,
+        setSessionId,
         ragEnabled,
     ]);
 
@@ -180,6 +174,7 @@ export function useChatController() {
         console.log('📤 chatRequestSubject.next 호출');
         chatRequestSubject.next({
             message: message.trim(),
+            sessionId,
             useRag: ragEnabled,
         });
         console.log('📤 chatRequestSubject.next 완료');
@@ -1,10 +1,11 @@
-import { Observable, from, throwError, of } from 'rxjs';
+import { Observable, from, throwError, of, timer } from 'rxjs';
 import { ajax, AjaxResponse } from 'rxjs/ajax';
-import { map, catchError, retry, timeout, shareReplay } from 'rxjs/operators';
-import { Message, ChatResponse, DocumentStats, UploadResponse } from '@/types/chat';
+import { map, catchError, retry, timeout, shareReplay, switchMap, takeWhile, last } from 'rxjs/operators';
+import { ChatResponse, DocumentStats, UploadJob, UploadResponse } from '@/types/chat';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000';
 const REQUEST_TIMEOUT = 60000; // 30초
+const UPLOAD_POLL_INTERVAL = 1000; // 업로드 작업 상태 확인 간격
 
 /**
  * RxJS 기반 API 서비스
@@ -28,15 +29,10 @@ export class ApiService {
     }
 
     /**
-     * 채팅 메시지 전송 (대화 이력 포함)
+     * 채팅 메시지 전송 (대화 이력은 서버 세션에 보관, 세션 ID만 전송)
      */
-    static sendMessage(message: string, history: Message[], useRag: boolean = true): Observable {
-        const conversationHistory = history.map((msg) => ({
-            role: msg.role,
-            content: msg.content,
-        }));
-
-        console.log('📤 API 요청 시작:', { message, historyLength: history.length });
+    static sendMessage(message: string, sessionId: string | null, useRag: boolean = true): Observable<ChatResponse> {
+        console.log('📤 API 요청 시작:', { message, sessionId });
 
         return from(
             fetch(`${API_URL}/chat`, {
@@ -46,7 +42,7 @@ export class ApiService {
                 },
                 body: JSON.stringify({
                     message,
-                    history: conversationHistory,
+                    session_id: sessionId,
                     use_rag: useRag,
                 }),
                 mode: 'cors', // 명시적 CORS
@@ -73,13 +69,12 @@ export class ApiService {
     /**
      * 스트리밍 채팅 (EventSource 기반)
      */
-    static sendMessageStream(message: string, history: Message[], useRag: boolean = true): Observable<{ content?: string; done?: boolean }> {
+    static sendMessageStream(
+        message: string,
+        sessionId: string | null,
+        useRag: boolean = true
+    ): Observable<{ session_id?: string; content?: string; done?: boolean; sources?: ChatResponse['sources'] }> {
         return new Observable((observer: any) => {
-            const conversationHistory = history.map((msg) => ({
-                role: msg.role,
-                content: msg.content,
-            }));
-
             fetch(`${API_URL}/chat/stream`, {
                 method: 'POST',
                 headers: {
@@ -87,7 +82,7 @@ export class ApiService {
                 },
                 body: JSON.stringify({
                     message,
-                    history: conversationHistory,
+                    session_id: sessionId,
                     use_rag: useRag,
                 }),
             })
@@ -139,7 +134,24 @@ export class ApiService {
     }
 
     /**
-     * 파일 업로드
+     * 대화 세션 삭제 (새 대화 시작)
+     */
+    static deleteSession(sessionId: string): Observable<{ session_id: string; deleted: boolean }> {
+        return ajax({
+            url: `${API_URL}/sessions/${encodeURIComponent(sessionId)}`,
+            method: 'DELETE',
+        }).pipe(
+            timeout(5000),
+            map((ajaxResponse: AjaxResponse<{ session_id: string; deleted: boolean }>) => ajaxResponse.response),
+            catchError((error) => {
+                console.error('Session delete error:', error);
+                return of({ session_id: sessionId, deleted: false });
+            })
+        );
+    }
+
+    /**
+     * 파일 업로드 (서버가 백그라운드에서 처리하므로 작업이 끝날 때까지 상태를 확인)
      */
     static uploadFile(
         file: File,
@@ -161,8 +173,18 @@ export class ApiService {
             method: 'POST',
             body: formData,
         }).pipe(
-            timeout(60000), // 파일 업로드는 60초 타임아웃
+            timeout(60000), // 파일 전송은 60초 타임아웃
             map((ajaxResponse: AjaxResponse<UploadResponse>) => ajaxResponse.response),
+            switchMap((accepted) =>
+                ApiService.waitForUploadJob(accepted.job_id).pipe(
+                    map((job) => ({
+                        ...accepted,
+                        status: job.status,
+                        documents_added: job.documents_added,
+                        duplicate_of: job.duplicate_of,
+                    }))
+                )
+            ),
             catchError((error) => {
                 console.error('Upload error:', error);
                 return throwError(() => new Error('파일 업로드 실패'));
@@ -170,6 +192,18 @@ export class ApiService {
         );
     }
 
+    /**
+     * 업로드 작업이 끝날 때까지 상태 확인 (끝난 작업 정보 하나를 내보냄)
+     */
+    static waitForUploadJob(jobId: string): Observable<UploadJob> {
+        return timer(0, UPLOAD_POLL_INTERVAL).pipe(
+            switchMap(() => ajax.getJSON<UploadJob>(`${API_URL}/upload/jobs/${encodeURIComponent(jobId)}`)),
+            takeWhile((job) => job.status !== 'done' && job.status !== 'failed', true),
+            last(),
+            switchMap((job) => (job.status === 'failed' ? throwError(() => new Error(job.error || '업로드 처리 실패')) : of(job)))
+        );
+    }
+
     /**
      * 문서 통계 조회
      */
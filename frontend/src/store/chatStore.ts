@@ -17,6 +17,9 @@ export const errorAtom = atom<string | null>(null);
 export const ragEnabledAtom = atom<boolean>(true);
 export const documentStatsAtom = atom<DocumentStats | null>(null);
 
+// 서버 대화 세션 ID (대화 이력은 서버가 보관하고, 요청에는 이 ID만 보냄)
+export const sessionIdAtom = atom<string | null>(null);
+
 // 메시지 추가 액션
 export const addMessageAtom = atom(null, (get, set, message: Omit<Message, 'id' | 'timestamp'>) => {
     const newMessage: Message = {
@@ -44,12 +47,14 @@ export const updateLastMessageAtom = atom(null, (get, set, content: string) => {
 // 메시지 전체 삭제
 export const clearMessagesAtom = atom(null, (get, set) => {
     set(messagesAtom, [initialMessage]);
+    set(sessionIdAtom, null);
     set(errorAtom, null);
 });
 
 // RxJS Subjects (이벤트 스트림)
 export const chatRequestSubject = new Subject<{
     message: string;
+    sessionId: string | null;
     useRag: boolean;
 }>();
 
@@ -10,6 +10,7 @@ export interface Message {
 export interface ChatResponse {
     response: string;
     timestamp: string;
+    session_id?: string;
     rag_used?: boolean;
     sources?: Array<{
         subject?: string;
@@ -33,11 +34,33 @@ export interface DocumentStats {
     subjects: Record<string, number>;
 }
 
-// 업로드 응답 타입
+// 업로드 작업 상태
+export type UploadJobStatus = 'queued' | 'extracting' | 'embedding' | 'done' | 'failed';
+
+export interface UploadJob {
+    job_id: string;
+    filename: string;
+    status: UploadJobStatus;
+    progress: number;
+    pages_total: number | null;
+    pages_done: number;
+    chunks_total: number;
+    chunks_done: number;
+    documents_added: number;
+    duplicate_of: string | null; // 같은 내용의 파일이 이미 있으면 그 파일 이름
+    deleted: number; // 수정본으로 교체되면서 지운 이전 청크 수
+    error: string | null;
+}
+
+// 업로드 응답 타입 (documents_added는 작업이 끝난 뒤 채워짐)
 export interface UploadResponse {
     message: string;
+    job_id: string;
+    status: UploadJobStatus;
+    status_url: string;
     filename: string;
-    documents_added: number;
+    documents_added?: number;
+    duplicate_of?: string | null;
     metadata: {
         subject?: string;
         grade?: string;